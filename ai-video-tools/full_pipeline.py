@@ -5,12 +5,173 @@ Erstellt automatisch längere Lernvideos aus Text-Skripten
 """
 
 import os
+import re
 import sys
 import json
+import time
+import uuid
+import shutil
 import subprocess
 from pathlib import Path
 import argparse
-from typing import Optional, List
+from typing import Optional, List, Iterable, Iterator
+
+# Abkürzungen, nach denen ein Punkt kein Satzende ist (klein geschrieben, ohne Schlusspunkt)
+ABBREVIATIONS = {
+    "z.b", "d.h", "u.a", "o.ä", "s.o", "s.u", "u.u", "bzw", "usw", "vgl", "ca", "etc",
+    "evtl", "ggf", "inkl", "exkl", "zzgl", "nr", "abs", "bsp", "dr", "prof", "hr", "fr",
+    "st", "str", "jh", "mio", "mrd", "e.g", "i.e", "mr", "mrs", "ms", "vs", "no", "fig"
+}
+
+# Encoder-Profile für den finalen Export (entsprechen autark.video.encoding.QUALITY_PRESETS)
+ENCODER_PROFILES = {
+    "preview": {"preset": "ultrafast", "crf": 32, "tune": "fastdecode"},
+    "720p": {"preset": "veryfast", "crf": 23, "tune": None},
+    "1080p": {"preset": "medium", "crf": 21, "tune": None},
+    "4K": {"preset": "slow", "crf": 20, "tune": None},
+}
+ENCODER_CODECS = {"h264": "libx264", "h265": "libx265", "hevc": "libx265"}
+
+# Zwischenformat der Segmente: MJPEG (nur Intra-Frames, billig zu schreiben und zu schneiden).
+# Verlustbehaftet komprimiert wird nur einmal, beim finalen Export.
+MEZZANINE_FOURCC = "MJPG"
+MEZZANINE_EXTENSION = "avi"
+
+# Grobe Dateigrößen für die Platzprüfung vor dem Schreiben (eher zu hoch geschätzt)
+MEZZANINE_BYTES_PER_PIXEL = 0.5      # MJPEG q:v 2
+AUDIO_BYTES_PER_SECOND = 2 * 48000   # 16 Bit PCM mono
+
+# Satzende: . ! ? … (auch mehrfach), optional gefolgt von schließenden Anführungszeichen/Klammern,
+# dann Leerraum oder Textende
+SENTENCE_END = re.compile(r'[.!?…]+[\"\'“”»«‘’)\]]*(?=\s|$)')
+NEXT_WORD = re.compile(r'\s*[(\"\'„“‚‘»«]*(\w*)')
+
+# Nach einer Ordinalzahl ("am 3. Oktober") geht der Satz weiter
+MONTHS = {
+    "januar", "jänner", "februar", "märz", "april", "mai", "juni", "juli", "august",
+    "september", "oktober", "november", "dezember"
+}
+
+class DiskQuotaExceeded(RuntimeError):
+    """Kein Platz auf dem Datenträger, auch nach Warten nicht"""
+
+class ScratchSpace:
+    """Arbeitsverzeichnis eines Pipeline-Laufs
+
+    Jeder Lauf schreibt nach temp-files/run_<id>/, parallele Läufe kommen sich
+    also nicht in die Quere. Zwischendateien werden mit der Zahl ihrer
+    Verbraucher registriert und gelöscht, sobald der letzte fertig ist.
+    Vor jedem Schreiben prüft wait_for_space(), ob genug Platz frei bleibt,
+    und pausiert sonst (z.B. bis ein paralleler Lauf aufgeräumt hat).
+    """
+
+    def __init__(self, root: Path, run_id: Optional[str] = None,
+                 min_free_mb: int = 500, max_run_mb: Optional[int] = None,
+                 max_wait_seconds: float = 300, poll_interval: float = 2.0,
+                 keep_files: bool = False):
+        self.run_id = run_id or f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{uuid.uuid4().hex[:6]}"
+        self.run_dir = Path(root) / f"run_{self.run_id}"
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+
+        self.min_free_bytes = min_free_mb * 1024 ** 2
+        self.max_run_bytes = max_run_mb * 1024 ** 2 if max_run_mb else None
+        self.max_wait_seconds = max_wait_seconds
+        self.poll_interval = poll_interval
+        self.keep_files = keep_files
+
+        self.refcounts = {}   # Pfad -> verbleibende Verbraucher
+        self.sizes = {}       # Pfad -> Größe in Bytes
+        self.usage = 0
+        self.peak_usage = 0
+        self.files_created = 0
+        self.files_deleted = 0
+        self.wait_seconds = 0.0
+
+    def path(self, name: str) -> Path:
+        """Pfad einer Zwischendatei in diesem Lauf"""
+        return self.run_dir / name
+
+    def wait_for_space(self, expected_bytes: int = 0):
+        """Pausiert, bis expected_bytes geschrieben werden können, ohne das Limit zu reißen"""
+        if self.max_run_bytes and self.usage + expected_bytes > self.max_run_bytes:
+            # Eigenes Laufbudget: Warten hilft nicht, nur eigene Verbraucher geben frei
+            raise DiskQuotaExceeded(
+                f"Laufbudget überschritten: {(self.usage + expected_bytes) / 1024 ** 2:.0f} MB "
+                f"> {self.max_run_bytes / 1024 ** 2:.0f} MB"
+            )
+
+        started = time.monotonic()
+        warned = False
+        while shutil.disk_usage(self.run_dir).free - expected_bytes < self.min_free_bytes:
+            waited = time.monotonic() - started
+            if waited >= self.max_wait_seconds:
+                self.wait_seconds += waited
+                raise DiskQuotaExceeded(
+                    f"Datenträger fast voll: weniger als {self.min_free_bytes / 1024 ** 2:.0f} MB "
+                    f"frei nach {waited:.0f}s Warten"
+                )
+            if not warned:
+                print(f"   ⏸️ Datenträger fast voll, pausiere Rendering...")
+                warned = True
+            time.sleep(self.poll_interval)
+
+        if warned:
+            self.wait_seconds += time.monotonic() - started
+            print("   ▶️ Genug Platz frei, Rendering läuft weiter")
+
+    def register(self, path: Path, consumers: int = 1) -> bool:
+        """Erfasst eine fertig geschriebene Zwischendatei mit ihrer Verbraucherzahl"""
+        path = Path(path)
+        if not path.exists():
+            return False
+
+        size = path.stat().st_size
+        self.refcounts[path] = consumers
+        self.sizes[path] = size
+        self.usage += size
+        self.peak_usage = max(self.peak_usage, self.usage)
+        self.files_created += 1
+
+        if consumers <= 0:
+            self.release(path, 0)
+        return True
+
+    def release(self, path: Path, count: int = 1):
+        """Ein Verbraucher ist fertig; beim letzten wird die Datei gelöscht"""
+        path = Path(path)
+        if path not in self.refcounts:
+            return
+
+        self.refcounts[path] -= count
+        if self.refcounts[path] > 0 or self.keep_files:
+            return
+
+        del self.refcounts[path]
+        self.usage -= self.sizes.pop(path)
+        try:
+            path.unlink()
+            self.files_deleted += 1
+        except FileNotFoundError:
+            pass
+
+    def cleanup(self):
+        """Löscht das komplette Laufverzeichnis"""
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        self.refcounts.clear()
+        self.sizes.clear()
+        self.usage = 0
+
+    def report(self) -> dict:
+        """Kennzahlen des Laufs (Peak = maximal gleichzeitig belegter Platz)"""
+        return {
+            "run_id": self.run_id,
+            "run_dir": str(self.run_dir),
+            "peak_mb": round(self.peak_usage / 1024 ** 2, 2),
+            "current_mb": round(self.usage / 1024 ** 2, 2),
+            "files_created": self.files_created,
+            "files_deleted": self.files_deleted,
+            "wait_seconds": round(self.wait_seconds, 1),
+        }
 
 class AIVideoPipeline:
     """Komplette Pipeline für KI-Video-Erstellung"""
@@ -20,6 +181,8 @@ class AIVideoPipeline:
         self.project_root = Path.cwd()
         self.temp_dir = self.project_root / "temp-files"
         self.output_dir = self.project_root / "exports"
+        self.scratch = None
+        self.last_scratch_report = None
         
         # Ordner erstellen
         self.temp_dir.mkdir(exist_ok=True)
@@ -34,6 +197,8 @@ class AIVideoPipeline:
             print(f"⚠️ Konfiguration {config_file} nicht gefunden, verwende Defaults")
             return {
                 "video_settings": {"resolution": "1920x1080", "fps": 30},
+                "encoder": {"quality": "1080p", "codec": "h264", "threads": 0, "gop_seconds": 2},
+                "scratch": {"min_free_mb": 500, "max_run_mb": None, "max_wait_seconds": 300},
                 "ai_models": {
                     "text_to_speech": "coqui-tts",
                     "text_to_video": "stable-video-diffusion"
@@ -51,33 +216,97 @@ class AIVideoPipeline:
             print(f"❌ Skript-Datei nicht gefunden: {script_file}")
             sys.exit(1)
     
-    def split_script_into_segments(self, script: str, max_length: int = 200) -> List[str]:
-        """Teilt Skript in Segmente für bessere Verarbeitung"""
-        # Einfache Segmentierung nach Absätzen oder Sätzen
-        paragraphs = script.split('\n\n')
-        segments = []
+    def stream_paragraphs(self, script_file: str) -> Iterator[str]:
+        """Liest das Skript zeilenweise und liefert Absätze, ohne die ganze Datei zu laden"""
+        try:
+            f = open(script_file, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            print(f"❌ Skript-Datei nicht gefunden: {script_file}")
+            sys.exit(1)
+        
+        print(f"📜 Skript wird gestreamt: {script_file}")
+        with f:
+            lines = []
+            for line in f:
+                if line.strip():
+                    lines.append(line.strip())
+                elif lines:
+                    yield " ".join(lines)
+                    lines = []
+            if lines:
+                yield " ".join(lines)
+    
+    def split_sentences(self, paragraph: str) -> Iterator[str]:
+        """Teilt einen Absatz an Satzgrenzen (beachtet Abkürzungen, ?/! und Anführungszeichen)"""
+        start = 0
+        for match in SENTENCE_END.finditer(paragraph):
+            end = match.end()
+            
+            if match.group() == ".":
+                # Wort vor dem Punkt prüfen: Abkürzung, Initiale oder Ordinalzahl?
+                preceding = paragraph[start:match.start()].split()
+                word = preceding[-1].lstrip("(\"'„“‚‘»«").lower() if preceding else ""
+                if word in ABBREVIATIONS or (len(word) == 1 and not word.isdigit()):
+                    continue
+                if word.isdigit() and self._is_ordinal_context(paragraph, end):
+                    continue
+            
+            sentence = paragraph[start:end].strip()
+            if sentence:
+                yield sentence
+            start = end
         
+        rest = paragraph[start:].strip()
+        if rest:
+            yield rest
+    
+    @staticmethod
+    def _is_ordinal_context(paragraph: str, position: int) -> bool:
+        """Zahl mit Punkt als Ordinalzahl lesen? Nur vor kleingeschriebenem Wort oder Monatsnamen
+        ("am 3. Oktober", "der 2. große Umbau"), nicht vor einem neuen Satz ("im Jahr 1989. Danach")"""
+        following = NEXT_WORD.match(paragraph, position).group(1)
+        return bool(following) and (following[0].islower() or following.lower() in MONTHS)
+    
+    def iter_segments(self, paragraphs: Iterable[str], max_length: int = 200) -> Iterator[str]:
+        """Erzeugt Segmente als Generator mit rollendem Satzpuffer"""
         for paragraph in paragraphs:
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            
             if len(paragraph) <= max_length:
-                segments.append(paragraph.strip())
-            else:
-                # Lange Absätze nach Sätzen aufteilen
-                sentences = paragraph.split('. ')
-                current_segment = ""
+                yield paragraph
+                continue
+            
+            # Lange Absätze nach Sätzen aufteilen
+            buffer = []
+            buffer_length = 0
+            
+            for sentence in self.split_sentences(paragraph):
+                # +1 für das Leerzeichen zwischen den Sätzen
+                added_length = len(sentence) + (1 if buffer else 0)
                 
-                for sentence in sentences:
-                    if len(current_segment + sentence) <= max_length:
-                        current_segment += sentence + ". "
-                    else:
-                        if current_segment:
-                            segments.append(current_segment.strip())
-                        current_segment = sentence + ". "
+                if buffer and buffer_length + added_length > max_length:
+                    yield " ".join(buffer)
+                    buffer = []
+                    buffer_length = 0
+                    added_length = len(sentence)
                 
-                if current_segment:
-                    segments.append(current_segment.strip())
-        
+                buffer.append(sentence)
+                buffer_length += added_length
+            
+            if buffer:
+                yield " ".join(buffer)
+    
+    def stream_segments(self, script_file: str, max_length: int = 200) -> Iterator[str]:
+        """Liest das Skript lazy und liefert Segmente, sobald sie vollständig sind"""
+        return self.iter_segments(self.stream_paragraphs(script_file), max_length)
+    
+    def split_script_into_segments(self, script: str, max_length: int = 200) -> List[str]:
+        """Teilt Skript in Segmente für bessere Verarbeitung"""
+        segments = list(self.iter_segments(script.split('\n\n'), max_length))
         print(f"📝 Skript in {len(segments)} Segmente aufgeteilt")
-        return [seg for seg in segments if seg.strip()]
+        return segments
     
     def generate_speech(self, text: str, output_file: str) -> bool:
         """Generiert Sprache aus Text"""
@@ -111,7 +340,29 @@ class AIVideoPipeline:
                 print("   ❌ Keine TTS-Engine verfügbar!")
                 return False
     
-    def generate_video_segment(self, prompt: str, output_file: str, duration: int = 10) -> bool:
+    def get_audio_duration(self, audio_file: str) -> Optional[float]:
+        """Ermittelt die exakte Dauer einer Audiodatei (WAV aus dem Header, sonst über moviepy)"""
+        import wave
+        
+        try:
+            with wave.open(audio_file, 'rb') as wav:
+                return wav.getnframes() / float(wav.getframerate())
+        except (wave.Error, EOFError):
+            pass  # z.B. gTTS schreibt MP3-Daten
+        except FileNotFoundError:
+            return None
+        
+        try:
+            from moviepy.editor import AudioFileClip
+            clip = AudioFileClip(audio_file)
+            duration = clip.duration
+            clip.close()
+            return duration
+        except Exception as e:
+            print(f"   ⚠️ Audiodauer nicht lesbar ({audio_file}): {e}")
+            return None
+    
+    def generate_video_segment(self, prompt: str, output_file: str, duration: float = 10) -> bool:
         """Generiert Video-Segment aus Text-Prompt"""
         print(f"🎬 Generiere Video-Segment: {prompt[:50]}...")
         
@@ -126,10 +377,10 @@ class AIVideoPipeline:
             # Video-Parameter
             fps = self.config["video_settings"]["fps"]
             width, height = 1920, 1080
-            frames = duration * fps
+            frames = int(round(duration * fps))
             
             # Video-Writer erstellen
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            fourcc = cv2.VideoWriter_fourcc(*MEZZANINE_FOURCC)
             out = cv2.VideoWriter(output_file, fourcc, fps, (width, height))
             
             for frame_num in range(frames):
@@ -178,9 +429,37 @@ class AIVideoPipeline:
         
         return lines
     
+    def get_encoder_settings(self) -> dict:
+        """Übersetzt das Encoder-Profil aus der Konfiguration in moviepy-Parameter"""
+        encoder = self.config.get("encoder", {})
+        profile = ENCODER_PROFILES.get(encoder.get("quality", "1080p"), ENCODER_PROFILES["1080p"])
+        codec = ENCODER_CODECS.get(encoder.get("codec", "h264"), "libx264")
+        fps = self.config["video_settings"]["fps"]
+        
+        crf = profile["crf"] + (4 if codec == "libx265" else 0)  # x265 erreicht gleiche Qualität bei höherem CRF
+        ffmpeg_params = [
+            "-crf", str(crf),
+            "-pix_fmt", "yuv420p",
+            "-g", str(int(round(encoder.get("gop_seconds", 2) * fps))),
+        ]
+        if profile["tune"] and codec == "libx264":
+            ffmpeg_params += ["-tune", profile["tune"]]
+        
+        return {
+            "codec": codec,
+            "preset": profile["preset"],
+            "threads": encoder.get("threads") or os.cpu_count(),
+            "audio_codec": "aac",
+            "ffmpeg_params": ffmpeg_params,
+        }
+    
     def combine_segments(self, audio_files: List[str], video_files: List[str], 
-                        output_file: str) -> bool:
-        """Kombiniert Audio- und Video-Segmente zu einem Video"""
+                        output_file: str, timing_first: bool = False) -> bool:
+        """Kombiniert Audio- und Video-Segmente zu einem Video
+        
+        Mit timing_first=True wurden die Videos bereits auf die Audiolänge gerendert:
+        dann wird nichts geloopt oder aufgefüllt, nur Audio auf die Videolänge begrenzt.
+        """
         print(f"🔗 Kombiniere {len(audio_files)} Segmente zu finalem Video...")
         
         try:
@@ -198,7 +477,11 @@ class AIVideoPipeline:
                     audio_clip = AudioFileClip(audio_file)
                     
                     # Audio zur Video-Länge anpassen oder umgekehrt
-                    if audio_clip.duration > video_clip.duration:
+                    if timing_first:
+                        # Abweichung höchstens ein halbes Frame: kein Loop, kein Padding
+                        if audio_clip.duration > video_clip.duration:
+                            audio_clip = audio_clip.subclip(0, video_clip.duration)
+                    elif audio_clip.duration > video_clip.duration:
                         video_clip = video_clip.loop(duration=audio_clip.duration)
                     else:
                         audio_clip = audio_clip.loop(duration=video_clip.duration)
@@ -213,7 +496,7 @@ class AIVideoPipeline:
             if clips:
                 # Alle Clips zusammenfügen
                 final_video = concatenate_videoclips(clips)
-                final_video.write_videofile(output_file, codec='libx264', audio_codec='aac')
+                final_video.write_videofile(output_file, **self.get_encoder_settings())
                 
                 # Aufräumen
                 for clip in clips:
@@ -261,60 +544,152 @@ class AIVideoPipeline:
             print(f"   ❌ Fehler bei PC-Animation-Integration: {e}")
             return False
     
+    def create_scratch_space(self, keep_files: bool = False) -> ScratchSpace:
+        """Legt das Arbeitsverzeichnis für einen neuen Lauf an (Limits aus config["scratch"])"""
+        scratch_config = self.config.get("scratch", {})
+        self.scratch = ScratchSpace(
+            self.temp_dir,
+            min_free_mb=scratch_config.get("min_free_mb", 500),
+            max_run_mb=scratch_config.get("max_run_mb"),
+            max_wait_seconds=scratch_config.get("max_wait_seconds", 300),
+            keep_files=keep_files
+        )
+        return self.scratch
+    
+    def estimate_segment_bytes(self, duration: float) -> dict:
+        """Geschätzte Größe von Audio- und Video-Zwischendatei eines Segments"""
+        width, height = (int(side) for side in
+                         self.config["video_settings"].get("resolution", "1920x1080").split("x"))
+        frames = duration * self.config["video_settings"]["fps"]
+        return {
+            "audio": int(duration * AUDIO_BYTES_PER_SECOND),
+            "video": int(width * height * frames * MEZZANINE_BYTES_PER_PIXEL),
+        }
+    
     def run_pipeline(self, script_file: str, output_name: str, 
-                    style: str = "educational", duration_per_segment: int = 10) -> str:
-        """Führt komplette Pipeline aus"""
+                    style: str = "educational", duration_per_segment: int = 10,
+                    timing_first: bool = False, keep_temp: bool = False) -> str:
+        """Führt komplette Pipeline aus
+        
+        timing_first: Erst TTS erzeugen, die exakte Audiodauer messen und genau so
+        viele Frames rendern (duration_per_segment wird dann ignoriert).
+        keep_temp: Zwischendateien nicht löschen, wenn sie verbraucht sind.
+        """
         print(f"🚀 Starte KI-Video-Pipeline für: {script_file}")
         print("=" * 60)
         
-        # 1. Skript laden und segmentieren
-        script = self.read_script(script_file)
-        segments = self.split_script_into_segments(script)
+        scratch = self.create_scratch_space(keep_files=keep_temp)
+        print(f"📂 Arbeitsverzeichnis: {scratch.run_dir}")
         
-        if not segments:
-            print("❌ Keine Segmente zum Verarbeiten!")
+        try:
+            return self._run_segments(scratch, script_file, output_name, style,
+                                      duration_per_segment, timing_first)
+        except DiskQuotaExceeded as e:
+            print(f"\n❌ Pipeline abgebrochen: {e}")
             return ""
+        finally:
+            if not keep_temp and not scratch.refcounts:
+                try:
+                    scratch.run_dir.rmdir()  # nur wenn wirklich leer
+                except OSError:
+                    pass
+            self.last_scratch_report = scratch.report()
+            print(f"💾 Scratch-Spitze: {self.last_scratch_report['peak_mb']:.1f} MB "
+                  f"({self.last_scratch_report['files_created']} Dateien, "
+                  f"{self.last_scratch_report['files_deleted']} gelöscht)")
+    
+    def _run_segments(self, scratch: ScratchSpace, script_file: str, output_name: str,
+                      style: str, duration_per_segment: int, timing_first: bool) -> str:
+        """Segmente erzeugen, kombinieren und exportieren (Dateien im Laufverzeichnis)"""
+        # 1. Skript streamen: Segmente werden verarbeitet, während der Rest noch gelesen wird
+        segments = self.stream_segments(script_file)
         
         # 2. Audio und Video für jedes Segment generieren
         audio_files = []
         video_files = []
+        segment_count = 0
         
         for i, segment in enumerate(segments):
-            print(f"\n📹 Verarbeite Segment {i+1}/{len(segments)}")
+            segment_count += 1
+            print(f"\n📹 Verarbeite Segment {i+1}")
             
-            # Audio generieren
-            audio_file = self.temp_dir / f"audio_segment_{i+1:03d}.wav"
-            if self.generate_speech(segment, str(audio_file)):
-                audio_files.append(str(audio_file))
+            # Audio generieren (einziger Verbraucher: combine_segments)
+            estimate = self.estimate_segment_bytes(duration_per_segment)
+            scratch.wait_for_space(estimate["audio"])
+            audio_file = scratch.path(f"audio_segment_{i+1:03d}.wav")
+            has_audio = self.generate_speech(segment, str(audio_file))
+            has_audio = scratch.register(audio_file) and has_audio
+            if not has_audio:
+                scratch.release(audio_file)  # unbrauchbare Teildatei: kein Verbraucher
+            
+            # Segmentdauer bestimmen: im Timing-First-Modus aus der Audiodatei
+            segment_duration = duration_per_segment
+            if timing_first:
+                measured = self.get_audio_duration(str(audio_file)) if has_audio else None
+                if measured is None:
+                    print("   ⚠️ Segment übersprungen (keine Audiodauer)")
+                    scratch.release(audio_file)
+                    continue
+                segment_duration = measured
+                print(f"   ⏱️ Audiodauer: {segment_duration:.2f}s")
             
             # Video generieren
-            video_file = self.temp_dir / f"video_segment_{i+1:03d}.mp4"
+            scratch.wait_for_space(self.estimate_segment_bytes(segment_duration)["video"])
+            video_file = scratch.path(f"video_segment_{i+1:03d}.{MEZZANINE_EXTENSION}")
             video_prompt = f"{style} video: {segment[:100]}..."
-            if self.generate_video_segment(video_prompt, str(video_file), duration_per_segment):
+            has_video = self.generate_video_segment(video_prompt, str(video_file), segment_duration)
+            has_video = scratch.register(video_file) and has_video
+            if not has_video:
+                scratch.release(video_file)
+            
+            if timing_first and not has_video:
+                scratch.release(audio_file)
+                continue  # Audio und Video bleiben paarweise zugeordnet
+            if has_audio:
+                audio_files.append(str(audio_file))
+            if has_video:
                 video_files.append(str(video_file))
         
+        if not segment_count:
+            print("❌ Keine Segmente zum Verarbeiten!")
+            return ""
+        
+        print(f"\n📝 {segment_count} Segmente verarbeitet")
+        
         # 3. Segmente kombinieren
+        combined = False
         if audio_files and video_files:
-            combined_file = self.temp_dir / f"combined_{output_name}.mp4"
-            if self.combine_segments(audio_files, video_files, str(combined_file)):
-                
-                # 4. Mit PC-Animation erweitern (optional)
-                final_file = self.output_dir / f"{output_name}.mp4"
-                if self.enhance_with_pc_animation(str(combined_file), str(final_file)):
-                    print(f"\n🎉 Pipeline abgeschlossen!")
-                    print(f"📁 Finales Video: {final_file}")
-                    return str(final_file)
+            # Das kombinierte Video ist höchstens so groß wie die Segmente zusammen
+            scratch.wait_for_space(scratch.usage)
+            combined_file = scratch.path(f"combined_{output_name}.mp4")
+            combined = self.combine_segments(audio_files, video_files, str(combined_file),
+                                             timing_first=timing_first)
+        
+        # combine_segments war der letzte Verbraucher der Segmentdateien
+        # (ohne Audio oder ohne Video gibt es keinen)
+        for segment_file in audio_files + video_files:
+            scratch.release(segment_file)
+        
+        if combined and scratch.register(combined_file):
+            
+            # 4. Mit PC-Animation erweitern (optional)
+            final_file = self.output_dir / f"{output_name}.mp4"
+            enhanced = self.enhance_with_pc_animation(str(combined_file), str(final_file))
+            scratch.release(combined_file)
+            
+            if enhanced:
+                print(f"\n🎉 Pipeline abgeschlossen!")
+                print(f"📁 Finales Video: {final_file}")
+                return str(final_file)
         
         print("\n❌ Pipeline fehlgeschlagen!")
         return ""
     
     def cleanup_temp_files(self):
-        """Löscht temporäre Dateien"""
-        import shutil
+        """Löscht das Arbeitsverzeichnis des letzten Laufs (andere Läufe bleiben unberührt)"""
         try:
-            if self.temp_dir.exists():
-                shutil.rmtree(self.temp_dir)
-                self.temp_dir.mkdir()
+            if self.scratch is not None:
+                self.scratch.cleanup()
             print("🧹 Temporäre Dateien gelöscht")
         except Exception as e:
             print(f"⚠️ Cleanup-Warnung: {e}")
@@ -326,8 +701,12 @@ def main():
     parser.add_argument("--output", default="ai_generated_video", help="Name des Ausgabe-Videos")
     parser.add_argument("--style", default="educational", help="Video-Stil")
     parser.add_argument("--duration", type=int, default=10, help="Dauer pro Segment (Sekunden)")
+    parser.add_argument("--timing-first", action="store_true",
+                        help="Segmentdauer aus der TTS-Audiodauer ableiten (kein Loopen beim Kombinieren)")
     parser.add_argument("--config", default="configs/default.json", help="Konfigurationsdatei")
-    parser.add_argument("--cleanup", action="store_true", help="Temporäre Dateien nach Verarbeitung löschen")
+    parser.add_argument("--cleanup", action="store_true", help="Arbeitsverzeichnis des Laufs nach Verarbeitung löschen")
+    parser.add_argument("--keep-temp", action="store_true",
+                        help="Zwischendateien behalten (sonst nach dem letzten Verbraucher gelöscht)")
     
     args = parser.parse_args()
     
@@ -338,7 +717,9 @@ def main():
         script_file=args.script,
         output_name=args.output,
         style=args.style,
-        duration_per_segment=args.duration
+        duration_per_segment=args.duration,
+        timing_first=args.timing_first,
+        keep_temp=args.keep_temp
     )
     
     if result:
@@ -7,14 +7,25 @@ Installs and configures all 33+ AI video generation tools.
 """
 
 import os
+import re
 import sys
-import subprocess
+import asyncio
+import hashlib
 import logging
 import json
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import time
 
+try:
+    from autark.core.executor import ToolExecutor
+    from autark.core.probe import CapabilityProbe, TOOL_REQUIREMENTS, disk_free_gb, memory_gb
+except ImportError:
+    # Running from a source checkout without the package installed
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "autark" / "src"))
+    from autark.core.executor import ToolExecutor
+    from autark.core.probe import CapabilityProbe, TOOL_REQUIREMENTS, disk_free_gb, memory_gb
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -142,8 +153,30 @@ class ToolInstaller:
             }
         }
         
+        self.base_packages = [
+            "torch>=2.0.0",
+            "transformers>=4.35.0",
+            "diffusers>=0.21.0",
+            "opencv-python>=4.8.0",
+            "numpy>=1.24.0",
+            "pillow>=10.0.0",
+            "scipy>=1.11.0",
+            "librosa>=0.10.0",
+            "soundfile>=0.12.0",
+            "moviepy>=1.0.3",
+            "tqdm>=4.66.0",
+            "requests>=2.31.0"
+        ]
+        
+        self.tools_dir = Path("./tools")
         self.installation_status = {}
         self.failed_installations = []
+        self.last_plan = None
+        
+        # All pip/npm/git calls go through the shared executor (limits, timeouts, accounting)
+        self.executor = ToolExecutor(default_timeout=3600)
+        # Import-free, cached presence checks (see autark.core.probe)
+        self.probe = CapabilityProbe()
     
     def check_system_requirements(self) -> Dict[str, Any]:
         """Check system requirements for AI tools."""
@@ -163,151 +196,271 @@ class ToolInstaller:
         return requirements
     
     def _check_gpu(self) -> bool:
-        """Check if GPU is available."""
-        try:
-            import torch
-            return torch.cuda.is_available()
-        except ImportError:
-            return False
+        """Check if GPU is available (driver check, no torch import)."""
+        return self.probe.probe(gpu=True)["gpu"]["available"]
     
     def _check_disk_space(self) -> float:
         """Check available disk space in GB."""
-        import shutil
-        total, used, free = shutil.disk_usage("/")
-        return free / (1024**3)
+        return disk_free_gb("/")
     
     def _check_memory(self) -> float:
-        """Check available RAM in GB."""
-        try:
-            import psutil
-            return psutil.virtual_memory().total / (1024**3)
-        except ImportError:
-            return 0.0
+        """Check total RAM in GB."""
+        return memory_gb()
     
     def _check_base_packages(self) -> Dict[str, bool]:
         """Check if base packages are installed."""
         packages = ["torch", "transformers", "diffusers", "opencv-python"]
-        status = {}
-        
-        for package in packages:
-            try:
-                __import__(package.replace("-", "_"))
-                status[package] = True
-            except ImportError:
-                status[package] = False
-        
-        return status
+        result = self.probe.probe(packages=packages, gpu=False)
+        return {package: result["packages"][package]["installed"] for package in packages}
     
-    def install_base_requirements(self):
-        """Install base requirements for all tools."""
+    def install_base_requirements(self, wheelhouse: Optional[str] = None):
+        """Install base requirements for all tools (one pip invocation)."""
         
         logger.info("📦 Installing base requirements...")
         
-        base_packages = [
-            "torch>=2.0.0",
-            "transformers>=4.35.0",
-            "diffusers>=0.21.0",
-            "opencv-python>=4.8.0",
-            "numpy>=1.24.0",
-            "pillow>=10.0.0",
-            "scipy>=1.11.0",
-            "librosa>=0.10.0",
-            "soundfile>=0.12.0",
-            "moviepy>=1.0.3",
-            "tqdm>=4.66.0",
-            "requests>=2.31.0"
+        if self._install_pip_package(*self.base_packages, wheelhouse=wheelhouse):
+            logger.info("✅ Base requirements installed")
+    
+    # ------------------------------------------------------------------
+    # Install planning
+    # ------------------------------------------------------------------
+    
+    MARKER_FILE = ".autark-install.json"
+    BASE_MARKER = "base-requirements"
+    
+    @staticmethod
+    def _merge_requirements(requirements: List[str]) -> List[str]:
+        """Union of pip requirements: one entry per distribution, extras and specifiers merged."""
+        merged = {}  # normalized name -> [name, extras, specifiers]
+        
+        for requirement in requirements:
+            match = re.match(r"^\s*([A-Za-z0-9_.\-]+)\s*(\[[^\]]*\])?\s*(.*)$", requirement)
+            if not match:
+                continue
+            name, extras, spec = match.groups()
+            key = re.sub(r"[-_.]+", "-", name).lower()
+            entry = merged.setdefault(key, [name, set(), []])
+            if extras:
+                entry[1].update(e.strip() for e in extras[1:-1].split(",") if e.strip())
+            for part in spec.split(","):
+                if part.strip() and part.strip() not in entry[2]:
+                    entry[2].append(part.strip())
+        
+        return [
+            name + (f"[{','.join(sorted(extras))}]" if extras else "") + ",".join(specs)
+            for name, extras, specs in merged.values()
         ]
-        
-        for package in base_packages:
-            self._install_pip_package(package)
-        
-        logger.info("✅ Base requirements installed")
     
-    def install_all_tools(self, categories: List[str] = None):
-        """Install all AI tools or specific categories."""
+    def _tool_hash(self, tool_name: str, config: Dict[str, Any]) -> str:
+        """Hash of everything that decides how a tool is installed."""
+        payload = json.dumps({"tool": tool_name, **config, "python": sys.version_info[:2]},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _marker_path(self, tool_name: str) -> Path:
+        if tool_name == self.BASE_MARKER:
+            return self.tools_dir / f".{self.BASE_MARKER}.json"
+        return self.tools_dir / tool_name / self.MARKER_FILE
+    
+    def _is_installed(self, tool_name: str, install_hash: str) -> bool:
+        try:
+            marker = json.loads(self._marker_path(tool_name).read_text())
+            return marker.get("hash") == install_hash
+        except (OSError, ValueError):
+            return False
+    
+    def _write_marker(self, tool_name: str, install_hash: str):
+        marker_path = self._marker_path(tool_name)
+        marker_path.parent.mkdir(parents=True, exist_ok=True)
+        marker_path.write_text(json.dumps({"hash": install_hash, "installed_at": time.time()}))
+    
+    def plan_installation(self, categories: List[str] = None, force: bool = False) -> Dict[str, Any]:
+        """Work out what install_all_tools has to do, without doing anything."""
         
         if categories is None:
             categories = ["text_to_video", "tts", "animation", "computer_vision"]
         
-        logger.info(f"🚀 Starting installation of AI tools for categories: {categories}")
-        
-        # Install base requirements first
-        self.install_base_requirements()
+        selected = {name: config for name, config in self.tools_config.items()
+                    if config["category"] in categories}
+        
+        pending, up_to_date = {}, []
+        for tool_name, config in selected.items():
+            install_hash = self._tool_hash(tool_name, config)
+            if not force and self._is_installed(tool_name, install_hash):
+                up_to_date.append(tool_name)
+            else:
+                pending[tool_name] = install_hash
+        
+        base_hash = self._tool_hash(self.BASE_MARKER, {"requirements": self.base_packages})
+        install_base = force or not self._is_installed(self.BASE_MARKER, base_hash)
+        
+        pip_requirements = list(self.base_packages) if install_base else []
+        npm_commands = []
+        for tool_name in pending:
+            config = selected[tool_name]
+            if config.get("install_method", "pip") == "pip":
+                pip_requirements += config["requirements"]
+            elif config["install_method"] == "npm":
+                npm_commands += [c for c in config["requirements"] if c not in npm_commands]
+        
+        return {
+            "categories": categories,
+            "pending": pending,
+            "up_to_date": up_to_date,
+            "base_hash": base_hash if install_base else None,
+            "pip_requirements": self._merge_requirements(pip_requirements),
+            "npm_commands": npm_commands,
+            "clones": {name: selected[name]["repo"] for name in pending
+                       if "repo" in selected[name]},
+        }
+    
+    def _pip_command(self, requirements: List[str], wheelhouse: Optional[str] = None) -> List[str]:
+        cmd = [sys.executable, "-m", "pip", "install"]
+        if wheelhouse:
+            cmd += ["--no-index", "--find-links", str(wheelhouse)]
+        return cmd + list(requirements)
+    
+    def _clone_source(self, repo_url: str, git_mirror: Optional[str]) -> Optional[str]:
+        """Local mirror for a repository if there is one, else the URL itself."""
+        if git_mirror:
+            name = repo_url.rstrip("/").rsplit("/", 1)[-1]
+            name = name[:-4] if name.endswith(".git") else name
+            for candidate in (Path(git_mirror) / name, Path(git_mirror) / f"{name}.git"):
+                if candidate.exists():
+                    return str(candidate)
+        if Path(repo_url).exists() or repo_url.startswith(("https://", "file://")):
+            return repo_url
+        return None
+    
+    async def _clone_async(self, tool_name: str, repo_url: str,
+                           git_mirror: Optional[str], offline: bool) -> bool:
+        """Clone one repository; an existing checkout counts as done."""
+        tool_dir = self.tools_dir / tool_name
+        if (tool_dir / ".git").exists():
+            return True
+        
+        source = self._clone_source(repo_url, git_mirror)
+        if source is None or (offline and source.startswith("https://")):
+            logger.warning(f"⚠️ No local source for {tool_name} ({repo_url})")
+            return False
         
-        total_tools = sum(1 for tool in self.tools_config.values() 
-                         if tool["category"] in categories)
-        current = 0
+        cmd = ["git", "clone"]
+        if source.startswith("https://"):
+            cmd += ["--depth", "1"]  # history is not needed to run the tool
+        result = await self.executor.run(cmd + [source, str(tool_dir)])
+        if result.ok:
+            logger.info(f"📂 Repository cloned: {tool_name}")
+        else:
+            logger.warning(f"⚠️ Failed to clone {repo_url}: {result.stderr.strip()[-300:]}")
+        return result.ok
+    
+    async def _install_pip_async(self, plan: Dict[str, Any], wheelhouse: Optional[str]) -> Dict[str, bool]:
+        """Resolve the union of requirements in one pip run; per tool only if that fails.
+        
+        Returns per-tool success plus the base requirements under BASE_MARKER.
+        """
+        pip_tools = [name for name in plan["pending"]
+                     if self.tools_config[name].get("install_method", "pip") == "pip"]
+        if not plan["pip_requirements"]:
+            return {name: True for name in pip_tools}
+        
+        logger.info(f"📦 Installing {len(plan['pip_requirements'])} requirements in one pip run...")
+        result = await self.executor.run(self._pip_command(plan["pip_requirements"], wheelhouse))
+        if result.ok:
+            return {name: True for name in pip_tools + [self.BASE_MARKER]}
+        
+        # One conflicting or missing package must not fail every tool: retry per tool
+        logger.warning(f"⚠️ Combined pip install failed, retrying per tool: "
+                       f"{result.stderr.strip()[-300:]}")
+        status = {}
+        if plan["base_hash"]:
+            base = await self.executor.run(self._pip_command(self.base_packages, wheelhouse))
+            status[self.BASE_MARKER] = base.ok
+        for name in pip_tools:
+            retry = await self.executor.run(
+                self._pip_command(self.tools_config[name]["requirements"], wheelhouse))
+            status[name] = retry.ok
+        return status
+    
+    async def _install_npm_async(self, plan: Dict[str, Any]) -> bool:
+        results = await asyncio.gather(*(self.executor.run(cmd.split()) for cmd in plan["npm_commands"]))
+        return all(result.ok for result in results)
+    
+    async def _install_plan_async(self, plan: Dict[str, Any], wheelhouse: Optional[str],
+                                  git_mirror: Optional[str]) -> Dict[str, bool]:
+        """pip, npm and all clones run concurrently; the executor limits each tool."""
+        offline = wheelhouse is not None
+        clone_names = list(plan["clones"])
+        
+        pip_status, npm_ok, *clone_results = await asyncio.gather(
+            self._install_pip_async(plan, wheelhouse),
+            self._install_npm_async(plan),
+            *(self._clone_async(name, plan["clones"][name], git_mirror, offline)
+              for name in clone_names)
+        )
+        clone_status = dict(zip(clone_names, clone_results))
+        
+        status = {self.BASE_MARKER: pip_status.get(self.BASE_MARKER, False)}
+        for tool_name in plan["pending"]:
+            method = self.tools_config[tool_name].get("install_method", "pip")
+            packages_ok = pip_status.get(tool_name, True) if method == "pip" else npm_ok
+            status[tool_name] = packages_ok and clone_status.get(tool_name, True)
+        return status
+    
+    def install_all_tools(self, categories: List[str] = None, wheelhouse: Optional[str] = None,
+                          git_mirror: Optional[str] = None, force: bool = False):
+        """Install all AI tools or specific categories.
         
-        for tool_name, config in self.tools_config.items():
-            if config["category"] in categories:
-                current += 1
-                logger.info(f"📥 Installing {tool_name} ({current}/{total_tools})")
-                
-                try:
-                    self._install_tool(tool_name, config)
-                    self.installation_status[tool_name] = "success"
-                    logger.info(f"✅ {tool_name} installed successfully")
-                    
-                except Exception as e:
-                    logger.error(f"❌ Failed to install {tool_name}: {e}")
-                    self.installation_status[tool_name] = f"failed: {e}"
-                    self.failed_installations.append(tool_name)
-                
-                time.sleep(1)  # Brief pause between installations
+        wheelhouse: install from a local wheel directory only (pip --no-index --find-links)
+        git_mirror: directory with local clones/bare repos, used instead of GitHub
+        force: reinstall tools even if their install marker is current
+        """
         
-        self._generate_installation_report()
-    
-    def _install_tool(self, tool_name: str, config: Dict[str, Any]):
-        """Install a specific tool."""
+        start = time.perf_counter()
+        self.tools_dir.mkdir(exist_ok=True)
         
-        # Check GPU requirement
-        if config.get("gpu_required", False) and not self._check_gpu():
-            logger.warning(f"⚠️ {tool_name} requires GPU, but none available. Installing anyway...")
+        plan = self.plan_installation(categories, force=force)
+        self.last_plan = plan
         
-        # Install based on method
-        install_method = config.get("install_method", "pip")
+        logger.info(f"🚀 Starting installation of AI tools for categories: {plan['categories']}")
+        logger.info(f"📋 {len(plan['pending'])} to install, {len(plan['up_to_date'])} up to date, "
+                    f"{len(plan['pip_requirements'])} pip requirements, {len(plan['clones'])} clones")
         
-        if install_method == "pip":
-            for requirement in config["requirements"]:
-                self._install_pip_package(requirement)
+        for tool_name in plan["up_to_date"]:
+            self.installation_status[tool_name] = "up_to_date"
         
-        elif install_method == "npm":
-            for requirement in config["requirements"]:
-                self._run_command(requirement)
+        gpu_tools = [name for name in plan["pending"] if self.tools_config[name].get("gpu_required")]
+        if gpu_tools and not self._check_gpu():
+            logger.warning(f"⚠️ {', '.join(gpu_tools)} require a GPU, but none available. Installing anyway...")
         
-        # Clone repository if needed
-        if "repo" in config and config["repo"].startswith("https://github.com"):
-            self._clone_repository(tool_name, config["repo"])
-    
-    def _install_pip_package(self, package: str):
-        """Install a pip package."""
-        try:
-            cmd = [sys.executable, "-m", "pip", "install", package]
-            subprocess.run(cmd, check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
-            logger.warning(f"⚠️ Failed to install {package}: {e}")
-    
-    def _run_command(self, command: str):
-        """Run a shell command."""
-        try:
-            subprocess.run(command.split(), check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
-            logger.warning(f"⚠️ Command failed: {command} - {e}")
-    
-    def _clone_repository(self, tool_name: str, repo_url: str):
-        """Clone a git repository."""
-        tools_dir = Path("./tools")
-        tools_dir.mkdir(exist_ok=True)
+        if plan["pending"] or plan["base_hash"]:
+            status = asyncio.run(self._install_plan_async(plan, wheelhouse, git_mirror))
+            
+            base_ok = status.pop(self.BASE_MARKER)
+            if plan["base_hash"] and base_ok:
+                self._write_marker(self.BASE_MARKER, plan["base_hash"])
+            
+            for tool_name, ok in status.items():
+                if ok:
+                    self._write_marker(tool_name, plan["pending"][tool_name])
+                    self.installation_status[tool_name] = "success"
+                    logger.info(f"✅ {tool_name} installed successfully")
+                else:
+                    logger.error(f"❌ Failed to install {tool_name}")
+                    self.installation_status[tool_name] = "failed"
+                    self.failed_installations.append(tool_name)
         
-        tool_dir = tools_dir / tool_name
+        plan["elapsed_seconds"] = time.perf_counter() - start
+        logger.info(f"⏱️ Installation finished in {plan['elapsed_seconds']:.1f}s")
         
-        if not tool_dir.exists():
-            try:
-                cmd = ["git", "clone", repo_url, str(tool_dir)]
-                subprocess.run(cmd, check=True, capture_output=True, text=True)
-                logger.info(f"📂 Repository cloned: {tool_name}")
-            except subprocess.CalledProcessError as e:
-                logger.warning(f"⚠️ Failed to clone {repo_url}: {e}")
+        self._generate_installation_report()
+    
+    def _install_pip_package(self, *packages: str, wheelhouse: Optional[str] = None) -> bool:
+        """Install pip packages (one pip invocation)."""
+        result = self.executor.run_sync(self._pip_command(packages, wheelhouse))
+        if not result.ok:
+            logger.warning(f"⚠️ Failed to install {' '.join(packages)}: {result.stderr.strip()[-300:]}")
+        return result.ok
     
     def _generate_installation_report(self):
         """Generate installation report."""
@@ -318,10 +471,12 @@ class ToolInstaller:
             "timestamp": time.time(),
             "total_tools": len(self.tools_config),
             "successful_installations": len([s for s in self.installation_status.values() 
-                                           if s == "success"]),
+                                           if s in ("success", "up_to_date")]),
             "failed_installations": len(self.failed_installations),
             "installation_status": self.installation_status,
             "failed_tools": self.failed_installations,
+            "tool_usage": self.executor.stats(),
+            "plan": self.last_plan,
             "system_info": self.check_system_requirements()
         }
         
@@ -344,46 +499,60 @@ class ToolInstaller:
             print(f"\n⚠️ Failed tools: {', '.join(self.failed_installations)}")
     
     def verify_installations(self) -> Dict[str, bool]:
-        """Verify that installed tools are working."""
+        """Verify that installed tools are present (probed without importing them)."""
         
         logger.info("🔍 Verifying tool installations...")
         
-        verification_results = {}
-        
-        for tool_name in self.installation_status:
-            if self.installation_status[tool_name] == "success":
-                verification_results[tool_name] = self._verify_tool(tool_name)
+        tools = [tool_name for tool_name, status in self.installation_status.items()
+                 if status in ("success", "up_to_date")]
         
-        return verification_results
+        # Re-probe: the installation just changed site-packages
+        return self.verify_tools(tools, refresh=True)
     
     def _verify_tool(self, tool_name: str) -> bool:
         """Verify a specific tool installation."""
-        
-        verification_map = {
-            "torch": "import torch; torch.cuda.is_available()",
-            "transformers": "import transformers",
-            "diffusers": "import diffusers",
-            "bark_tts": "import bark",
-            "coqui_tts": "import TTS",
-            "manim": "import manim",
-            "opencv-python": "import cv2"
+        return self.verify_tools([tool_name])[tool_name]
+    
+    def verify_tools(self, tools: List[str], refresh: bool = False) -> Dict[str, bool]:
+        """Presence check for the given tools, served from the probe cache when possible."""
+        requirements = {tool_name: self._tool_requirements(tool_name) for tool_name in tools}
+        result = self.probe.probe(
+            packages=[p for req in requirements.values() for p in req["packages"]],
+            commands=[c for req in requirements.values() for c in req["commands"]],
+            gpu=False,
+            refresh=refresh
+        )
+        return {
+            tool_name: all(result["packages"][p]["installed"] for p in req["packages"])
+            and all(result["commands"][c] for c in req["commands"])
+            for tool_name, req in requirements.items()
         }
-        
-        # Simple import test
-        for package in verification_map:
-            if package in tool_name:
-                try:
-                    exec(verification_map[package])
-                    return True
-                except:
-                    return False
-        
-        return True  # Default to True if no specific test
+    
+    def _tool_requirements(self, tool_name: str) -> Dict[str, List[str]]:
+        """Packages and commands whose presence means a tool is installed."""
+        if tool_name in TOOL_REQUIREMENTS:
+            known = TOOL_REQUIREMENTS[tool_name]
+            return {"packages": known.get("packages", []), "commands": known.get("commands", [])}
+        
+        config = self.tools_config.get(tool_name, {})
+        if config.get("install_method") == "npm":
+            return {"packages": [], "commands": ["npm"]}
+        return {"packages": config.get("requirements", []), "commands": []}
 
 
 def main():
     """Main installation function."""
     
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Install AUTARK AI video tools")
+    parser.add_argument("--categories", nargs="+", help="Only install these categories")
+    parser.add_argument("--wheelhouse", help="Offline: install only from this wheel directory")
+    parser.add_argument("--git-mirror", help="Directory with local clones of the tool repositories")
+    parser.add_argument("--force", action="store_true", help="Reinstall tools with a current install marker")
+    parser.add_argument("--yes", "-y", action="store_true", help="Do not ask for confirmation")
+    args = parser.parse_args()
+    
     print("🎬 AUTARK AI Video Pipeline - Tool Installation")
     print("=" * 50)
     
@@ -400,11 +569,12 @@ def main():
     print(f"   RAM: {requirements['memory_gb']:.1f} GB")
     
     # Confirm installation
-    response = input(f"\n🚀 Proceed with installation? (y/n): ").lower().strip()
+    response = "y" if args.yes else input(f"\n🚀 Proceed with installation? (y/n): ").lower().strip()
     
     if response == 'y':
         # Install all tools
-        installer.install_all_tools()
+        installer.install_all_tools(args.categories, wheelhouse=args.wheelhouse,
+                                    git_mirror=args.git_mirror, force=args.force)
         
         # Verify installations
         verification = installer.verify_installations()
@@ -0,0 +1,337 @@
+"""
+AUTARK Tool Executor
+====================
+
+Shared asynchronous runner for external tools (ffmpeg, pip, git, npm, manim).
+
+Every external command goes through one ToolExecutor, which
+- limits how many processes of the same tool run at once,
+- enforces timeouts and kills the process (and only that process) on expiry,
+- streams stdout/stderr line by line into optional parsers, e.g. ffmpeg's
+  `-progress pipe:1` output,
+- supports cancellation of single runs or everything still running,
+- keeps per-tool accounting (runs, failures, timeouts, wall time, peak
+  concurrency) plus the CPU time of all finished children.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional, Sequence
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+LineHandler = Callable[[str], None]
+
+# Processes of the same tool allowed to run at once. pip and npm lock their
+# caches/environments; encoders already use several cores each.
+DEFAULT_TOOL_LIMITS = {
+    "pip": 1,
+    "npm": 1,
+    "git": 4,
+    "ffmpeg": max(1, (os.cpu_count() or 2) // 4),
+    "manim": 2,
+}
+
+
+class ToolProcessError(RuntimeError):
+    """Raised by ProcessResult.check() for a failed run."""
+
+    def __init__(self, result: "ProcessResult"):
+        self.result = result
+        reason = "timed out" if result.timed_out else f"exit code {result.returncode}"
+        tail = result.stderr.strip().splitlines()[-1:] or [""]
+        super().__init__(f"{result.tool} {reason}: {tail[0]}")
+
+
+@dataclass
+class ProcessResult:
+    """
+    Outcome of one external command.
+
+    A cancelled run has no result: cancellation always propagates as
+    CancelledError (counted in ToolUsage.cancellations).
+    """
+
+    tool: str
+    cmd: List[str]
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    wall_seconds: float
+    queued_seconds: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def check(self) -> "ProcessResult":
+        """Return self, or raise ToolProcessError if the run failed."""
+        if not self.ok:
+            raise ToolProcessError(self)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result["ok"] = self.ok
+        return result
+
+
+@dataclass
+class ToolUsage:
+    """Accumulated accounting for one tool."""
+
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    cancellations: int = 0
+    wall_seconds: float = 0.0
+    queued_seconds: float = 0.0
+    running: int = 0
+    peak_running: int = 0
+
+
+class FFmpegProgress:
+    """
+    Line handler for ffmpeg's machine-readable `-progress pipe:1` output.
+
+    Collects the key=value pairs of each progress block and calls `callback`
+    with a summary (frame, fps, speed, out_seconds, fraction when the total
+    duration is known, done) at the end of every block.
+    """
+
+    def __init__(self, callback: Callable[[Dict[str, Any]], None], total_seconds: Optional[float] = None):
+        self.callback = callback
+        self.total_seconds = total_seconds
+        self._block = {}
+
+    def __call__(self, line: str):
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return
+
+        self._block[key] = value.strip()
+        if key != "progress":
+            return
+
+        block, self._block = self._block, {}
+        out_us = block.get("out_time_us") or block.get("out_time_ms")  # both are microseconds
+        out_seconds = int(out_us) / 1_000_000 if out_us and out_us.lstrip("-").isdigit() else 0.0
+
+        progress = {
+            "frame": int(block.get("frame", 0) or 0),
+            "fps": float(block.get("fps", 0) or 0),
+            "speed": block.get("speed", "").rstrip("x").strip() or None,
+            "out_seconds": out_seconds,
+            "done": value.strip() == "end",
+        }
+        if self.total_seconds:
+            progress["fraction"] = min(1.0, out_seconds / self.total_seconds)
+        self.callback(progress)
+
+
+class ToolExecutor:
+    """Asynchronous subprocess runner with per-tool concurrency limits."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, int]] = None,
+        default_limit: int = 4,
+        default_timeout: Optional[float] = None,
+        output_lines: int = 2000,
+        kill_grace: float = 5.0
+    ):
+        self.limits = {**DEFAULT_TOOL_LIMITS, **(limits or {})}
+        self.default_limit = default_limit
+        self.default_timeout = default_timeout
+        self.output_lines = output_lines   # captured lines kept per stream
+        self.kill_grace = kill_grace
+
+        self.usage: Dict[str, ToolUsage] = {}
+        self._running: Dict[int, asyncio.subprocess.Process] = {}
+        # asyncio semaphores belong to one event loop; keep a set per loop
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._children_cpu = self._child_cpu_seconds()
+
+    @staticmethod
+    def _child_cpu_seconds() -> Optional[float]:
+        """CPU time of all finished child processes (None where not reported, e.g. Windows)."""
+        if resource is None:
+            return None
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+
+    def _semaphore(self, tool: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        per_loop = self._semaphores.setdefault(loop, {})
+        if tool not in per_loop:
+            per_loop[tool] = asyncio.Semaphore(self.limits.get(tool, self.default_limit))
+        return per_loop[tool]
+
+    @staticmethod
+    def tool_name(cmd: Sequence[str]) -> str:
+        """Tool key for a command: `python -m pip` counts as pip."""
+        name = Path(cmd[0]).name
+        if name.startswith("python") and len(cmd) > 2 and cmd[1] == "-m":
+            return cmd[2]
+        return name
+
+    async def run(
+        self,
+        cmd: Sequence[str],
+        tool: Optional[str] = None,
+        timeout: Optional[float] = None,
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        on_stdout: Optional[LineHandler] = None,
+        on_stderr: Optional[LineHandler] = None,
+        check: bool = False
+    ) -> ProcessResult:
+        """
+        Run `cmd` (no shell) once a slot for its tool is free.
+
+        Cancelling the awaiting task kills the process and re-raises
+        CancelledError; a timeout kills it and returns timed_out=True.
+        """
+        cmd = [str(part) for part in cmd]
+        tool = tool or self.tool_name(cmd)
+        timeout = timeout if timeout is not None else self.default_timeout
+        usage = self.usage.setdefault(tool, ToolUsage())
+
+        queued_at = time.perf_counter()
+        async with self._semaphore(tool):
+            started = time.perf_counter()
+            usage.running += 1
+            usage.peak_running = max(usage.peak_running, usage.running)
+
+            stdout = deque(maxlen=self.output_lines)
+            stderr = deque(maxlen=self.output_lines)
+            timed_out = cancelled = False
+            process = None
+
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd, cwd=cwd, env=env,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                self._running[process.pid] = process
+
+                communicate = asyncio.gather(
+                    self._pump(process.stdout, stdout, on_stdout),
+                    self._pump(process.stderr, stderr, on_stderr),
+                    process.wait()
+                )
+                try:
+                    await asyncio.wait_for(communicate, timeout)
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    logger.warning(f"⏱️ {tool} timed out after {timeout}s: {' '.join(cmd[:4])}")
+                    await self._kill(process)
+            except OSError as e:
+                # Executable missing or not runnable: report like a failed run
+                stderr.append(str(e))
+            except asyncio.CancelledError:
+                cancelled = True
+                if process is not None:
+                    await asyncio.shield(self._kill(process))
+                raise
+            finally:
+                if process is not None:
+                    self._running.pop(process.pid, None)
+                wall = time.perf_counter() - started
+                usage.running -= 1
+                usage.runs += 1
+                usage.wall_seconds += wall
+                usage.queued_seconds += started - queued_at
+                usage.timeouts += timed_out
+                usage.cancellations += cancelled
+
+        result = ProcessResult(
+            tool=tool,
+            cmd=cmd,
+            returncode=process.returncode if process is not None else None,
+            stdout="\n".join(stdout),
+            stderr="\n".join(stderr),
+            wall_seconds=wall,
+            queued_seconds=started - queued_at,
+            timed_out=timed_out
+        )
+        if not result.ok:
+            usage.failures += 1
+        return result.check() if check else result
+
+    async def _pump(self, stream: asyncio.StreamReader, lines: deque, handler: Optional[LineHandler]):
+        """Read a pipe line by line so neither pipe can fill up and block the child."""
+        while True:
+            raw = await stream.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            lines.append(line)
+            if handler is not None:
+                try:
+                    handler(line)
+                except Exception as e:
+                    logger.debug(f"Output handler failed: {e}")
+
+    async def _kill(self, process: asyncio.subprocess.Process):
+        """Terminate, then kill after the grace period."""
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), self.kill_grace)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        except ProcessLookupError:
+            pass
+
+    async def run_many(self, commands: List[Dict[str, Any]]) -> List[ProcessResult]:
+        """Run several commands concurrently (each dict holds run() kwargs)."""
+        return await asyncio.gather(*(self.run(**command) for command in commands))
+
+    def run_sync(self, cmd: Sequence[str], **kwargs) -> ProcessResult:
+        """Blocking wrapper for callers without an event loop."""
+        return asyncio.run(self.run(cmd, **kwargs))
+
+    def cancel_all(self):
+        """Kill every process that is still running."""
+        for process in list(self._running.values()):
+            if process.returncode is None:
+                process.kill()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-tool accounting and CPU time of all finished child processes (None if unavailable)."""
+        children_cpu = self._child_cpu_seconds()
+        return {
+            "tools": {tool: asdict(usage) for tool, usage in self.usage.items()},
+            "running": len(self._running),
+            "children_cpu_seconds": (
+                children_cpu - self._children_cpu if children_cpu is not None else None
+            ),
+        }
+
+
+_default_executor: Optional[ToolExecutor] = None
+
+
+def get_executor() -> ToolExecutor:
+    """Process-wide shared executor."""
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = ToolExecutor()
+    return _default_executor
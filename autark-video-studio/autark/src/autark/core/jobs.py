@@ -0,0 +1,283 @@
+"""
+AUTARK Job Scheduler
+====================
+
+Orders generate_video jobs on one event loop by priority class, fairness
+between projects and deadline hints.
+
+A fixed number of jobs run at once. Waiting jobs are admitted by:
+- priority class ("interactive" before "normal" before "batch"); a job whose
+  deadline is less than `deadline_slack` seconds away is promoted one class,
+  and a job is promoted one more class for every `aging_seconds` it has
+  spent queued, so batch jobs are not starved by a steady stream of
+  interactive ones (a batch job competes as interactive after at most
+  2 * aging_seconds of waiting, and then wins on submission order),
+- earliest deadline first within a class,
+- fair share within a class: the project with the fewest running jobs and
+  the least run time so far goes first,
+- submission order.
+
+Running jobs call checkpoint() at segment boundaries (the video generator
+does this between segments). A job of a preemptible class that finds a
+higher-priority job waiting with no free slot gives up its slot there and
+is queued again, so a long batch render lets previews through instead of
+holding the slot for its whole runtime. Ranks are compared after deadline
+promotion and aging on both sides. checkpoint() outside a scheduled
+job does nothing.
+
+stats() reports queue depth, running jobs, preemptions, missed deadlines
+and wait times per class.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import statistics
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Class name -> rank (lower runs first)
+PRIORITY_CLASSES = {"interactive": 0, "normal": 1, "batch": 2}
+PREEMPTIBLE_CLASSES = ("normal", "batch")
+
+DEFAULT_PROJECT = "default"
+
+_current_job: contextvars.ContextVar[Optional["Job"]] = contextvars.ContextVar(
+    "autark_current_job", default=None
+)
+
+
+@dataclass
+class Job:
+    """One scheduled unit of work."""
+
+    id: int
+    priority: str
+    project: str
+    deadline: Optional[float]        # time.monotonic() by which it should finish
+    submitted: float
+    state: str = "queued"            # queued, running, done
+    started: Optional[float] = None  # first admission
+    queued_since: float = 0.0
+    waited: float = 0.0              # total time spent queued
+    run_time: float = 0.0
+    preemptions: int = 0
+    scheduler: Optional["JobScheduler"] = field(default=None, repr=False)
+    _admitted: Optional[asyncio.Future] = field(default=None, repr=False)
+    _running_since: float = field(default=0.0, repr=False)
+
+    @property
+    def rank(self) -> int:
+        return PRIORITY_CLASSES[self.priority]
+
+
+@dataclass
+class _ClassMetrics:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    preemptions: int = 0
+    deadlines_missed: int = 0
+    waits: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+
+class JobScheduler:
+    """Priority, fair-share and deadline aware admission of async jobs."""
+
+    def __init__(self, max_concurrent: int = 2, deadline_slack: float = 30.0,
+                 aging_seconds: Optional[float] = 60.0):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        if aging_seconds is not None and aging_seconds <= 0:
+            raise ValueError("aging_seconds must be positive (or None to disable aging)")
+        self.max_concurrent = max_concurrent
+        self.deadline_slack = deadline_slack
+        self.aging_seconds = aging_seconds
+
+        self._waiting: List[Job] = []
+        self._running: Dict[int, Job] = {}
+        self._ids = itertools.count(1)
+        self._project_running: Dict[str, int] = defaultdict(int)
+        self._project_service: Dict[str, float] = defaultdict(float)
+        self._metrics = {name: _ClassMetrics() for name in PRIORITY_CLASSES}
+
+    async def run(
+        self,
+        factory: Callable[[], Awaitable[Any]],
+        priority: str = "normal",
+        project: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Any:
+        """
+        Await factory() once the job is admitted.
+
+        `deadline` is a hint in seconds from now; it orders jobs but never
+        cancels one.
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(
+                f"Unknown priority: {priority} (expected one of {', '.join(PRIORITY_CLASSES)})"
+            )
+        now = time.monotonic()
+        job = Job(
+            id=next(self._ids),
+            priority=priority,
+            project=project or DEFAULT_PROJECT,
+            deadline=now + deadline if deadline is not None else None,
+            submitted=now,
+            scheduler=self
+        )
+        self._metrics[priority].submitted += 1
+
+        await self._admit(job)
+        token = _current_job.set(job)
+        try:
+            result = await factory()
+        except BaseException:
+            self._metrics[priority].failed += 1
+            raise
+        else:
+            self._metrics[priority].completed += 1
+            return result
+        finally:
+            _current_job.reset(token)
+            self._release(job)
+            job.state = "done"
+            if job.deadline is not None and time.monotonic() > job.deadline:
+                self._metrics[priority].deadlines_missed += 1
+                logger.warning(f"⏰ Job {job.id} ({priority}) finished after its deadline")
+
+    async def checkpoint(self, job: Optional[Job] = None):
+        """
+        Segment boundary of `job` (default: the job of the calling task).
+
+        Gives the slot to a waiting higher-priority job if there is no free
+        one, and returns once this job is admitted again.
+        """
+        job = job or _current_job.get()
+        if job is None:
+            return
+        if job.state == "queued":
+            # Another task of the same job (e.g. a parallel render queue) already yielded
+            await asyncio.shield(job._admitted)
+            return
+        if job.priority not in PREEMPTIBLE_CLASSES or len(self._running) < self.max_concurrent:
+            return
+
+        now = time.monotonic()
+        rank = self._effective_rank(job, now)
+        if not any(self._effective_rank(other, now) < rank for other in self._waiting):
+            return
+
+        job.preemptions += 1
+        self._metrics[job.priority].preemptions += 1
+        logger.info(f"⏸️ Job {job.id} ({job.priority}) yields to a higher-priority job")
+        self._release(job)
+        await self._admit(job)
+
+    async def _admit(self, job: Job):
+        job.state = "queued"
+        job.queued_since = time.monotonic()
+        job._admitted = asyncio.get_running_loop().create_future()
+        self._waiting.append(job)
+        self._dispatch()
+        try:
+            await asyncio.shield(job._admitted)
+        except asyncio.CancelledError:
+            if job in self._waiting:
+                self._waiting.remove(job)
+            elif job.state == "running":
+                self._release(job)
+            job.state = "done"
+            raise
+
+    def _dispatch(self):
+        """Admit the best waiting jobs into free slots."""
+        now = time.monotonic()
+        while self._waiting and len(self._running) < self.max_concurrent:
+            job = min(self._waiting, key=lambda j: self._order_key(j, now))
+            self._waiting.remove(job)
+
+            wait = now - job.queued_since
+            job.waited += wait
+            self._metrics[job.priority].waits.append(wait)
+            if job.started is None:
+                job.started = now
+
+            job.state = "running"
+            job._running_since = now
+            self._running[job.id] = job
+            self._project_running[job.project] += 1
+            if not job._admitted.done():
+                job._admitted.set_result(None)
+
+    def _release(self, job: Job):
+        if self._running.pop(job.id, None) is None:
+            return
+        elapsed = time.monotonic() - job._running_since
+        job.run_time += elapsed
+        self._project_running[job.project] -= 1
+        self._project_service[job.project] += elapsed
+        self._dispatch()
+
+    def _effective_rank(self, job: Job, now: float) -> int:
+        """Class rank after deadline promotion and aging (0 at best)."""
+        rank = job.rank
+        if job.deadline is not None and job.deadline - now < self.deadline_slack:
+            rank -= 1
+        if self.aging_seconds is not None:
+            waited = job.waited + (now - job.queued_since if job.state == "queued" else 0.0)
+            rank -= int(waited // self.aging_seconds)
+        return max(0, rank)
+
+    def _order_key(self, job: Job, now: float):
+        return (
+            self._effective_rank(job, now),
+            job.deadline if job.deadline is not None else float("inf"),
+            self._project_running[job.project],
+            self._project_service[job.project],
+            job.submitted,
+            job.id,
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, running jobs and wait times (ms) per priority class."""
+        classes = {}
+        for name, metrics in self._metrics.items():
+            waits_ms = sorted(wait * 1000 for wait in metrics.waits) or [0.0]
+            classes[name] = {
+                "queue_depth": sum(1 for job in self._waiting if job.priority == name),
+                "running": sum(1 for job in self._running.values() if job.priority == name),
+                "submitted": metrics.submitted,
+                "completed": metrics.completed,
+                "failed": metrics.failed,
+                "preemptions": metrics.preemptions,
+                "deadlines_missed": metrics.deadlines_missed,
+                "mean_wait_ms": statistics.fmean(waits_ms),
+                "p95_wait_ms": waits_ms[min(len(waits_ms) - 1, int(len(waits_ms) * 0.95))],
+                "max_wait_ms": waits_ms[-1],
+            }
+        return {
+            "max_concurrent": self.max_concurrent,
+            "aging_seconds": self.aging_seconds,
+            "queue_depth": self.queue_depth,
+            "running": len(self._running),
+            "classes": classes,
+            "project_run_seconds": dict(self._project_service),
+        }
+
+
+async def checkpoint():
+    """Segment-boundary yield point for the job of the calling task (no-op outside one)."""
+    job = _current_job.get()
+    if job is not None and job.scheduler is not None:
+        await job.scheduler.checkpoint(job)
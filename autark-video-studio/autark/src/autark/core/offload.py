@@ -0,0 +1,155 @@
+"""
+AUTARK CPU Offload
+==================
+
+Runs CPU-bound work (knowledge graph scoring, deep thinking) off the event
+loop, so `async` APIs actually yield while they compute.
+
+A CPUExecutor has one of three modes:
+- "thread":  a thread pool; cheap hand-off, shares memory with the caller.
+  Right for small graphs and single requests (NumPy scoring releases the
+  GIL for most of its work).
+- "process": a process pool; for large batches that need real parallelism.
+  Functions and arguments must be picklable, so callers send module-level
+  functions plus plain data.
+- "inline":  run in the calling thread (the old blocking behaviour; useful
+  as a baseline and in tests).
+
+measure_event_loop_lag() runs a workload next to a ticker task and reports
+how late the ticker's wake-ups were, which is the latency every other
+coroutine on the loop sees.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import statistics
+import threading
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+MODES = ("thread", "process", "inline")
+
+_executors: "weakref.WeakSet[CPUExecutor]" = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    """A forked child inherits pool objects whose worker threads do not exist there."""
+    for executor in list(_executors):
+        executor._pool = None
+        executor._lock = threading.Lock()
+
+
+class CPUExecutor:
+    """Configurable executor for CPU-bound work called from coroutines."""
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: Optional[int] = None,
+        mp_context: Any = None
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown executor mode: {mode} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.max_workers = max_workers or min(8, os.cpu_count() or 2)
+        self.mp_context = mp_context
+
+        self.calls = 0
+        self.busy_seconds = 0.0
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        _executors.add(self)
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    self._pool = ProcessPoolExecutor(self.max_workers, mp_context=self.mp_context)
+                else:
+                    self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="autark-cpu")
+            return self._pool
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) in the pool and await the result."""
+        self.calls += 1
+        start = time.perf_counter()
+        try:
+            if self.mode == "inline":
+                return func(*args, **kwargs)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), functools.partial(func, *args, **kwargs))
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait)
+                self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "calls": self.calls,
+            "busy_seconds": self.busy_seconds,
+        }
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+_default_cpu_executor: Optional[CPUExecutor] = None
+
+
+def get_cpu_executor() -> CPUExecutor:
+    """Process-wide shared thread-mode executor."""
+    global _default_cpu_executor
+    if _default_cpu_executor is None:
+        _default_cpu_executor = CPUExecutor()
+    return _default_cpu_executor
+
+
+async def measure_event_loop_lag(workload: Callable[[], Awaitable], interval: float = 0.005) -> Dict[str, Any]:
+    """
+    Await `workload()` while a ticker sleeps `interval` in a loop; report how
+    late the ticker woke up (max/p99/mean in ms) and the workload's wall time.
+
+    `workload` is a factory so its tasks are only created once the ticker runs.
+    """
+    loop = asyncio.get_running_loop()
+    lags = []
+    finished = asyncio.Event()
+
+    async def ticker():
+        while not finished.is_set():
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, loop.time() - expected))
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)  # let the ticker start before the workload blocks
+    start = time.perf_counter()
+    try:
+        result = await workload()
+    finally:
+        wall = time.perf_counter() - start
+        finished.set()
+        await ticker_task
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        "wall_seconds": wall,
+        "ticks": len(lags),
+        "max_lag_ms": lags_ms[-1],
+        "p99_lag_ms": lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))],
+        "mean_lag_ms": statistics.fmean(lags_ms),
+        "result": result,
+    }
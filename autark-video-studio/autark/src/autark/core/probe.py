@@ -0,0 +1,273 @@
+"""
+AUTARK Capability Probe
+=======================
+
+Finds out which tools, Python packages and GPUs are available without
+importing anything heavy.
+
+Packages are located with importlib.util.find_spec and their versions read
+from installed metadata, so checking for torch costs a directory lookup
+instead of a multi-second import. Probes run concurrently in a thread pool.
+Results are cached on disk, keyed by the interpreter and the modification
+times of its site-packages directories: installing or removing a package
+changes the key and the next probe starts fresh.
+"""
+
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import logging
+import os
+import shutil
+import site
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Distribution name -> top-level module, where they differ
+MODULE_NAMES = {
+    "opencv-python": "cv2",
+    "opencv-python-headless": "cv2",
+    "pillow": "PIL",
+    "scikit-learn": "sklearn",
+    "clip-by-openai": "clip",
+    "segment-anything": "segment_anything",
+    "controlnet-aux": "controlnet_aux",
+    "tts": "TTS",
+    "pyyaml": "yaml",
+}
+
+# What a studio tool needs to actually run
+TOOL_REQUIREMENTS = {
+    "hunyuan_video": {"packages": ["torch", "transformers", "diffusers"]},
+    "stable_video_diffusion": {"packages": ["torch", "diffusers", "transformers"]},
+    "cog_video": {"packages": ["torch", "transformers"]},
+    "bark_tts": {"packages": ["bark"]},
+    "coqui_tts": {"packages": ["TTS"]},
+    "manim": {"packages": ["manim"]},
+    "remotion": {"commands": ["node", "npx"]},
+}
+
+CACHE_VERSION = 1
+
+
+def module_name(distribution: str) -> str:
+    """Top-level import name for a pip distribution/requirement string."""
+    name = distribution.split("[")[0].split(";")[0]
+    for separator in ("==", ">=", "<=", "~=", "!=", ">", "<"):
+        name = name.split(separator)[0]
+    name = name.strip()
+    return MODULE_NAMES.get(name.lower(), name.replace("-", "_"))
+
+
+@dataclass
+class PackageStatus:
+    """Presence and version of one package, found without importing it."""
+
+    name: str
+    module: str
+    installed: bool
+    version: Optional[str] = None
+    location: Optional[str] = None
+
+
+def _probe_package(distribution: str) -> PackageStatus:
+    module = module_name(distribution)
+    try:
+        spec = importlib.util.find_spec(module)
+    except (ImportError, ValueError):
+        spec = None
+
+    version = None
+    if spec is not None:
+        for candidate in (distribution.split("[")[0], module):
+            try:
+                version = importlib.metadata.version(candidate)
+                break
+            except importlib.metadata.PackageNotFoundError:
+                continue
+
+    return PackageStatus(
+        name=distribution,
+        module=module,
+        installed=spec is not None,
+        version=version,
+        location=spec.origin if spec is not None else None
+    )
+
+
+def _probe_gpu() -> Dict[str, Any]:
+    """NVIDIA GPUs from the driver's /proc entries, falling back to nvidia-smi."""
+    proc_gpus = Path("/proc/driver/nvidia/gpus")
+    if proc_gpus.is_dir():
+        devices = sorted(entry.name for entry in proc_gpus.iterdir())
+        return {"available": bool(devices), "devices": devices, "source": "procfs"}
+
+    if shutil.which("nvidia-smi"):
+        # Runs in a probe thread, so the executor gets its own event loop here
+        from .executor import get_executor
+        result = get_executor().run_sync(["nvidia-smi", "-L"], timeout=10)
+        devices = [line for line in result.stdout.splitlines() if line.startswith("GPU")]
+        return {"available": result.ok and bool(devices), "devices": devices, "source": "nvidia-smi"}
+
+    return {"available": False, "devices": [], "source": None}
+
+
+def memory_gb() -> float:
+    """Total physical memory in GB (no psutil needed)."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / (1024 ** 3)
+    except (ValueError, OSError, AttributeError):
+        return 0.0
+
+
+def disk_free_gb(path: str = "/") -> float:
+    """Free space at `path` in GB (always measured, never cached)."""
+    return shutil.disk_usage(path).free / (1024 ** 3)
+
+
+def default_cache_path() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "autark" / "capabilities.json"
+
+
+class CapabilityProbe:
+    """
+    Cached, import-free environment probe.
+
+    `probe()` returns package, command and GPU availability; only entries
+    missing from the cache for the current environment key are probed.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, max_workers: int = 8):
+        self.cache_path = Path(cache_path) if cache_path else default_cache_path()
+        self.max_workers = max_workers
+        self._memory_cache = None
+
+    @staticmethod
+    def environment_key() -> str:
+        """Interpreter plus mtimes of the directories packages get installed into."""
+        roots = set(site.getsitepackages() if hasattr(site, "getsitepackages") else [])
+        roots.add(site.getusersitepackages())
+        roots.update(entry for entry in sys.path if entry.endswith(("site-packages", "dist-packages")))
+
+        stamps = []
+        for root in sorted(roots):
+            try:
+                stamps.append((root, os.stat(root).st_mtime_ns))
+            except OSError:
+                continue
+
+        payload = json.dumps([sys.executable, sys.version, os.environ.get("PATH", ""), stamps])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load_cache(self, key: str) -> Dict[str, Any]:
+        if self._memory_cache and self._memory_cache.get("key") == key:
+            return self._memory_cache
+
+        try:
+            cached = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            if cached.get("key") == key and cached.get("version") == CACHE_VERSION:
+                self._memory_cache = cached
+                return cached
+        except (OSError, ValueError):
+            pass
+
+        return self._empty_cache(key)
+
+    @staticmethod
+    def _empty_cache(key: str) -> Dict[str, Any]:
+        return {"key": key, "version": CACHE_VERSION, "packages": {}, "commands": {}, "gpu": None}
+
+    def _save_cache(self, cache: Dict[str, Any]):
+        self._memory_cache = cache
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(cache), encoding="utf-8")
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.debug(f"Capability cache not written: {e}")
+
+    def probe(
+        self,
+        packages: Optional[List[str]] = None,
+        commands: Optional[List[str]] = None,
+        gpu: bool = True,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """Availability of `packages` and `commands` (and GPUs), cached per environment."""
+        start = time.perf_counter()
+        key = self.environment_key()
+        cache = self._empty_cache(key) if refresh else self._load_cache(key)
+
+        packages = list(dict.fromkeys(packages or []))
+        commands = list(dict.fromkeys(commands or []))
+        missing_packages = [p for p in packages if p not in cache["packages"]]
+        missing_commands = [c for c in commands if c not in cache["commands"]]
+        probe_gpu = gpu and cache["gpu"] is None
+
+        if missing_packages or missing_commands or probe_gpu:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                gpu_future = pool.submit(_probe_gpu) if probe_gpu else None
+                package_results = pool.map(_probe_package, missing_packages)
+                command_results = pool.map(shutil.which, missing_commands)
+
+                for status in package_results:
+                    cache["packages"][status.name] = asdict(status)
+                for command, path in zip(missing_commands, command_results):
+                    cache["commands"][command] = path
+                if gpu_future is not None:
+                    cache["gpu"] = gpu_future.result()
+
+            self._save_cache(cache)
+            from_cache = False
+        else:
+            from_cache = True
+
+        return {
+            "packages": {p: cache["packages"][p] for p in packages},
+            "commands": {c: cache["commands"][c] for c in commands},
+            "gpu": cache["gpu"] if gpu else None,
+            "environment_key": key,
+            "from_cache": from_cache,
+            "probe_seconds": time.perf_counter() - start,
+        }
+
+    def tool_availability(self, tools: List[str], refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Per tool: available flag, missing packages/commands and package versions."""
+        requirements = {tool: TOOL_REQUIREMENTS.get(tool, {}) for tool in tools}
+        result = self.probe(
+            packages=[p for req in requirements.values() for p in req.get("packages", [])],
+            commands=[c for req in requirements.values() for c in req.get("commands", [])],
+            gpu=False,
+            refresh=refresh
+        )
+
+        availability = {}
+        for tool, req in requirements.items():
+            missing = [p for p in req.get("packages", []) if not result["packages"][p]["installed"]]
+            missing += [c for c in req.get("commands", []) if not result["commands"][c]]
+            availability[tool] = {
+                "available": not missing,
+                "missing": missing,
+                "versions": {p: result["packages"][p]["version"] for p in req.get("packages", [])},
+            }
+        return availability
+
+
+_default_probe: Optional[CapabilityProbe] = None
+
+
+def get_probe() -> CapabilityProbe:
+    """Process-wide shared probe (one in-memory cache)."""
+    global _default_probe
+    if _default_probe is None:
+        _default_probe = CapabilityProbe()
+    return _default_probe
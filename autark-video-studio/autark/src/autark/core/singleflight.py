@@ -0,0 +1,61 @@
+"""
+AUTARK Single-Flight
+====================
+
+Coalesces identical requests that are in flight at the same time: the first
+caller for a key starts the computation, later callers with the same key
+wait for it and get a copy of its result (or its exception) instead of
+computing it again. Keys are forgotten as soon as the computation finishes,
+so this deduplicates concurrent work and does not cache.
+"""
+
+import asyncio
+import copy
+import logging
+from typing import Dict, Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Per-key coalescing of concurrent coroutine calls."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await factory() once per key among concurrent callers.
+
+        The computation runs as its own task, so a cancelled waiter does not
+        cancel it for the others.
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(self._compute(factory))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+            logger.info("🔗 Joined an identical request already in flight")
+
+        result, pristine = await asyncio.shield(task)
+        # Followers copy a version the leader's caller never sees, so nobody
+        # observes another caller's mutations
+        return result if leader else copy.deepcopy(pristine)
+
+    @staticmethod
+    async def _compute(factory: Callable[[], Awaitable[Any]]):
+        result = await factory()
+        return result, copy.deepcopy(result)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": self.in_flight}
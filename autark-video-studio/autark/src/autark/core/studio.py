@@ -13,6 +13,10 @@ from dataclasses import dataclass
 import json
 import time
 
+from .jobs import JobScheduler
+from .singleflight import SingleFlight
+from ..nlp.normalize import prompt_key
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -36,15 +40,42 @@ class StudioConfig:
     deep_thinking_level: float = 0.8
     creativity_boost: float = 0.7
     semantic_depth: float = 0.9
+    # Equal requests give equal concepts and scene plans (DeepThinkingEngine default)
+    deterministic_thinking: bool = True
     
     # Output settings
     output_format: str = "mp4"
     compression: str = "h264"
     export_path: str = "./exports"
     
+    # Preview settings (fraction of the target resolution, frame rate divisor)
+    preview_scale: float = 0.25
+    preview_frame_divisor: int = 2
+    
     # Integration settings
     tools_enabled: List[str] = None
     knowledge_base_path: str = "./knowledge-base"
+    # Keep learned concepts in a snapshot + mutation log under knowledge_base_path
+    persist_knowledge: bool = False
+    # Attach to a published snapshot (knowledge.shared) instead of building a graph
+    shared_knowledge_path: str = None
+    
+    # CPU offload for deep thinking / knowledge queries: "thread", "process" or "inline"
+    cpu_executor: str = "thread"
+    cpu_workers: int = None
+    
+    # Job scheduling (core.jobs): generate_video jobs running at once; previews
+    # and videos up to interactive_minutes default to "interactive" priority,
+    # videos from batch_minutes on to "batch". Waiting jobs move up one class
+    # per job_aging_seconds queued (None disables aging)
+    max_concurrent_jobs: int = 2
+    interactive_minutes: float = 1.0
+    batch_minutes: float = 10.0
+    job_aging_seconds: float = 60.0
+    
+    # Tool planning settings
+    tool_quality_floor: float = 0.75
+    tool_stats_path: str = None
     
     def __post_init__(self):
         if self.tools_enabled is None:
@@ -52,6 +83,8 @@ class StudioConfig:
                 "hunyuan_video", "stable_video_diffusion", "cog_video",
                 "bark_tts", "coqui_tts", "manim", "remotion"
             ]
+        if self.tool_stats_path is None:
+            self.tool_stats_path = str(Path(self.knowledge_base_path) / "tool_stats.json")
 
 
 class AutarkStudio:
@@ -71,6 +104,11 @@ class AutarkStudio:
         self.is_initialized = False
         self.active_projects = {}
         self.tool_registry = {}
+        self._inflight = SingleFlight()
+        self.jobs = JobScheduler(
+            max_concurrent=self.config.max_concurrent_jobs,
+            aging_seconds=self.config.job_aging_seconds
+        )
         
         # Initialize components
         self._setup_logging()
@@ -93,17 +131,35 @@ class AutarkStudio:
     def _initialize_components(self):
         """Initialize all studio components."""
         try:
+            # Executor that keeps CPU-bound planning off the event loop
+            from .offload import CPUExecutor
+            self.cpu_executor = CPUExecutor(
+                mode=self.config.cpu_executor,
+                max_workers=self.config.cpu_workers
+            )
+            
             # Initialize Deep Thinking Engine
             from ..nlp.deep_thinking import DeepThinkingEngine
             self.thinking_engine = DeepThinkingEngine(
-                creativity_level=self.config.deep_thinking_level
+                creativity_level=self.config.deep_thinking_level,
+                deterministic=self.config.deterministic_thinking,
+                executor=self.cpu_executor
             )
             
             # Initialize Knowledge Graph
-            from ..knowledge.graph import KnowledgeGraph
-            self.knowledge_graph = KnowledgeGraph(
-                base_path=self.config.knowledge_base_path
-            )
+            if self.config.shared_knowledge_path:
+                from ..knowledge.shared import SharedKnowledgeGraph
+                self.knowledge_graph = SharedKnowledgeGraph(
+                    self.config.shared_knowledge_path, executor=self.cpu_executor
+                )
+            else:
+                from ..knowledge.graph import KnowledgeGraph
+                self.knowledge_graph = KnowledgeGraph(
+                    base_path=self.config.knowledge_base_path,
+                    executor=self.cpu_executor
+                )
+                if self.config.persist_knowledge:
+                    self.knowledge_graph.open_store()
             
             # Initialize Video Generator
             from ..video.generator import VideoGenerator
@@ -133,15 +189,22 @@ class AutarkStudio:
             "remotion": "React-based Video Generation"
         }
         
-        for tool_id, description in tools.items():
-            if tool_id in self.config.tools_enabled:
-                self.tool_registry[tool_id] = {
-                    "description": description,
-                    "status": "available",
-                    "last_used": None
-                }
+        # Import-free check of what is actually installed (cached per environment)
+        from .probe import get_probe
+        enabled = [tool_id for tool_id in tools if tool_id in self.config.tools_enabled]
+        availability = get_probe().tool_availability(enabled)
+        
+        for tool_id in enabled:
+            self.tool_registry[tool_id] = {
+                "description": tools[tool_id],
+                "status": "available" if availability[tool_id]["available"] else "not_installed",
+                "missing": availability[tool_id]["missing"],
+                "versions": availability[tool_id]["versions"],
+                "last_used": None
+            }
         
-        logger.info(f"🛠️ Registered {len(self.tool_registry)} AI tools")
+        available = sum(1 for tool in self.tool_registry.values() if tool["status"] == "available")
+        logger.info(f"🛠️ Registered {len(self.tool_registry)} AI tools ({available} installed)")
     
     async def generate_video(
         self, 
@@ -151,6 +214,11 @@ class AutarkStudio:
         quality: str = "4K",
         include_audio: bool = True,
         deep_thinking: bool = True,
+        project_id: Optional[str] = None,
+        incremental: bool = True,
+        preview: bool = False,
+        priority: Optional[str] = None,
+        deadline: Optional[float] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -163,6 +231,18 @@ class AutarkStudio:
             quality: Output quality (4K, 1080p, 720p)
             include_audio: Whether to generate audio/TTS
             deep_thinking: Enable deep thinking enhancement
+            project_id: Project to render into (see create_project); the
+                scene breakdown and segments are stored for re-renders
+            incremental: Re-render only the scenes of the project that
+                changed since its last render and reuse the other segments
+            preview: Render a quick draft of the same timeline at reduced
+                resolution/frame rate with cheap stand-in tools. Planning
+                artefacts (enhanced concept, knowledge context, scene
+                breakdown, TTS) are kept on the project for the final render
+            priority: Scheduling class ("interactive", "normal" or "batch");
+                by default derived from preview and duration_minutes
+            deadline: Seconds from now by which the video should be ready;
+                a scheduling hint, the job is never cancelled
             **kwargs: Additional parameters
             
         Returns:
@@ -171,35 +251,123 @@ class AutarkStudio:
         if not self.is_initialized:
             raise RuntimeError("Studio not properly initialized")
         
+        if project_id is not None and project_id not in self.active_projects:
+            raise ValueError(f"Unknown project: {project_id}")
+        
+        if priority is None:
+            priority = self._default_priority(duration_minutes, preview)
+        
+        args = (prompt, duration_minutes, style, quality, include_audio,
+                deep_thinking, project_id, incremental, preview)
+        
+        def scheduled():
+            return self.jobs.run(
+                lambda: self._generate_video(*args, **kwargs),
+                priority=priority, project=project_id, deadline=deadline
+            )
+        
+        if project_id is not None:
+            # Project renders read and update project state; never shared
+            return await scheduled()
+        
+        # Identical requests (up to case, whitespace and punctuation of the
+        # prompt) already in flight share one computation
+        flight_key = json.dumps(
+            [prompt_key(prompt), *args[1:], priority, kwargs], sort_keys=True, default=repr
+        )
+        result = await self._inflight.run(flight_key, scheduled)
+        if result.get("success"):
+            result["metadata"]["prompt"] = prompt
+        return result
+    
+    def _default_priority(self, duration_minutes: float, preview: bool) -> str:
+        """Scheduling class of a request that does not name one."""
+        if preview or duration_minutes <= self.config.interactive_minutes:
+            return "interactive"
+        if duration_minutes >= self.config.batch_minutes:
+            return "batch"
+        return "normal"
+    
+    async def _generate_video(
+        self,
+        prompt: str,
+        duration_minutes: float,
+        style: str,
+        quality: str,
+        include_audio: bool,
+        deep_thinking: bool,
+        project_id: Optional[str],
+        incremental: bool,
+        preview: bool,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Body of generate_video (arguments already validated)."""
         logger.info(f"🎬 Starting video generation: '{prompt[:50]}...'")
         start_time = time.time()
         
         try:
-            # Step 1: Deep Thinking Enhancement
-            if deep_thinking:
-                logger.info("🧠 Applying deep thinking to concept...")
-                enhanced_concept = await self.thinking_engine.enhance_concept(
-                    prompt, style=style, duration=duration_minutes
-                )
-            else:
-                enhanced_concept = {"original": prompt, "enhanced": prompt}
-            
-            # Step 2: Knowledge Graph Enrichment
-            logger.info("📚 Enriching with knowledge graph...")
-            knowledge_context = await self.knowledge_graph.get_context(
-                enhanced_concept["enhanced"]
+            # Reuse planning artefacts of an earlier (preview) render of the same request
+            planning_key = json.dumps(
+                [prompt, style, duration_minutes, deep_thinking, kwargs.get("seed")]
             )
+            planning = None
+            if project_id is not None:
+                planning = self.active_projects[project_id].get("planning")
+                if planning is not None and planning["key"] != planning_key:
+                    planning = None
+            
+            if planning is not None:
+                logger.info("♻️ Reusing planning artefacts from the previous render")
+                enhanced_concept = planning["enhanced_concept"]
+                knowledge_context = planning["knowledge_context"]
+            else:
+                # Step 1: Deep Thinking Enhancement
+                if deep_thinking:
+                    logger.info("🧠 Applying deep thinking to concept...")
+                    enhanced_concept = await self.thinking_engine.enhance_concept(
+                        prompt, style=style, duration=duration_minutes,
+                        seed=kwargs.get("seed")
+                    )
+                    enhanced_concept["enhanced"] = enhanced_concept["enhanced_concept"]
+                else:
+                    enhanced_concept = {"original": prompt, "enhanced": prompt}
+                
+                # Step 2: Knowledge Graph Enrichment
+                logger.info("📚 Enriching with knowledge graph...")
+                knowledge_context = await self.knowledge_graph.get_context(
+                    enhanced_concept["enhanced"]
+                )
             
             # Step 3: Video Generation
-            logger.info("🎥 Generating video content...")
+            logger.info(f"🎥 Generating {'preview' if preview else 'video'} content...")
+            segments_key = "preview_segments" if preview else "segments"
+            previous_segments = None
+            if project_id is not None and incremental:
+                previous_segments = self.active_projects[project_id].get(segments_key)
+            
             video_result = await self.video_generator.create_video(
                 concept=enhanced_concept,
                 knowledge=knowledge_context,
                 duration=duration_minutes,
                 quality=quality,
-                style=style
+                style=style,
+                previous_segments=previous_segments,
+                preview=preview,
+                audio=planning["audio"] if planning else None
             )
             
+            if project_id is not None:
+                project = self.active_projects[project_id]
+                project["planning"] = {
+                    "key": planning_key,
+                    "enhanced_concept": enhanced_concept,
+                    "knowledge_context": knowledge_context,
+                    "audio": video_result["audio"]
+                }
+                project["scene_breakdown"] = enhanced_concept.get("scene_breakdown")
+                project[segments_key] = {seg["id"]: seg for seg in video_result["segments"]}
+                project["status"] = "previewed" if preview else "rendered"
+            
             # Step 4: Audio Integration (if requested)
             if include_audio:
                 logger.info("🎵 Generating and integrating audio...")
@@ -225,9 +393,13 @@ class AutarkStudio:
                     "enhanced_concept": enhanced_concept,
                     "generation_time": generation_time,
                     "quality": quality,
+                    "preview": preview,
+                    "render_settings": video_result.get("render_settings"),
                     "duration": duration_minutes,
                     "style": style,
-                    "tools_used": final_result["tools_used"]
+                    "tools_used": final_result["tools_used"],
+                    "project_id": project_id,
+                    "render_diff": video_result.get("render_diff")
                 },
                 "analytics": final_result.get("analytics", {})
             }
@@ -274,8 +446,11 @@ class AutarkStudio:
         return {
             "initialized": self.is_initialized,
             "config": self.config.__dict__,
-            "available_tools": len(self.tool_registry),
+            "available_tools": sum(1 for tool in self.tool_registry.values()
+                                   if tool["status"] == "available"),
             "active_projects": len(self.active_projects),
+            "request_coalescing": self._inflight.stats(),
+            "jobs": self.jobs.stats(),
             "system_resources": self._get_system_resources()
         }
     
@@ -336,6 +511,46 @@ class AutarkStudio:
                 "error": str(e)
             }
 
+    
+    async def benchmark_concurrency(self, concurrency: int = 32, modes: List[str] = None) -> Dict[str, Any]:
+        """
+        Event-loop lag while `concurrency` planning requests (deep thinking +
+        knowledge context) run at once, per CPU executor mode.
+        """
+        from .offload import CPUExecutor, measure_event_loop_lag
+        
+        modes = modes or ["inline", self.cpu_executor.mode]
+        prompts = [f"A story about light and music, variation {i}" for i in range(concurrency)]
+        
+        async def plan(prompt: str):
+            enhanced = await self.thinking_engine.enhance_concept(prompt, seed=len(prompt))
+            return await self.knowledge_graph.get_context(enhanced["enhanced_concept"])
+        
+        results = {}
+        original = self.cpu_executor
+        try:
+            for mode in dict.fromkeys(modes):
+                executor = original if mode == original.mode else CPUExecutor(mode, self.config.cpu_workers)
+                self.thinking_engine.executor = self.knowledge_graph.executor = executor
+                # Cold caches for every mode
+                self.thinking_engine._result_cache.clear()
+                self.knowledge_graph._query_cache.clear()
+                
+                measurement = await measure_event_loop_lag(
+                    lambda: asyncio.gather(*(plan(prompt) for prompt in prompts))
+                )
+                measurement.pop("result")
+                results[mode] = measurement
+                if executor is not original:
+                    executor.shutdown()
+        finally:
+            self.thinking_engine.executor = self.knowledge_graph.executor = original
+        
+        logger.info("⏱️ Event-loop lag: " + ", ".join(
+            f"{mode} max {r['max_lag_ms']:.1f}ms" for mode, r in results.items()
+        ))
+        return {"concurrency": concurrency, "modes": results}
+
 
 # Convenience functions for quick access
 async def quick_generate(prompt: str, **kwargs) -> Dict[str, Any]:
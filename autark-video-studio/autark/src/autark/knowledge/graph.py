@@ -8,11 +8,19 @@ Semantic knowledge management and integration for video generation.
 import logging
 import json
 import asyncio
-from typing import Dict, List, Any, Set
+import copy
+import threading
+import heapq
+from collections import Counter, OrderedDict
+from typing import Dict, List, Any, FrozenSet, Optional, Set, Tuple, Union
 from pathlib import Path
 from dataclasses import dataclass, asdict
 import time
 
+from ..core.offload import get_cpu_executor
+from ..nlp.normalize import NormalizedPrompt, normalize_prompt
+from .scoring import ColumnarScorer
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +36,10 @@ class KnowledgeNode:
     relevance_score: float = 0.0
 
 
+# A node with its relevance for one query (nodes themselves are never mutated)
+ScoredNode = Tuple[KnowledgeNode, float]
+
+
 class KnowledgeGraph:
     """
     AUTARK Knowledge Graph for semantic understanding and content enrichment.
@@ -35,15 +47,56 @@ class KnowledgeGraph:
     Provides context, relationships, and enhanced understanding for video concepts.
     """
     
-    def __init__(self, base_path: str = "./knowledge-base"):
+    def __init__(self, base_path: str = "./knowledge-base", query_cache_size: int = 256,
+                 retriever: Any = None, executor: Any = None):
         self.base_path = Path(base_path)
         self.nodes = {}
         self.relationships = {}
         self.categories = set()
         
+        # Optional dense retrieval backend (see knowledge.retrieval.EmbeddingRetriever)
+        self.retriever = None
+        
+        # Columnar keyword scorer, built on first query and appended to by add_node
+        self._scorer = None
+        
+        # Optional snapshot + mutation log (see open_store)
+        self.store = None
+        
+        # Counters kept up to date by every mutation, so statistics never walk the graph
+        self._edge_count = 0
+        self._category_counts = Counter()
+        self._degree_histogram = Counter()  # out-degree -> number of nodes
+        self._structure_cache = None        # (version, top_n, structure statistics)
+        
+        # Reverse adjacency of existing nodes, and edges whose target does not exist yet
+        self._reverse: Dict[str, Set[str]] = {}
+        self._pending_edges: Dict[str, Set[str]] = {}
+        self._pending_edge_count = 0
+        
+        # Last number used for generated concept ids
+        self._id_counter = 0
+        
+        # CPU executor for the async query API (core.offload.CPUExecutor;
+        # shared thread pool if None). Mutations and offloaded queries
+        # exclude each other through _lock.
+        self.executor = executor
+        self._lock = threading.RLock()
+        
+        # Bumped on every mutation; part of the query cache key
+        self.version = 0
+        self.query_cache_size = query_cache_size
+        self._query_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        
         # Initialize knowledge base
         self._initialize_knowledge_base()
         
+        if retriever is not None:
+            self.use_retriever(retriever)
+        
         logger.info("📚 Knowledge Graph initialized")
     
     def _initialize_knowledge_base(self):
@@ -92,22 +145,285 @@ class KnowledgeGraph:
     
     def add_node(self, node: KnowledgeNode):
         """Add a node to the knowledge graph."""
-        self.nodes[node.id] = node
-        self.categories.add(node.category)
+        self.add_nodes([node])
+    
+    def add_nodes(self, nodes: List[KnowledgeNode]) -> Dict[str, int]:
+        """
+        Add many nodes with one index update and one cache invalidation.
+        
+        Nodes without an id get a generated one. Returns counts of added,
+        replaced and generated-id nodes.
+        """
+        with self._lock:
+            return self._add_nodes(nodes)
+    
+    def _add_nodes(self, nodes: List[KnowledgeNode]) -> Dict[str, int]:
+        stats = {"added": 0, "replaced": 0, "generated_ids": 0}
+        batch = {}
+        
+        for node in nodes:
+            if not node.id:
+                node.id = self._generate_id()
+                stats["generated_ids"] += 1
+            
+            previous = self.nodes.get(node.id)
+            degree_before = len(self.relationships.get(node.id, ()))
+            if previous is not None:
+                stats["replaced"] += 1
+                self._uncount_node(previous.category, degree_before)
+            else:
+                stats["added"] += 1
+            self.nodes[node.id] = node
+            self.categories.add(node.category)
+            batch[node.id] = node
+            
+            # Edges that were waiting for this node now resolve
+            if previous is None and node.id in self._pending_edges:
+                waiting = self._pending_edges.pop(node.id)
+                self._pending_edge_count -= len(waiting)
+                self._reverse.setdefault(node.id, set()).update(waiting)
+            
+            # Update relationships
+            if node.relationships:
+                targets = self.relationships.setdefault(node.id, set())
+                for target in node.relationships:
+                    if target not in targets:
+                        targets.add(target)
+                        self._index_edge(node.id, target)
+            
+            degree_after = len(self.relationships.get(node.id, ()))
+            self._edge_count += degree_after - degree_before
+            self._category_counts[node.category] += 1
+            self._degree_histogram[degree_after] += 1
+        
+        if self._scorer is not None:
+            self._scorer.add(batch.values())
+        if self.retriever is not None:
+            self.retriever.add(batch.values())
+        
+        self._bump_version()
+        
+        if self.store is not None:
+            self.store.log_nodes(batch.values())
+            if self.store.needs_compaction:
+                self.store.compact(self)
+        return stats
+    
+    def _uncount_node(self, category: str, degree: int):
+        for counter, key in ((self._category_counts, category), (self._degree_histogram, degree)):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+    
+    def _index_edge(self, source: str, target: str):
+        if target in self.nodes:
+            self._reverse.setdefault(target, set()).add(source)
+        else:
+            self._pending_edges.setdefault(target, set()).add(source)
+            self._pending_edge_count += 1
+    
+    def neighbors(self, node_id: str) -> List[str]:
+        """Existing nodes that `node_id` points to (O(out-degree))."""
+        with self._lock:
+            return [target for target in self.relationships.get(node_id, ()) if target in self.nodes]
+    
+    def reverse_neighbors(self, node_id: str) -> FrozenSet[str]:
+        """Nodes that point to `node_id` (O(in-degree) copy of the reverse index)."""
+        with self._lock:
+            return frozenset(self._reverse.get(node_id, ()))
+    
+    def pending_edges(self) -> Dict[str, FrozenSet[str]]:
+        """Missing target id -> sources waiting for it (dangling edges), as a copy."""
+        with self._lock:
+            return {target: frozenset(sources) for target, sources in self._pending_edges.items()}
+    
+    def neighborhood(self, node_id: str, depth: int = 1) -> Dict[str, int]:
+        """Nodes within `depth` hops in either direction, with their distance."""
+        distances = {node_id: 0}
+        frontier = [node_id]
+        for distance in range(1, depth + 1):
+            next_frontier = []
+            for current in frontier:
+                for other in (*self.neighbors(current), *self.reverse_neighbors(current)):
+                    if other not in distances:
+                        distances[other] = distance
+                        next_frontier.append(other)
+            frontier = next_frontier
+        del distances[node_id]
+        return distances
+    
+    def _recount(self):
+        """Rebuild the statistics counters and edge indexes from scratch (after a bulk load)."""
+        self._reverse = {}
+        self._pending_edges = {}
+        self._pending_edge_count = 0
+        for source, targets in self.relationships.items():
+            for target in targets:
+                self._index_edge(source, target)
+        
+        self._edge_count = sum(len(rels) for rels in self.relationships.values())
+        self._category_counts = Counter(node.category for node in self.nodes.values())
+        self._degree_histogram = Counter(
+            len(self.relationships.get(node_id, ())) for node_id in self.nodes
+        )
+    
+    def open_store(self, directory: str = None, **options) -> Dict[str, Any]:
+        """
+        Load the snapshot + mutation log in `directory` (default: base_path)
+        and log every further mutation there (see knowledge.wal).
+        """
+        from .wal import KnowledgeStore
+        
+        store = KnowledgeStore(directory or self.base_path, **options)
+        self.store = None  # replayed mutations must not be logged again
+        stats = store.load(self)
+        self.store = store
+        return stats
+    
+    def compact(self):
+        """Fold the mutation log into a fresh snapshot."""
+        # Under the lock no add_nodes can log between writing the snapshot
+        # and truncating the log
+        with self._lock:
+            if self.store is not None:
+                self.store.compact(self)
+    
+    def _generate_id(self) -> str:
+        """Next unused `concept_<n>` id."""
+        while True:
+            self._id_counter += 1
+            node_id = f"concept_{self._id_counter}"
+            if node_id not in self.nodes:
+                return node_id
+    
+    def bulk_load(self, path: str, format: str = None, batch_size: int = 10000,
+                  strict: bool = False) -> Dict[str, Any]:
+        """Stream concepts from a JSONL/CSV file (see knowledge.ingest); returns the import report."""
+        from .ingest import bulk_load
         
-        # Update relationships
-        for related_id in node.relationships:
-            if node.id not in self.relationships:
-                self.relationships[node.id] = set()
-            self.relationships[node.id].add(related_id)
+        return bulk_load(self, path, format=format, batch_size=batch_size, strict=strict).to_dict()
+    
+    def use_retriever(self, retriever: Any):
+        """Plug in a retrieval backend and index the current nodes with it."""
+        retriever.build(self.nodes.values())
+        self.retriever = retriever
+        self._bump_version()
+    
+    def _bump_version(self):
+        """Invalidate cached query results after a mutation."""
+        with self._cache_lock:
+            self.version += 1
+            self._query_cache.clear()
+    
+    @staticmethod
+    def _normalize_concept(concept: str) -> str:
+        """
+        Cache key text: case and whitespace do not change the result.
+        
+        Punctuation does (keywords like "sci-fi" are matched as substrings),
+        so this is the prompt's collapsed form rather than its canonical key.
+        """
+        return normalize_prompt(concept).collapsed
     
     async def get_context(self, concept: str) -> Dict[str, Any]:
-        """Get semantic context and related knowledge for a concept."""
+        """
+        Get semantic context and related knowledge for a concept.
+        
+        Cache hits return immediately; misses are computed on the graph's
+        CPU executor so the event loop keeps running (see get_context_sync).
+        """
+        key = (self._normalize_concept(concept), self.version)
+        context = self._cached_context(key, concept)
+        if context is not None:
+            logger.info(f"📊 Context served from cache ({context['knowledge_depth']} relevant concepts)")
+            return context
+        
+        return await self._run_cpu(self.get_context_sync, concept)
+    
+    def get_context_sync(self, concept: str) -> Dict[str, Any]:
+        """Blocking variant of get_context."""
         
         logger.info(f"📚 Retrieving context for: '{concept[:50]}...'")
         
-        # Find relevant nodes
-        relevant_nodes = self._find_relevant_nodes(concept)
+        key = (self._normalize_concept(concept), self.version)
+        context = self._cached_context(key, concept)
+        if context is not None:
+            logger.info(f"📊 Context served from cache ({context['knowledge_depth']} relevant concepts)")
+            return context
+        
+        with self._lock:
+            context = self._build_context(concept)
+        self._store_context(key, context)
+        
+        logger.info(f"📊 Context generated with {context['knowledge_depth']} relevant concepts")
+        return context
+    
+    async def get_contexts(self, concepts: List[str]) -> List[Dict[str, Any]]:
+        """Get contexts for many concepts at once without blocking the event loop."""
+        return await self._run_cpu(self.get_contexts_sync, concepts)
+    
+    def get_contexts_sync(self, concepts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get contexts for many concepts at once (batch runs).
+        
+        Cache misses are keyword-scored together in one vectorised pass.
+        """
+        version = self.version
+        keys = [(self._normalize_concept(concept), version) for concept in concepts]
+        contexts = [self._cached_context(key, concept) for key, concept in zip(keys, concepts)]
+        
+        missing = [i for i, context in enumerate(contexts) if context is None]
+        if missing:
+            with self._lock:
+                k = None if self.retriever is not None else 10
+                prompts = [normalize_prompt(concepts[i]) for i in missing]
+                keyword_hits = self._get_scorer().search_batch(prompts, k)
+                for i, prompt, hits in zip(missing, prompts, keyword_hits):
+                    scored = self._find_relevant_nodes(prompt, self._to_scored(hits))
+                    contexts[i] = self._build_context(concepts[i], scored)
+            for i in missing:
+                self._store_context(keys[i], contexts[i])
+        
+        logger.info(f"📊 {len(concepts)} contexts retrieved ({len(concepts) - len(missing)} from cache)")
+        return contexts
+    
+    async def _run_cpu(self, func, *args):
+        """Run a blocking query method on the graph's CPU executor."""
+        executor = self.executor or get_cpu_executor()
+        if executor.mode == "process":
+            # A bound method would pickle the whole graph for every call;
+            # process pools serve SharedKnowledgeGraph batches only
+            executor = get_cpu_executor()
+        return await executor.run(func, *args)
+    
+    def _cached_context(self, key: Tuple[str, int], concept: str) -> Optional[Dict[str, Any]]:
+        """Copy of a cached context for `key`, or None on a miss."""
+        with self._cache_lock:
+            cached = self._query_cache.get(key)
+            if cached is None:
+                return None
+            self._query_cache.move_to_end(key)
+            self._cache_hits += 1
+        
+        context = copy.deepcopy(cached)
+        context["primary_concept"] = concept
+        return context
+    
+    def _store_context(self, key: Tuple[str, int], context: Dict[str, Any]):
+        with self._cache_lock:
+            self._cache_misses += 1
+            if key[1] == self.version:  # graph unchanged while computing
+                self._query_cache[key] = copy.deepcopy(context)
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+    
+    def _build_context(self, concept: str, scored: Optional[List[ScoredNode]] = None) -> Dict[str, Any]:
+        """Compute the context for a concept (uncached)."""
+        
+        # Find relevant nodes with their per-query scores
+        if scored is None:
+            scored = self._find_relevant_nodes(normalize_prompt(concept))
+        relevant_nodes = [node for node, _ in scored]
         
         # Calculate semantic relationships
         relationships = self._calculate_relationships(relevant_nodes)
@@ -115,73 +431,75 @@ class KnowledgeGraph:
         # Generate contextual enhancements
         enhancements = self._generate_enhancements(concept, relevant_nodes)
         
-        context = {
+        return {
             "primary_concept": concept,
-            "relevant_nodes": [asdict(node) for node in relevant_nodes],
+            "relevant_nodes": [{**asdict(node), "relevance_score": score} for node, score in scored],
             "semantic_relationships": relationships,
             "contextual_enhancements": enhancements,
-            "recommended_tools": self._recommend_tools(relevant_nodes),
-            "knowledge_depth": len(relevant_nodes),
-            "context_confidence": self._calculate_confidence(relevant_nodes)
+            "recommended_tools": self._recommend_tools(scored),
+            "tool_weights": self._weight_tools(scored),
+            "knowledge_depth": len(scored),
+            "context_confidence": self._calculate_confidence(scored)
         }
-        
-        logger.info(f"📊 Context generated with {len(relevant_nodes)} relevant concepts")
-        return context
     
-    def _find_relevant_nodes(self, concept: str) -> List[KnowledgeNode]:
-        """Find nodes relevant to the given concept."""
-        relevant = []
-        concept_lower = concept.lower()
-        
-        for node in self.nodes.values():
-            relevance = 0.0
-            
-            # Direct concept match
-            if node.concept.lower() in concept_lower:
-                relevance += 0.8
-            
-            # Category relevance
-            category_keywords = {
-                "narrative": ["story", "tale", "journey", "character"],
-                "visual": ["visual", "color", "light", "scene"],
-                "audio": ["sound", "music", "voice", "audio"],
-                "technical": ["quality", "resolution", "format"]
-            }
-            
-            if node.category in category_keywords:
-                for keyword in category_keywords[node.category]:
-                    if keyword in concept_lower:
-                        relevance += 0.3
-            
-            # Metadata relevance
-            if "keywords" in node.metadata:
-                for keyword in node.metadata["keywords"]:
-                    if keyword.lower() in concept_lower:
-                        relevance += 0.2
-            
-            if relevance > 0.1:
-                node.relevance_score = relevance
-                relevant.append(node)
-        
-        # Sort by relevance
-        relevant.sort(key=lambda x: x.relevance_score, reverse=True)
-        return relevant[:10]  # Top 10 most relevant
+    def _find_relevant_nodes(self, concept: Union[str, NormalizedPrompt],
+                             keyword_hits: Optional[List[ScoredNode]] = None) -> List[ScoredNode]:
+        """Find nodes relevant to the given concept (text or NormalizedPrompt), with their relevance."""
+        concept = normalize_prompt(concept)
+        if keyword_hits is None:
+            # The hybrid merge needs every keyword hit, not just the top 10
+            keyword_hits = self._keyword_scores(concept, None if self.retriever is not None else 10)
+        scored = keyword_hits
+        
+        if self.retriever is not None:
+            # Hybrid: keyword relevance plus cosine similarity of the embeddings
+            scores = {node.id: score for node, score in scored}
+            for node_id, similarity in self.retriever.search(concept.text, k=10):
+                if node_id in self.nodes:
+                    scores[node_id] = scores.get(node_id, 0.0) + similarity
+            scored = [(self.nodes[node_id], score) for node_id, score in scores.items()]
+            scored.sort(key=lambda x: x[1], reverse=True)
+        
+        return scored[:10]  # Top 10 most relevant
+    
+    def _keyword_scores(self, concept: Union[str, NormalizedPrompt], k: Optional[int] = None) -> List[ScoredNode]:
+        """Substring/keyword relevance of the best `k` matching nodes (all if None), best first."""
+        return self._to_scored(self._get_scorer().search(concept, k))
+    
+    def _to_scored(self, hits: List[Tuple[str, float]]) -> List[ScoredNode]:
+        return [(self.nodes[node_id], score) for node_id, score in hits]
+    
+    def _get_scorer(self) -> ColumnarScorer:
+        """Columnar scorer over the current nodes (rebuilt after overwrites/loads)."""
+        if self._scorer is None or self._scorer.needs_rebuild:
+            self._scorer = ColumnarScorer(self.nodes.values())
+        return self._scorer
     
     def _calculate_relationships(self, nodes: List[KnowledgeNode]) -> Dict[str, Any]:
         """Calculate semantic relationships between nodes."""
         relationships = {
             "direct_connections": 0,
+            "external_connections": 0,   # to nodes outside this set
+            "dangling_connections": 0,   # to ids that are not in the graph
             "cluster_strength": 0.0,
             "relationship_map": {}
         }
         
         node_ids = {node.id for node in nodes}
         
+        # One membership test per edge (O(degree) per node)
         for node in nodes:
-            connected = set(node.relationships) & node_ids
+            connected = []
+            for target in dict.fromkeys(node.relationships):
+                if target in node_ids:
+                    connected.append(target)
+                elif target in self.nodes:
+                    relationships["external_connections"] += 1
+                else:
+                    relationships["dangling_connections"] += 1
             if connected:
                 relationships["direct_connections"] += len(connected)
-                relationships["relationship_map"][node.id] = list(connected)
+                relationships["relationship_map"][node.id] = connected
         
         # Calculate cluster strength
         if len(nodes) > 1:
@@ -232,46 +550,47 @@ class KnowledgeGraph:
         
         return enhancements
     
-    def _recommend_tools(self, nodes: List[KnowledgeNode]) -> List[str]:
+    def _recommend_tools(self, scored: List[ScoredNode]) -> List[str]:
         """Recommend AI tools based on relevant knowledge nodes."""
-        tools = set()
-        
-        for node in nodes:
-            if "ai_tools" in node.metadata:
-                tools.update(node.metadata["ai_tools"])
+        weighted_tools = self._weight_tools(scored)
         
-        # Add weight based on relevance
+        # Sort by weight and return top tools
+        sorted_tools = sorted(weighted_tools.items(), key=lambda x: (-x[1], x[0]))
+        return [tool[0] for tool in sorted_tools[:5]]
+    
+    def _weight_tools(self, scored: List[ScoredNode]) -> Dict[str, float]:
+        """Weight AI tools by the relevance of the nodes recommending them (0..1)."""
         weighted_tools = {}
-        for node in nodes:
+        for node, score in scored:
             if "ai_tools" in node.metadata:
                 for tool in node.metadata["ai_tools"]:
                     if tool not in weighted_tools:
                         weighted_tools[tool] = 0
-                    weighted_tools[tool] += node.relevance_score
+                    weighted_tools[tool] += score
         
-        # Sort by weight and return top tools
-        sorted_tools = sorted(weighted_tools.items(), key=lambda x: x[1], reverse=True)
-        return [tool[0] for tool in sorted_tools[:5]]
+        max_weight = max(weighted_tools.values(), default=0.0)
+        if max_weight > 0:
+            weighted_tools = {tool: w / max_weight for tool, w in weighted_tools.items()}
+        
+        return weighted_tools
     
-    def _calculate_confidence(self, nodes: List[KnowledgeNode]) -> float:
+    def _calculate_confidence(self, scored: List[ScoredNode]) -> float:
         """Calculate confidence in the knowledge context."""
-        if not nodes:
+        if not scored:
             return 0.0
         
-        avg_relevance = sum(node.relevance_score for node in nodes) / len(nodes)
-        coverage = min(len(nodes) / 5.0, 1.0)  # 5 nodes = full coverage
+        avg_relevance = sum(score for _, score in scored) / len(scored)
+        coverage = min(len(scored) / 5.0, 1.0)  # 5 nodes = full coverage
         
         confidence = (avg_relevance * 0.7) + (coverage * 0.3)
         return min(confidence, 1.0)
     
     def expand_knowledge(self, new_concepts: List[Dict[str, Any]]):
         """Expand the knowledge base with new concepts."""
-        for concept_data in new_concepts:
-            if "id" not in concept_data:
-                concept_data["id"] = f"concept_{int(time.time())}"
-            
-            node = KnowledgeNode(**concept_data)
-            self.add_node(node)
+        # Concepts without an id get one from add_nodes, under the graph lock
+        nodes = [KnowledgeNode(**{"id": "", **concept_data}) for concept_data in new_concepts]
+        
+        self.add_nodes(nodes)
         
         logger.info(f"📚 Added {len(new_concepts)} new concepts to knowledge base")
     
@@ -280,19 +599,29 @@ class KnowledgeGraph:
         if file_path is None:
             file_path = self.base_path / "knowledge_graph.json"
         
-        data = {
-            "nodes": {node_id: asdict(node) for node_id, node in self.nodes.items()},
-            "relationships": {k: list(v) for k, v in self.relationships.items()},
-            "categories": list(self.categories)
-        }
+        with self._lock:
+            data = {
+                "nodes": {node_id: asdict(node) for node_id, node in self.nodes.items()},
+                "relationships": {k: list(v) for k, v in self.relationships.items()},
+                "categories": list(self.categories)
+            }
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Temporary file + rename: a crash never leaves a half-written snapshot
+        from .wal import atomic_write_json
+        atomic_write_json(file_path, data)
         
         logger.info(f"💾 Knowledge base saved to {file_path}")
     
-    def load_knowledge_base(self, file_path: str = None):
-        """Load knowledge base from disk."""
+    def load_knowledge_base(self, file_path: str = None, strict: bool = False):
+        """
+        Load knowledge base from disk.
+        
+        An unreadable file is logged and skipped, or re-raised with strict=True.
+        """
+        with self._lock:
+            self._load_knowledge_base(file_path, strict)
+    
+    def _load_knowledge_base(self, file_path: str = None, strict: bool = False):
         if file_path is None:
             file_path = self.base_path / "knowledge_graph.json"
         
@@ -316,22 +645,102 @@ class KnowledgeGraph:
             # Load categories
             self.categories = set(data.get("categories", []))
             
+            self._scorer = None
+            self._recount()
+            if self.retriever is not None:
+                self.retriever.build(self.nodes.values())
+            
+            self._bump_version()
+            
             logger.info(f"📚 Knowledge base loaded from {file_path}")
             
         except Exception as e:
             logger.error(f"❌ Failed to load knowledge base: {e}")
+            if strict:
+                raise
     
     def get_statistics(self) -> Dict[str, Any]:
-        """Get knowledge graph statistics."""
+        """Get knowledge graph statistics (from counters, O(categories + degrees))."""
         return {
+            "version": self.version,
+            "query_cache": {
+                "entries": len(self._query_cache),
+                "hits": self._cache_hits,
+                "misses": self._cache_misses
+            },
+            "store": self.store.stats() if self.store is not None else None,
             "total_nodes": len(self.nodes),
-            "total_relationships": sum(len(rels) for rels in self.relationships.values()),
+            "total_relationships": self._edge_count,
+            "dangling_relationships": self._pending_edge_count,
             "categories": list(self.categories),
+            "category_counts": dict(self._category_counts),
+            "degree_histogram": dict(sorted(self._degree_histogram.items())),
             "avg_connections_per_node": (
-                sum(len(rels) for rels in self.relationships.values()) / len(self.nodes)
-                if self.nodes else 0
+                self._edge_count / len(self.nodes) if self.nodes else 0
             )
         }
+    
+    def get_structure_statistics(self, top_n: int = 10) -> Dict[str, Any]:
+        """
+        Dangling relationship targets, connected components and top hubs.
+        
+        Dangling edges and hub degrees come from the edge indexes; components
+        take one union-find pass per graph version, cached until the next
+        mutation.
+        """
+        cached = self._structure_cache
+        if cached is not None and cached[0] == self.version and cached[1] == top_n:
+            return cached[2]
+        
+        version = self.version
+        start = time.perf_counter()
+        
+        # Union-find over existing nodes, edges treated as undirected
+        parent = {node_id: node_id for node_id in self.nodes}
+        
+        def find(node_id):
+            while parent[node_id] != node_id:
+                parent[node_id] = parent[parent[node_id]]
+                node_id = parent[node_id]
+            return node_id
+        
+        for source, targets in self.relationships.items():
+            if source not in parent:
+                continue
+            for target in targets:
+                if target in parent:
+                    root_a, root_b = find(source), find(target)
+                    if root_a != root_b:
+                        parent[root_a] = root_b
+        
+        component_sizes = Counter(find(node_id) for node_id in parent)
+        hubs = heapq.nlargest(
+            top_n, self.nodes,
+            key=lambda node_id: len(self.relationships.get(node_id, ())) + len(self._reverse.get(node_id, ()))
+        )
+        
+        statistics = {
+            "version": version,
+            "dangling_edges": self._pending_edge_count,
+            "dangling_targets": len(self._pending_edges),
+            "top_dangling_targets": heapq.nlargest(
+                top_n, self._pending_edges, key=lambda target: len(self._pending_edges[target])
+            ),
+            "components": len(component_sizes),
+            "largest_component": max(component_sizes.values(), default=0),
+            "isolated_nodes": sum(1 for size in component_sizes.values() if size == 1),
+            "top_hubs": [
+                {
+                    "id": node_id,
+                    "out_degree": len(self.relationships.get(node_id, ())),
+                    "in_degree": len(self._reverse.get(node_id, ()))
+                }
+                for node_id in hubs
+            ],
+            "compute_seconds": time.perf_counter() - start
+        }
+        self._structure_cache = (version, top_n, statistics)
+        return statistics
 
 
 # Convenience functions
@@ -0,0 +1,208 @@
+"""
+AUTARK Knowledge Ingestion
+==========================
+
+Streaming bulk import of concepts into a KnowledgeGraph.
+
+Concepts are read record by record from JSONL or CSV, validated and turned
+into KnowledgeNodes, and handed to the graph in batches through
+KnowledgeGraph.add_nodes, so the scorer, retriever and adjacency are updated
+once per batch instead of once per node. Only one batch is held in memory
+besides the graph itself.
+
+Repeated strings (categories, keywords, relationship ids) are interned, so a
+taxonomy with a million nodes shares one copy of each instead of one per row.
+
+CSV columns: id, concept, category, relationships, keywords, importance;
+relationships and keywords are separated by ";" and any other column ends
+up in the node's metadata.
+"""
+
+import csv
+import json
+import logging
+import sys
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from .graph import KnowledgeGraph, KnowledgeNode
+
+logger = logging.getLogger(__name__)
+
+LIST_SEPARATOR = ";"
+DEFAULT_CATEGORY = "general"
+MAX_REPORTED_ERRORS = 20
+
+
+class IngestError(ValueError):
+    """Invalid record in a strict import."""
+
+
+@dataclass
+class IngestReport:
+    """Outcome and throughput of one bulk import."""
+
+    source: str
+    records: int = 0
+    added: int = 0
+    replaced: int = 0
+    generated_ids: int = 0
+    skipped: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "records": self.records,
+            "added": self.added,
+            "replaced": self.replaced,
+            "generated_ids": self.generated_ids,
+            "skipped": self.skipped,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "records_per_second": round(self.records_per_second),
+            "errors": self.errors,
+        }
+
+
+def _split_list(value: Any) -> List[str]:
+    """List field from JSON (list) or CSV (";"-separated string)."""
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value]
+    raise ValueError(f"expected a list, got {type(value).__name__}")
+
+
+def iter_records(path: str, format: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, raw record) from a .jsonl or .csv file."""
+    path = Path(path)
+    format = (format or path.suffix.lstrip(".")).lower()
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if format in ("jsonl", "ndjson", "json"):
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as e:
+                    yield line_number, {"__error__": f"invalid JSON: {e}"}
+        elif format == "csv":
+            # Header is line 1
+            for line_number, row in enumerate(csv.DictReader(f), 2):
+                yield line_number, row
+        else:
+            raise ValueError(f"Unsupported knowledge format: {format}")
+
+
+def record_to_node(record: Dict[str, Any]) -> KnowledgeNode:
+    """
+    Validate a raw record and build its node; the id may be empty and is
+    assigned by the graph. Raises ValueError for invalid records.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    if "__error__" in record:
+        raise ValueError(record["__error__"])
+
+    concept = record.get("concept")
+    if not isinstance(concept, str) or not concept.strip():
+        raise ValueError("missing concept")
+
+    intern = sys.intern
+    metadata = record.get("metadata") or {}
+    if not isinstance(metadata, dict):
+        raise ValueError("metadata is not an object")
+
+    # Flat CSV columns become metadata
+    for key, value in record.items():
+        if key in ("id", "concept", "category", "relationships", "metadata") or value in (None, ""):
+            continue
+        metadata[key] = value
+
+    if "keywords" in metadata:
+        metadata["keywords"] = [intern(keyword) for keyword in _split_list(metadata["keywords"])]
+    if "importance" in metadata:
+        metadata["importance"] = float(metadata["importance"])
+
+    return KnowledgeNode(
+        id=intern(str(record.get("id") or "")),
+        concept=concept.strip(),
+        category=intern(str(record.get("category") or DEFAULT_CATEGORY)),
+        relationships=[intern(related) for related in _split_list(record.get("relationships"))],
+        metadata=metadata
+    )
+
+
+def bulk_load(
+    graph: KnowledgeGraph,
+    path: str,
+    format: Optional[str] = None,
+    batch_size: int = 10000,
+    strict: bool = False
+) -> IngestReport:
+    """
+    Stream concepts from `path` into `graph` in batches.
+
+    Invalid records are skipped and listed in the report (the first
+    MAX_REPORTED_ERRORS of them); with strict=True the first one raises
+    IngestError instead.
+
+    With a knowledge store attached every batch is still logged, but the
+    store compacts once after the import rather than after every
+    `compact_threshold` records.
+    """
+    report = IngestReport(source=str(path))
+    start = time.perf_counter()
+    batch: List[KnowledgeNode] = []
+
+    def flush():
+        stats = graph.add_nodes(batch)
+        report.added += stats["added"]
+        report.replaced += stats["replaced"]
+        report.generated_ids += stats["generated_ids"]
+        report.batches += 1
+        batch.clear()
+
+    store = graph.store
+    with store.compaction_suspended() if store is not None else nullcontext():
+        for line_number, record in iter_records(path, format):
+            report.records += 1
+            try:
+                node = record_to_node(record)
+            except (ValueError, TypeError) as e:
+                if strict:
+                    raise IngestError(f"{path}:{line_number}: {e}") from e
+                report.skipped += 1
+                if len(report.errors) < MAX_REPORTED_ERRORS:
+                    report.errors.append(f"line {line_number}: {e}")
+                continue
+
+            batch.append(node)
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+
+    if store is not None and store.needs_compaction:
+        graph.compact()
+
+    report.seconds = time.perf_counter() - start
+    logger.info(
+        f"📥 Imported {report.added + report.replaced} concepts from {path} "
+        f"({report.skipped} skipped, {report.records_per_second:,.0f} records/s)"
+    )
+    return report
@@ -0,0 +1,358 @@
+"""
+AUTARK Knowledge Retrieval
+==========================
+
+Dense-vector retrieval backend for the knowledge graph.
+
+Every node is embedded once (concept, category, keywords and description)
+into one row of a contiguous float32 matrix. A query is answered with a
+single matrix product against that matrix and an argpartition top-k; many
+queries are answered with one matrix-matrix product. For large graphs an
+inverted-file (IVF) index only scores the rows in the closest clusters.
+
+The default embedder is a local hashing TF-IDF vectoriser over words and
+character n-grams, so retrieval works offline and matches inflections and
+spelling variants ("stories" finds "story"). Synonyms need either node
+keywords or a semantic embedder; any object with `embed(texts)` can be
+plugged in, e.g. SentenceTransformerEmbedder when sentence-transformers is
+installed.
+"""
+
+import logging
+import math
+import re
+import time
+import zlib
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def node_text(node: Any) -> str:
+    """Text that represents a knowledge node for embedding."""
+    metadata = node.metadata or {}
+    parts = [node.concept, node.category, node.id.replace("_", " ")]
+    parts += list(metadata.get("keywords", []))
+    if metadata.get("description"):
+        parts.append(str(metadata["description"]))
+    return " ".join(parts)
+
+
+class HashingEmbedder:
+    """
+    Hashing TF-IDF vectoriser: words plus character n-grams, signed hashing
+    into `dim` buckets, IDF learned by fit(), L2-normalised rows.
+    """
+
+    def __init__(self, dim: int = 1024, ngram: int = 3, ngram_weight: float = 1.0):
+        self.dim = dim
+        self.ngram = ngram
+        self.ngram_weight = ngram_weight
+        self.idf = np.ones(dim, dtype=np.float32)
+        self._document_count = 0
+
+    def _features(self, text: str) -> Dict[int, float]:
+        features = {}
+        for word in _WORD.findall(text.lower()):
+            tokens = [(word, 1.0)]
+            padded = f"<{word}>"
+            if len(padded) > self.ngram:
+                tokens += [
+                    (padded[i:i + self.ngram], self.ngram_weight)
+                    for i in range(len(padded) - self.ngram + 1)
+                ]
+            for token, weight in tokens:
+                digest = zlib.crc32(token.encode("utf-8"))
+                bucket = digest % self.dim
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                features[bucket] = features.get(bucket, 0.0) + sign * weight
+        return features
+
+    def fit(self, texts: Iterable[str]) -> "HashingEmbedder":
+        """Learn inverse document frequencies from a corpus."""
+        document_frequency = np.zeros(self.dim, dtype=np.float32)
+        count = 0
+        for text in texts:
+            buckets = list(self._features(text))
+            document_frequency[buckets] += 1
+            count += 1
+
+        self._document_count = count
+        self.idf = (np.log((1 + count) / (1 + document_frequency)) + 1).astype(np.float32)
+        return self
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), dim) float32 matrix of unit vectors."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if features:
+                buckets = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+                values = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+                matrix[row, buckets] = values
+
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+class SentenceTransformerEmbedder:
+    """Semantic embeddings via sentence-transformers (optional dependency)."""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("sentence-transformers is required for SentenceTransformerEmbedder") from e
+
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def fit(self, texts: Iterable[str]) -> "SentenceTransformerEmbedder":
+        return self
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self.model.encode(list(texts), normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores per row, best first (argpartition + small sort)."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+class ExactIndex:
+    """Brute-force inner-product index over a growable contiguous matrix."""
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.ids: List[str] = []
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[:len(self.ids)]
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray):
+        needed = len(self.ids) + len(ids)
+        if needed > self._matrix.shape[0]:
+            grown = np.zeros((max(needed, 2 * self._matrix.shape[0]), self.dim), dtype=np.float32)
+            grown[:len(self.ids)] = self.matrix
+            self._matrix = grown
+        self._matrix[len(self.ids):needed] = vectors
+        self.ids.extend(ids)
+
+    def update(self, row: int, vector: np.ndarray):
+        self._matrix[row] = vector
+
+    def search(self, queries: np.ndarray, k: int) -> List[List[Tuple[str, float]]]:
+        if not self.ids:
+            return [[] for _ in range(len(queries))]
+        scores = queries @ self.matrix.T
+        top = _top_k(scores, k)
+        return [
+            [(self.ids[j], float(scores[i, j])) for j in top[i]]
+            for i in range(len(queries))
+        ]
+
+
+class IVFIndex(ExactIndex):
+    """
+    Inverted-file index: rows are clustered with k-means and a query only
+    scores the rows of its `nprobe` closest clusters.
+    """
+
+    def __init__(self, dim: int, nlist: Optional[int] = None, nprobe: int = 16,
+                 iterations: int = 10, seed: int = 0):
+        super().__init__(dim)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids = None
+        self.lists: List[np.ndarray] = []
+
+    def train(self):
+        """(Re)cluster all rows; call after bulk loads."""
+        data = self.matrix
+        n = len(data)
+        if n == 0:
+            return
+        nlist = min(self.nlist or max(1, int(math.sqrt(n))), n)
+
+        rng = np.random.default_rng(self.seed)
+        centroids = data[rng.choice(n, nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignment = np.argmax(data @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = data[assignment == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[c] = centroid / norm if norm > 0 else centroid
+
+        assignment = np.argmax(data @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assignment == c) for c in range(nlist)]
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray):
+        start = len(self.ids)
+        super().add(ids, vectors)
+        if self.centroids is None:
+            return
+        # Assign new rows to their closest existing cluster
+        assignment = np.argmax(vectors @ self.centroids.T, axis=1)
+        rows = start + np.arange(len(ids))
+        for c in np.unique(assignment):
+            self.lists[c] = np.concatenate([self.lists[c], rows[assignment == c]])
+
+    def search(self, queries: np.ndarray, k: int) -> List[List[Tuple[str, float]]]:
+        if self.centroids is None:
+            return super().search(queries, k)
+
+        nprobe = min(self.nprobe, len(self.lists))
+        probes = _top_k(queries @ self.centroids.T, nprobe)
+        results = []
+        for i, query in enumerate(queries):
+            rows = np.concatenate([self.lists[c] for c in probes[i]])
+            if rows.size == 0:
+                results.append([])
+                continue
+            scores = self.matrix[rows] @ query
+            top = _top_k(scores[None, :], k)[0]
+            results.append([(self.ids[rows[j]], float(scores[j])) for j in top])
+        return results
+
+
+class EmbeddingRetriever:
+    """
+    Pluggable retrieval backend for KnowledgeGraph.
+
+    index: "exact", "ivf" or "auto" (IVF from `ivf_threshold` nodes on).
+    """
+
+    def __init__(self, embedder: Any = None, index: str = "auto",
+                 ivf_threshold: int = 20000, min_similarity: float = 0.05, **index_options):
+        self.embedder = embedder or HashingEmbedder()
+        self.index_type = index
+        self.ivf_threshold = ivf_threshold
+        self.min_similarity = min_similarity
+        self.index_options = index_options
+        self.index = ExactIndex(self.embedder.dim)
+        self._rows: Dict[str, int] = {}
+
+    def build(self, nodes: Iterable[Any]):
+        """Fit the embedder and index all nodes from scratch."""
+        nodes = list(nodes)
+        texts = [node_text(node) for node in nodes]
+        self.embedder.fit(texts)
+
+        use_ivf = self.index_type == "ivf" or (
+            self.index_type == "auto" and len(nodes) >= self.ivf_threshold
+        )
+        self.index = IVFIndex(self.embedder.dim, **self.index_options) if use_ivf \
+            else ExactIndex(self.embedder.dim)
+        self._rows = {}
+        self._add(nodes, texts)
+        if use_ivf:
+            self.index.train()
+
+        logger.info(f"🧭 Retrieval index built: {len(nodes)} nodes ({'ivf' if use_ivf else 'exact'})")
+
+    def add(self, nodes: Iterable[Any]):
+        """Index new nodes (or re-embed changed ones) with the current IDF."""
+        nodes = list(nodes)
+        new_nodes = []
+        for node in nodes:
+            if node.id in self._rows:
+                self.index.update(self._rows[node.id], self.embedder.embed([node_text(node)])[0])
+            else:
+                new_nodes.append(node)
+        if new_nodes:
+            self._add(new_nodes, [node_text(node) for node in new_nodes])
+
+    def _add(self, nodes: List[Any], texts: List[str]):
+        if not nodes:
+            return
+        start = len(self.index.ids)
+        self.index.add([node.id for node in nodes], self.embedder.embed(texts))
+        for offset, node in enumerate(nodes):
+            self._rows[node.id] = start + offset
+
+    def search(self, concept: str, k: int = 10) -> List[Tuple[str, float]]:
+        """(node_id, cosine similarity) pairs above min_similarity, best first."""
+        return self.search_batch([concept], k)[0]
+
+    def search_batch(self, concepts: Sequence[str], k: int = 10) -> List[List[Tuple[str, float]]]:
+        """Top-k for many concepts with one matrix product."""
+        hits = self.index.search(self.embedder.embed(concepts), k)
+        return [
+            [(node_id, score) for node_id, score in row if score >= self.min_similarity]
+            for row in hits
+        ]
+
+    def __len__(self) -> int:
+        return len(self.index.ids)
+
+
+def benchmark_retrieval(
+    graph: Any,
+    queries: Sequence[Tuple[str, Iterable[str]]],
+    k: int = 10,
+    retrievers: Optional[Dict[str, EmbeddingRetriever]] = None
+) -> Dict[str, Any]:
+    """
+    Recall@k and latency of the graph's keyword scorer against embedding retrievers.
+
+    `queries` pairs a query text with the ids of the nodes that should be found.
+    Retrievers default to an exact and an IVF retriever over the graph.
+    """
+    if retrievers is None:
+        retrievers = {
+            "embedding_exact": EmbeddingRetriever(index="exact"),
+            "embedding_ivf": EmbeddingRetriever(index="ivf"),
+        }
+        for retriever in retrievers.values():
+            retriever.build(graph.nodes.values())
+
+    def measure(search) -> Dict[str, Any]:
+        latencies, recalls = [], []
+        for text, expected in queries:
+            expected = set(expected)
+            start = time.perf_counter()
+            found = search(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if expected:
+                recalls.append(len(expected & set(found[:k])) / len(expected))
+        latencies.sort()
+        return {
+            "recall_at_k": sum(recalls) / len(recalls) if recalls else None,
+            "mean_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+        }
+
+    results = {
+        "keyword": measure(lambda text: [node.id for node, _ in graph._keyword_scores(text, k)])
+    }
+    for name, retriever in retrievers.items():
+        results[name] = measure(lambda text, r=retriever: [node_id for node_id, _ in r.search(text, k)])
+
+        start = time.perf_counter()
+        retriever.search_batch([text for text, _ in queries], k)
+        elapsed = time.perf_counter() - start
+        results[name]["batch_ms_per_query"] = elapsed * 1000 / max(1, len(queries))
+
+    return {"k": k, "nodes": len(graph.nodes), "queries": len(queries), "results": results}
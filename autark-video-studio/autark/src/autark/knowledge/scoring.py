@@ -0,0 +1,250 @@
+"""
+AUTARK Relevance Scoring
+========================
+
+Vectorised keyword relevance over columnar node arrays.
+
+Scores are identical to the original per-node loop in
+KnowledgeGraph._find_relevant_nodes:
+
+    0.8 if the node's concept text occurs in the query
+  + 0.3 per keyword of the node's category found in the query
+  + 0.2 per metadata keyword found in the query
+
+but the work per query is one substring scan over the *distinct* concept
+texts and keywords (shared keywords are checked once, not once per node),
+followed by array operations over all nodes and an argpartition top-k.
+
+Node features are kept column-wise: a concept id, a category id and an
+importance per node, and the node/keyword incidence as two parallel index
+arrays (a sparse keyword bitset per node).
+"""
+
+import logging
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..nlp.normalize import NormalizedPrompt, normalize_prompt
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_KEYWORDS = {
+    "narrative": ["story", "tale", "journey", "character"],
+    "visual": ["visual", "color", "light", "scene"],
+    "audio": ["sound", "music", "voice", "audio"],
+    "technical": ["quality", "resolution", "format"]
+}
+
+CONCEPT_WEIGHT = 0.8
+CATEGORY_WEIGHT = 0.3
+KEYWORD_WEIGHT = 0.2
+MIN_RELEVANCE = 0.1
+
+# Upper bound for the (queries x nodes) matrix of search_batch
+BATCH_CELLS = 1 << 22
+
+
+def _accumulate(scores: np.ndarray, counts: np.ndarray, weight: float):
+    """
+    scores += weight * counts, added one weight at a time like the scalar loop
+    did, so the floats (and therefore tie order) match it bit for bit.
+    """
+    for step in range(int(counts.max(initial=0))):
+        scores += np.where(counts > step, weight, 0.0)
+
+
+class _Vocabulary:
+    """String -> dense id, with the strings kept in id order."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.items: List[str] = []
+
+    def get(self, item: str) -> int:
+        index = self.ids.get(item)
+        if index is None:
+            index = self.ids[item] = len(self.items)
+            self.items.append(item)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class ColumnarScorer:
+    """
+    Relevance scorer over all nodes of a knowledge graph.
+
+    Nodes are appended with add(); replacing an existing node id rebuilds
+    the columns on the next query.
+    """
+
+    def __init__(self, nodes: Iterable[Any] = ()):
+        self.node_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._concepts = _Vocabulary()
+        self._categories = _Vocabulary()
+        self._keywords = _Vocabulary()
+
+        # Columns (python lists while growing, frozen into arrays lazily)
+        self._concept_col: List[int] = []
+        self._category_col: List[int] = []
+        self._importance_col: List[float] = []
+        self._pair_rows: List[int] = []      # node row of each (node, keyword) pair
+        self._pair_keywords: List[int] = []  # keyword id of each pair
+
+        self._arrays = None
+        self._frozen = False
+        self._pending_rebuild: Optional[List[Any]] = None
+        self.add(nodes)
+
+    @classmethod
+    def from_columns(cls, node_ids: Sequence[str], vocabularies: Dict[str, List[str]],
+                     arrays: Dict[str, np.ndarray]) -> "ColumnarScorer":
+        """Read-only scorer over prebuilt columns (e.g. arrays mapped from a shared snapshot)."""
+        scorer = cls()
+        scorer.node_ids = node_ids
+        for name, vocabulary in (("concepts", scorer._concepts), ("categories", scorer._categories),
+                                 ("keywords", scorer._keywords)):
+            vocabulary.items = list(vocabularies[name])
+        scorer._arrays = arrays
+        scorer._frozen = True
+        return scorer
+
+    def export(self) -> Tuple[Dict[str, List[str]], Dict[str, np.ndarray]]:
+        """Vocabularies and column arrays, the inverse of from_columns()."""
+        vocabularies = {
+            "concepts": self._concepts.items,
+            "categories": self._categories.items,
+            "keywords": self._keywords.items,
+        }
+        return vocabularies, self._columns()
+
+    def add(self, nodes: Iterable[Any]):
+        if self._frozen:
+            raise TypeError("ColumnarScorer built from columns is read-only")
+        for node in nodes:
+            if node.id in self._rows:
+                # Overwritten node: columns are rebuilt from the graph on next use
+                self._pending_rebuild = self._pending_rebuild or []
+                self._pending_rebuild.append(node)
+                continue
+
+            row = len(self.node_ids)
+            self._rows[node.id] = row
+            self.node_ids.append(node.id)
+            self._concept_col.append(self._concepts.get(node.concept.lower()))
+            self._category_col.append(self._categories.get(node.category))
+            self._importance_col.append(float(node.metadata.get("importance", 0.0)))
+            for keyword in node.metadata.get("keywords", []):
+                self._pair_rows.append(row)
+                self._pair_keywords.append(self._keywords.get(keyword.lower()))
+
+        self._arrays = None
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return self._pending_rebuild is not None
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        if self._arrays is None:
+            self._arrays = {
+                "concept": np.asarray(self._concept_col, dtype=np.int32),
+                "category": np.asarray(self._category_col, dtype=np.int32),
+                "importance": np.asarray(self._importance_col, dtype=np.float32),
+                "pair_rows": np.asarray(self._pair_rows, dtype=np.int64),
+                "pair_keywords": np.asarray(self._pair_keywords, dtype=np.int64),
+            }
+        return self._arrays
+
+    @property
+    def importance(self) -> np.ndarray:
+        return self._columns()["importance"]
+
+    def score(self, concept: Union[str, NormalizedPrompt]) -> np.ndarray:
+        """Relevance of every node (row order of node_ids) for one query."""
+        columns = self._columns()
+        text = normalize_prompt(concept).lowered
+
+        concept_hit = np.fromiter((c in text for c in self._concepts.items),
+                                  dtype=np.float64, count=len(self._concepts))
+        category_hits = np.fromiter(
+            (sum(kw in text for kw in CATEGORY_KEYWORDS.get(category, ()))
+             for category in self._categories.items),
+            dtype=np.float64, count=len(self._categories)
+        )
+        keyword_hit = np.fromiter((kw in text for kw in self._keywords.items),
+                                  dtype=np.float64, count=len(self._keywords))
+
+        scores = np.zeros(len(self.node_ids), dtype=np.float64)
+        if len(concept_hit):
+            scores += CONCEPT_WEIGHT * concept_hit[columns["concept"]]
+        if len(category_hits):
+            _accumulate(scores, category_hits[columns["category"]], CATEGORY_WEIGHT)
+        if len(columns["pair_rows"]):
+            _accumulate(scores, np.bincount(
+                columns["pair_rows"],
+                weights=keyword_hit[columns["pair_keywords"]],
+                minlength=len(self.node_ids)
+            ), KEYWORD_WEIGHT)
+        return scores
+
+    def top_k(self, scores: np.ndarray, k: Optional[int] = None) -> List[Tuple[str, float]]:
+        """(node_id, score) above MIN_RELEVANCE, best first; ties keep insertion order."""
+        candidates = np.flatnonzero(scores > MIN_RELEVANCE)
+        if k is not None and len(candidates) > k:
+            # Partition on the k-th best score, keep everything tied with it
+            threshold = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+            candidates = candidates[scores[candidates] >= threshold]
+
+        order = np.lexsort((candidates, -scores[candidates]))
+        selected = candidates[order]
+        if k is not None:
+            selected = selected[:k]
+        return [(self.node_ids[row], float(scores[row])) for row in selected]
+
+    def search(self, concept: Union[str, NormalizedPrompt], k: Optional[int] = 10) -> List[Tuple[str, float]]:
+        return self.top_k(self.score(concept), k)
+
+    def search_batch(self, concepts: Sequence[Union[str, NormalizedPrompt]], k: Optional[int] = 10) -> List[List[Tuple[str, float]]]:
+        """Score many concepts in one pass: (queries x nodes) score matrix."""
+        n = len(self.node_ids)
+        chunk = max(1, BATCH_CELLS // max(n, 1))
+        if len(concepts) > chunk:
+            # Bound the score matrix for large graphs
+            return [hits for start in range(0, len(concepts), chunk)
+                    for hits in self.search_batch(concepts[start:start + chunk], k)]
+
+        columns = self._columns()
+        texts = [normalize_prompt(concept).lowered for concept in concepts]
+
+        concept_hits = np.array([[c in t for c in self._concepts.items] for t in texts],
+                                dtype=np.float64).reshape(len(texts), len(self._concepts))
+        category_hits = np.array(
+            [[sum(kw in t for kw in CATEGORY_KEYWORDS.get(cat, ())) for cat in self._categories.items]
+             for t in texts],
+            dtype=np.float64
+        ).reshape(len(texts), len(self._categories))
+        keyword_hits = np.array([[kw in t for kw in self._keywords.items] for t in texts],
+                                dtype=np.float64).reshape(len(texts), len(self._keywords))
+
+        scores = np.zeros((len(texts), n), dtype=np.float64)
+        if len(self._concepts):
+            scores += CONCEPT_WEIGHT * concept_hits[:, columns["concept"]]
+        if len(self._categories):
+            _accumulate(scores, category_hits[:, columns["category"]], CATEGORY_WEIGHT)
+        if len(columns["pair_rows"]):
+            # Flattened bincount: one call for all queries
+            pair_weights = keyword_hits[:, columns["pair_keywords"]]
+            offsets = (np.arange(len(texts)) * n)[:, None]
+            _accumulate(scores, np.bincount(
+                (columns["pair_rows"][None, :] + offsets).ravel(),
+                weights=pair_weights.ravel(),
+                minlength=len(texts) * n
+            ).reshape(len(texts), n), KEYWORD_WEIGHT)
+
+        return [self.top_k(row, k) for row in scores]
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
@@ -0,0 +1,507 @@
+"""
+AUTARK Shared Knowledge Graph
+=============================
+
+Read-only knowledge graph that many processes map from one snapshot file
+instead of each building (and holding) its own copy.
+
+One process publishes the graph with publish_snapshot(). The snapshot
+holds every node as a JSON record plus the relevance-scoring columns and an
+id index as flat arrays. Workers open it with SharedKnowledgeGraph, which
+mmaps the file: arrays are used in place, node records are decoded only
+when a query returns them, and the page cache holds one copy for all
+workers.
+
+Publishing is a generation swap. Each snapshot is written to a new
+`graph-<generation>.kgs` file (temporary name, fsync, rename), then the
+CURRENT pointer file is replaced atomically. Workers notice the new
+generation on their next query and remap by swapping a single reference;
+a query that is already running keeps the generation it started with.
+Processes still using an older file keep a valid mapping even after it has
+been removed.
+"""
+
+import asyncio
+import bisect
+import copy
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Any, FrozenSet, Iterator, Optional, Tuple
+
+import numpy as np
+
+from ..core.offload import get_cpu_executor
+from .graph import KnowledgeGraph, KnowledgeNode
+from .scoring import ColumnarScorer
+from .wal import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AKGS0001"
+PREFIX = struct.Struct("<8sQ")  # magic, header length
+POINTER_FILE = "CURRENT"
+ALIGNMENT = 8
+
+
+def _snapshot_name(generation: int) -> str:
+    return f"graph-{generation:06d}.kgs"
+
+
+def read_pointer(directory: str) -> Optional[Dict[str, Any]]:
+    """Current generation and file of a snapshot directory, or None if nothing is published."""
+    try:
+        return json.loads((Path(directory) / POINTER_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def publish_snapshot(graph: KnowledgeGraph, directory: str, keep: int = 2) -> Dict[str, Any]:
+    """
+    Write `graph` as the next snapshot generation in `directory` and make it current.
+
+    Only the newest `keep` snapshot files are kept on disk.
+    """
+    start = time.perf_counter()
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    generation = (read_pointer(directory) or {}).get("generation", 0) + 1
+
+    # Read the source graph under its lock so a concurrent add_nodes cannot
+    # change it halfway through; the file itself is written without it
+    with graph._lock:
+        node_list = list(graph.nodes.values())
+        ids = [node.id for node in node_list]
+        records = [json.dumps(asdict(node), ensure_ascii=False).encode("utf-8") for node in node_list]
+        vocabularies, columns = ColumnarScorer(node_list).export()
+        rows = {node_id: row for row, node_id in enumerate(ids)}
+        reverse = [
+            sorted(rows[source] for source in graph.reverse_neighbors(node_id) if source in rows)
+            for node_id in ids
+        ]
+        statistics = {
+            **{key: value for key, value in graph.get_statistics().items()
+               if key in ("total_relationships", "category_counts", "degree_histogram")},
+            "categories": sorted(graph.categories),
+            "structure": graph.get_structure_statistics(),
+        }
+    encoded_ids = [node_id.encode("utf-8") for node_id in ids]
+
+    arrays = {
+        "record_offsets": np.cumsum([0] + [len(r) for r in records], dtype=np.int64),
+        "id_offsets": np.cumsum([0] + [len(i) for i in encoded_ids], dtype=np.int64),
+        "id_order": np.array(sorted(range(len(ids)), key=ids.__getitem__), dtype=np.int64),
+        # Reverse adjacency in CSR form: sources of row r are reverse_rows[offsets[r]:offsets[r + 1]]
+        "reverse_offsets": np.cumsum([0] + [len(sources) for sources in reverse], dtype=np.int64),
+        "reverse_rows": np.fromiter((r for sources in reverse for r in sources), dtype=np.int64),
+        **{f"column_{name}": array for name, array in columns.items()},
+    }
+    blobs = {"records": b"".join(records), "ids": b"".join(encoded_ids)}
+
+    # Lay out sections after the header, each 8-byte aligned
+    sections = {}
+    offset = 0
+    for name, payload in list(arrays.items()) + list(blobs.items()):
+        offset += -offset % ALIGNMENT
+        is_array = name in arrays
+        sections[name] = {
+            "offset": offset,
+            "dtype": payload.dtype.str if is_array else None,
+            "count": len(payload),
+            "nbytes": payload.nbytes if is_array else len(payload),
+        }
+        offset += sections[name]["nbytes"]
+
+    header = {
+        "generation": generation,
+        "created": time.time(),
+        "node_count": len(ids),
+        "statistics": statistics,
+        "vocabularies": vocabularies,
+        "sections": sections,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = PREFIX.size + len(header_bytes)
+    data_start += -data_start % ALIGNMENT
+
+    final_path = directory / _snapshot_name(generation)
+    tmp_path = directory / f".{final_path.name}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(PREFIX.pack(MAGIC, len(header_bytes)))
+            f.write(header_bytes)
+            for name, payload in list(arrays.items()) + list(blobs.items()):
+                f.seek(data_start + sections[name]["offset"])
+                f.write(payload.tobytes() if name in arrays else payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    atomic_write_json(directory / POINTER_FILE, {"generation": generation, "file": final_path.name})
+
+    # Readers that still map an older file keep it alive until they remap
+    for old in sorted(directory.glob("graph-*.kgs"))[:-keep]:
+        old.unlink(missing_ok=True)
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"📤 Published knowledge snapshot generation {generation} ({len(ids)} nodes, {elapsed:.2f}s)")
+    return {"generation": generation, "path": str(final_path), "nodes": len(ids), "seconds": elapsed}
+
+
+class _Snapshot:
+    """One mapped snapshot file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_length = PREFIX.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a knowledge snapshot: {path}")
+        self.header = json.loads(self._map[PREFIX.size:PREFIX.size + header_length])
+        data_start = PREFIX.size + header_length
+        self._data_start = data_start + (-data_start % ALIGNMENT)
+
+        self.generation = self.header["generation"]
+        self.node_count = self.header["node_count"]
+        self.record_offsets = self._array("record_offsets")
+        self.id_offsets = self._array("id_offsets")
+        self.id_order = self._array("id_order")
+        self.reverse_offsets = self._array("reverse_offsets")
+        self.reverse_rows = self._array("reverse_rows")
+        self.ids = _IdSequence(self)
+
+    def _section(self, name: str) -> Dict[str, Any]:
+        return self.header["sections"][name]
+
+    def _array(self, name: str) -> np.ndarray:
+        """Zero-copy view of an array section."""
+        section = self._section(name)
+        return np.frombuffer(self._map, dtype=np.dtype(section["dtype"]), count=section["count"],
+                             offset=self._data_start + section["offset"])
+
+    def _blob_slice(self, name: str, start: int, end: int) -> bytes:
+        base = self._data_start + self._section(name)["offset"]
+        return self._map[base + start:base + end]
+
+    def node_id(self, row: int) -> str:
+        return self._blob_slice("ids", int(self.id_offsets[row]), int(self.id_offsets[row + 1])).decode("utf-8")
+
+    def node(self, row: int) -> KnowledgeNode:
+        record = self._blob_slice("records", int(self.record_offsets[row]), int(self.record_offsets[row + 1]))
+        return KnowledgeNode(**json.loads(record))
+
+    def row_of(self, node_id: str) -> Optional[int]:
+        """Binary search over the sorted id order."""
+        index = bisect.bisect_left(_SortedIds(self), node_id)
+        if index < self.node_count:
+            row = int(self.id_order[index])
+            if self.node_id(row) == node_id:
+                return row
+        return None
+
+    def reverse_sources(self, row: int) -> List[str]:
+        start, end = int(self.reverse_offsets[row]), int(self.reverse_offsets[row + 1])
+        return [self.node_id(int(source)) for source in self.reverse_rows[start:end]]
+
+    def scorer(self) -> ColumnarScorer:
+        columns = {
+            name[len("column_"):]: self._array(name)
+            for name in self.header["sections"] if name.startswith("column_")
+        }
+        return ColumnarScorer.from_columns(self.ids, self.header["vocabularies"], columns)
+
+
+class _IdSequence(Sequence):
+    """Node ids in row order, decoded on access."""
+
+    def __init__(self, snapshot: _Snapshot):
+        self._snapshot = snapshot
+
+    def __len__(self) -> int:
+        return self._snapshot.node_count
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self._snapshot.node_id(i) for i in range(*row.indices(len(self)))]
+        return self._snapshot.node_id(int(row))
+
+
+class _SortedIds(_IdSequence):
+    """Node ids in sorted order (for bisect)."""
+
+    def __getitem__(self, index):
+        return self._snapshot.node_id(int(self._snapshot.id_order[index]))
+
+
+class _SnapshotNodes(Mapping):
+    """Read-only id -> KnowledgeNode mapping that decodes nodes on access."""
+
+    def __init__(self, snapshot: _Snapshot):
+        self._snapshot = snapshot
+
+    def __getitem__(self, node_id: str) -> KnowledgeNode:
+        row = self._snapshot.row_of(node_id)
+        if row is None:
+            raise KeyError(node_id)
+        return self._snapshot.node(row)
+
+    def __contains__(self, node_id) -> bool:
+        return isinstance(node_id, str) and self._snapshot.row_of(node_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._snapshot.node_id(row) for row in range(self._snapshot.node_count))
+
+    def __len__(self) -> int:
+        return self._snapshot.node_count
+
+
+@dataclass(frozen=True)
+class _Generation:
+    """Everything a query reads from one snapshot, swapped as a single reference."""
+
+    snapshot: _Snapshot
+    nodes: _SnapshotNodes
+    categories: FrozenSet[str]
+    scorer: ColumnarScorer
+
+    @classmethod
+    def map(cls, path: Path) -> "_Generation":
+        snapshot = _Snapshot(path)
+        return cls(
+            snapshot=snapshot,
+            nodes=_SnapshotNodes(snapshot),
+            categories=frozenset(snapshot.header["statistics"]["categories"]),
+            scorer=snapshot.scorer()
+        )
+
+    @property
+    def version(self) -> int:
+        return self.snapshot.generation
+
+
+class SharedKnowledgeGraph(KnowledgeGraph):
+    """
+    Read-only KnowledgeGraph backed by the current published snapshot.
+
+    Supports the query side of KnowledgeGraph (get_context, get_contexts,
+    get_statistics); mutating methods raise TypeError. The pointer file is
+    checked at most every `check_interval` seconds and a new generation is
+    mapped on the next query.
+
+    A generation is swapped in by replacing one reference. Each query pins
+    the generation it started with, so nodes, scores and statistics within
+    one answer always come from the same snapshot.
+    """
+
+    def __init__(self, directory: str, check_interval: float = 1.0, query_cache_size: int = 256,
+                 executor: Any = None, process_batch_size: int = 64):
+        # Deliberately skips KnowledgeGraph.__init__: no core concepts are built here
+        self.directory = Path(directory)
+        self.base_path = self.directory
+        self.check_interval = check_interval
+        self.executor = executor
+        self.process_batch_size = process_batch_size
+        # Each query pins an immutable generation, so queries need no lock
+        self._lock = nullcontext()
+        self.retriever = None
+        self.store = None
+        self.relationships = {}
+        self.query_cache_size = query_cache_size
+        self._query_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._generation: Optional[_Generation] = None
+        self._pinned = threading.local()
+        self._last_check = 0.0
+
+        if not self.refresh(force=True):
+            raise FileNotFoundError(f"No knowledge snapshot published in {directory}")
+
+        logger.info(f"📚 Shared Knowledge Graph attached (generation {self.version}, {len(self.nodes)} nodes)")
+
+    def refresh(self, force: bool = False) -> bool:
+        """Map the current generation if it changed; returns True if a swap happened."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+
+        pointer = read_pointer(self.directory)
+        current = self._generation
+        if pointer is None or (current is not None and pointer["generation"] == current.version):
+            return False
+
+        generation = _Generation.map(self.directory / pointer["file"])
+        # The old mapping is released once no query references it any more
+        with self._cache_lock:
+            self._generation = generation
+            self._query_cache.clear()
+
+        logger.info(f"🔄 Knowledge snapshot generation {generation.version} mapped")
+        return True
+
+    def _current(self) -> _Generation:
+        """The generation pinned by the running query, else the latest one."""
+        return getattr(self._pinned, "generation", None) or self._generation
+
+    def _in_generation(self, generation: _Generation, func, *args):
+        """Call func(*args) with `generation` pinned for the calling thread."""
+        previous = getattr(self._pinned, "generation", None)
+        self._pinned.generation = generation
+        try:
+            return func(*args)
+        finally:
+            self._pinned.generation = previous
+
+    def _query(self, func, *args):
+        """Run a query on the pinned generation, pinning the latest one if none is."""
+        return self._in_generation(self._current(), func, *args)
+
+    # Query code of KnowledgeGraph reads these; they resolve to one generation per query
+    nodes = property(lambda self: self._current().nodes)
+    categories = property(lambda self: self._current().categories)
+    version = property(lambda self: self._current().version)
+
+    @property
+    def generation(self) -> int:
+        return self.version
+
+    async def get_context(self, concept: str) -> Dict[str, Any]:
+        self.refresh()
+        generation = self._generation
+        key = (self._normalize_concept(concept), generation.version)
+        context = self._cached_context(key, concept)
+        if context is not None:
+            logger.info(f"📊 Context served from cache ({context['knowledge_depth']} relevant concepts)")
+            return context
+        return await self._run_cpu(self._in_generation, generation, super().get_context_sync, concept)
+
+    def get_context_sync(self, concept: str) -> Dict[str, Any]:
+        return self._query(super().get_context_sync, concept)
+
+    def get_contexts_sync(self, concepts: List[str]) -> List[Dict[str, Any]]:
+        return self._query(super().get_contexts_sync, concepts)
+
+    async def get_contexts(self, concepts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Batch contexts; with a process-mode executor, large batches are split
+        across worker processes that attach to the same snapshot.
+        """
+        self.refresh()
+        generation = self._generation
+        executor = self.executor or get_cpu_executor()
+        if executor.mode != "process" or len(concepts) < self.process_batch_size:
+            return await self._run_cpu(self._in_generation, generation, super().get_contexts_sync, concepts)
+
+        chunk = -(-len(concepts) // executor.max_workers)
+        parts = await asyncio.gather(*(
+            executor.run(_contexts_in_worker, str(self.directory), concepts[i:i + chunk],
+                          generation.snapshot.path.name)
+            for i in range(0, len(concepts), chunk)
+        ))
+        return [context for part in parts for context in part]
+
+    def _store_context(self, key: Tuple[str, int], context: Dict[str, Any]):
+        with self._cache_lock:
+            self._cache_misses += 1
+            if key[1] == self._generation.version:  # no swap while computing
+                self._query_cache[key] = copy.deepcopy(context)
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+
+    def _get_scorer(self) -> ColumnarScorer:
+        return self._current().scorer
+
+    def neighbors(self, node_id: str) -> List[str]:
+        nodes = self._current().nodes
+        node = nodes.get(node_id)
+        if node is None:
+            return []
+        return [target for target in dict.fromkeys(node.relationships) if target in nodes]
+
+    def reverse_neighbors(self, node_id: str) -> FrozenSet[str]:
+        snapshot = self._current().snapshot
+        row = snapshot.row_of(node_id)
+        return frozenset(snapshot.reverse_sources(row)) if row is not None else frozenset()
+
+    def neighborhood(self, node_id: str, depth: int = 1) -> Dict[str, int]:
+        return self._query(super().neighborhood, node_id, depth)
+
+    def pending_edges(self) -> Dict[str, FrozenSet[str]]:
+        raise TypeError("Snapshots do not keep dangling edges; see get_structure_statistics()")
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("SharedKnowledgeGraph is read-only; mutate the source graph and publish a snapshot")
+
+    add_node = add_nodes = expand_knowledge = bulk_load = _read_only
+    load_knowledge_base = open_store = use_retriever = compact = _read_only
+
+    def get_structure_statistics(self, top_n: int = 10) -> Dict[str, Any]:
+        """Structure statistics computed when the snapshot was published."""
+        return self._current().snapshot.header["statistics"]["structure"]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        generation = self._current()
+        statistics = generation.snapshot.header["statistics"]
+        node_count = len(generation.nodes)
+        return {
+            "version": generation.version,
+            "generation": generation.version,
+            "snapshot": str(generation.snapshot.path),
+            "query_cache": {
+                "entries": len(self._query_cache),
+                "hits": self._cache_hits,
+                "misses": self._cache_misses
+            },
+            "total_nodes": node_count,
+            "total_relationships": statistics["total_relationships"],
+            "categories": statistics["categories"],
+            "category_counts": statistics["category_counts"],
+            # JSON object keys are strings
+            "degree_histogram": {int(degree): count for degree, count in statistics["degree_histogram"].items()},
+            "avg_connections_per_node": (
+                statistics["total_relationships"] / node_count if node_count else 0
+            )
+        }
+
+
+# Graphs attached by process-pool workers, one per snapshot directory
+_worker_graphs: Dict[str, SharedKnowledgeGraph] = {}
+
+
+def _contexts_in_worker(directory: str, concepts: List[str], snapshot_file: str) -> List[Dict[str, Any]]:
+    """
+    get_contexts_sync in a worker process (CPUExecutor process mode).
+
+    Runs on `snapshot_file`, the generation the calling query pinned, so all
+    chunks of one batch see the same snapshot; falls back to the latest one
+    if that file has already been removed.
+    """
+    graph = _worker_graphs.get(directory)
+    if graph is None:
+        graph = _worker_graphs[directory] = SharedKnowledgeGraph(directory, check_interval=0)
+    else:
+        graph.refresh()
+
+    generation = graph._generation
+    if generation.snapshot.path.name != snapshot_file:
+        try:
+            generation = _Generation.map(Path(directory) / snapshot_file)
+        except FileNotFoundError:
+            logger.warning(f"⚠️ Snapshot {snapshot_file} is gone; using generation {generation.version}")
+    return graph._in_generation(generation, graph.get_contexts_sync, concepts)
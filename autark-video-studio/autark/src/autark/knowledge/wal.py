@@ -0,0 +1,248 @@
+"""
+AUTARK Knowledge Store
+======================
+
+Durable persistence for a KnowledgeGraph: a JSON snapshot plus an
+append-only mutation log.
+
+Every add_node/add_nodes/expand_knowledge batch is appended to the log as
+JSON lines and fsynced, which costs a few hundred bytes instead of
+rewriting the whole graph. Once the log grows past a threshold it is
+compacted: the snapshot is rewritten atomically (temporary file, fsync,
+rename) and the log is truncated. Loading reads the snapshot and replays
+the log on top of it.
+
+Replaying an entry twice gives the same graph, so a crash between writing
+the snapshot and truncating the log loses nothing. A record torn by a crash
+during an append (the last line, without its newline) is cut off when the
+log is next read; an unreadable record anywhere else raises CorruptLogError
+and leaves the file as it is. A snapshot that exists but cannot be read
+raises CorruptSnapshotError: the store is not attached, so no compaction
+can overwrite it with a partial graph.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+from .graph import KnowledgeNode
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "knowledge_graph.json"
+LOG_FILE = "knowledge_graph.wal"
+
+
+def _fsync_directory(directory: Path):
+    """Make a rename in `directory` durable (no-op where unsupported)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = 2):
+    """Write JSON to `path` so readers see either the old or the new file, never a partial one."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    _fsync_directory(path.parent)
+
+
+class CorruptLogError(ValueError):
+    """A record in the middle of a mutation log cannot be read."""
+
+
+class CorruptSnapshotError(ValueError):
+    """The snapshot of a knowledge store exists but cannot be read."""
+
+
+class MutationLog:
+    """Append-only JSON-lines log of graph mutations."""
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = Path(path)
+        self.fsync = fsync
+        self.entries = 0
+        self._lock = threading.Lock()
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Append records as one write (and one fsync); returns how many."""
+        lines = [json.dumps(record, ensure_ascii=False) + "\n" for record in records]
+        if not lines:
+            return 0
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._cut_torn_tail()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self.entries += len(lines)
+        return len(lines)
+
+    def _cut_torn_tail(self):
+        """Drop a partial last record so new records start on a fresh line."""
+        if not self.path.exists():
+            return
+        with open(self.path, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            keep = f.read().rfind(b"\n") + 1
+            logger.warning(f"⚠️ Dropping torn record at byte {keep} of {self.path}")
+            f.truncate(keep)
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield logged records in order.
+
+        A last record without its newline was torn by a crash during an
+        append and is cut off. Any other unreadable record means the log is
+        corrupt: CorruptLogError is raised and the file is left untouched,
+        so the records after it are not lost.
+        """
+        if not self.path.exists():
+            return
+
+        good_offset = 0
+        count = 0
+        with open(self.path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Only the last line can lack its newline
+                    logger.warning(f"⚠️ Dropping torn record at byte {good_offset} of {self.path}")
+                    break
+                try:
+                    record = json.loads(raw)
+                except ValueError as e:
+                    raise CorruptLogError(
+                        f"{self.path}: unreadable record at byte {good_offset} ({e}); "
+                        f"repair or move the file aside to start from the snapshot"
+                    ) from e
+                good_offset += len(raw)
+                count += 1
+                yield record
+
+        if good_offset < self.path.stat().st_size:
+            with self._lock, open(self.path, "r+b") as f:
+                f.truncate(good_offset)
+        self.entries = count
+
+    def truncate(self):
+        with self._lock:
+            with open(self.path, "w", encoding="utf-8") as f:
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self.entries = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self.path.stat().st_size if self.path.exists() else 0
+
+
+class KnowledgeStore:
+    """
+    Snapshot + mutation log for one knowledge graph directory.
+
+    Attach with KnowledgeGraph.open_store(); the graph then logs its own
+    mutations and compacts when `compact_threshold` log entries pile up.
+    """
+
+    def __init__(self, directory: str, compact_threshold: int = 10000, fsync: bool = True):
+        self.directory = Path(directory)
+        self.snapshot_path = self.directory / SNAPSHOT_FILE
+        self.log = MutationLog(self.directory / LOG_FILE, fsync=fsync)
+        self.compact_threshold = compact_threshold
+        self.compactions = 0
+        self._suspended = 0
+
+    def load(self, graph) -> Dict[str, Any]:
+        """
+        Load the snapshot into `graph` and replay the log on top of it.
+
+        Raises CorruptSnapshotError (and leaves the file untouched) if the
+        snapshot exists but cannot be read.
+        """
+        if self.snapshot_path.exists():
+            try:
+                graph.load_knowledge_base(self.snapshot_path, strict=True)
+            except Exception as e:
+                raise CorruptSnapshotError(
+                    f"{self.snapshot_path}: unreadable snapshot ({e}); "
+                    f"restore it or move it aside to start from the log alone"
+                ) from e
+
+        nodes = [
+            KnowledgeNode(**record["node"])
+            for record in self.log.replay()
+            if record.get("op") == "add_node"
+        ]
+        if nodes:
+            graph.add_nodes(nodes)
+
+        logger.info(f"📚 Knowledge store loaded: snapshot + {len(nodes)} logged mutations")
+        return {"snapshot": self.snapshot_path.exists(), "replayed": len(nodes)}
+
+    def log_nodes(self, nodes: Iterable[Any]) -> int:
+        return self.log.append({"op": "add_node", "node": asdict(node)} for node in nodes)
+
+    @property
+    def needs_compaction(self) -> bool:
+        return not self._suspended and self.log.entries >= self.compact_threshold
+
+    @contextmanager
+    def compaction_suspended(self):
+        """
+        Keep logging but do not compact inside this block (bulk imports):
+        the caller compacts once at the end instead of rewriting the
+        growing snapshot every `compact_threshold` entries.
+        """
+        self._suspended += 1
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+
+    def compact(self, graph):
+        """Fold the log into a fresh snapshot."""
+        # No mutation may be logged between the snapshot and the truncation
+        with getattr(graph, "_lock", nullcontext()):
+            graph.save_knowledge_base(self.snapshot_path)
+            self.log.truncate()
+        self.compactions += 1
+        logger.info(f"🗜️ Knowledge store compacted into {self.snapshot_path}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "log_entries": self.log.entries,
+            "log_bytes": self.log.size_bytes,
+            "snapshot_bytes": self.snapshot_path.stat().st_size if self.snapshot_path.exists() else 0,
+            "compactions": self.compactions,
+        }
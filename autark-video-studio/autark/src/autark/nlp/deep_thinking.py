@@ -9,12 +9,20 @@ Provides 'deep thinking' capabilities for unique video content generation.
 import logging
 import asyncio
 import re
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple, Iterator, Union
+from dataclasses import dataclass, asdict
+from collections import OrderedDict
+from collections.abc import ItemsView, Mapping, ValuesView
+import copy
+import hashlib
+import json
+import threading
 import time
 import random
 from pathlib import Path
 
+from .normalize import NormalizedPrompt, normalize_prompt, split_sentences
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,6 +38,100 @@ class ThinkingContext:
     narrative_structure: str = "three_act"
     emotional_tone: str = "balanced"
     target_audience: str = "general"
+    seed: Optional[int] = None
+    
+    def cache_key(self) -> str:
+        """Stable key over everything that influences the thinking result."""
+        payload = json.dumps(asdict(self), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FrozenDict(dict):
+    """Read-only dict that can be shared between scenes (still JSON-serialisable)."""
+    
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenDict is read-only")
+    
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+    
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+    
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+
+class LazyScenes(Mapping):
+    """
+    Scenes of a scene breakdown (scene id -> scene), generated while iterating.
+    
+    Nothing is stored per scene: items()/values() stream from
+    DeepThinkingEngine.iter_scenes and every lookup builds fresh scene dicts,
+    so the mapping is read-only and shared by copies. Pickling produces a
+    plain dict; for JSON pass `default=dict`.
+    """
+    
+    def __init__(self, engine: "DeepThinkingEngine", narrative_structure: Dict,
+                 context: "ThinkingContext", variation: Optional[int] = None):
+        self._engine = engine
+        self._structure = {"sections": copy.deepcopy(narrative_structure["sections"])}
+        self._context = copy.copy(context)
+        self._variation = variation
+        self._count = sum(engine._scenes_per_section(self._structure, self._context).values())
+    
+    def _iter_items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return self._engine.iter_scenes(self._structure, self._context, self._variation)
+    
+    def __getitem__(self, scene_id: str) -> Dict[str, Any]:
+        for candidate, scene in self._iter_items():
+            if candidate == scene_id:
+                return scene
+        raise KeyError(scene_id)
+    
+    def __iter__(self) -> Iterator[str]:
+        return (scene_id for scene_id, _ in self._iter_items())
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def items(self) -> ItemsView:
+        return _StreamedItems(self)
+    
+    def values(self) -> ValuesView:
+        return _StreamedValues(self)
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+    
+    def __reduce__(self):
+        return (dict, (list(self._iter_items()),))
+    
+    def __repr__(self) -> str:
+        return f"LazyScenes({self._count} scenes)"
+
+
+class _StreamedItems(ItemsView):
+    def __iter__(self):
+        return self._mapping._iter_items()
+
+
+class _StreamedValues(ValuesView):
+    def __iter__(self):
+        return (scene for _, scene in self._mapping._iter_items())
+
+
+# Shared scene technical requirements, keyed by their distinct values
+_TECH_REQUIREMENTS: Dict[Tuple[str, str, str], FrozenDict] = {}
 
 
 class SemanticAnalyzer:
@@ -59,8 +161,8 @@ class SemanticAnalyzer:
             ]
         }
     
-    def analyze_concept(self, text: str) -> Dict[str, Any]:
-        """Perform deep semantic analysis of the input concept."""
+    def analyze_concept(self, text: Union[str, NormalizedPrompt]) -> Dict[str, Any]:
+        """Perform deep semantic analysis of the input concept (text or NormalizedPrompt)."""
         
         analysis = {
             "primary_themes": [],
@@ -70,7 +172,8 @@ class SemanticAnalyzer:
             "narrative_potential": 0.0
         }
         
-        text_lower = text.lower()
+        prompt = normalize_prompt(text)
+        text_lower = prompt.lowered
         
         # Analyze semantic categories
         for category, patterns in self.concept_patterns.items():
@@ -90,8 +193,8 @@ class SemanticAnalyzer:
                 }
         
         # Calculate complexity score
-        word_count = len(text.split())
-        unique_words = len(set(text.lower().split()))
+        word_count = len(prompt.tokens)
+        unique_words = len(prompt.unique_tokens)
         complexity = (unique_words / word_count) if word_count > 0 else 0
         analysis["complexity_score"] = complexity
         
@@ -117,6 +220,7 @@ class CreativeEnhancer:
     
     def __init__(self, creativity_level: float = 0.8):
         self.creativity_level = creativity_level
+        self.analyzer = SemanticAnalyzer()
         self.enhancement_templates = {
             "narrative": [
                 "Transform into an epic journey where {concept}",
@@ -148,12 +252,29 @@ class CreativeEnhancer:
             "minimalist": "with clean, simple visuals and elegant presentation"
         }
     
-    def enhance_concept(self, concept: str, context: ThinkingContext) -> Dict[str, Any]:
-        """Apply creative enhancement to the base concept."""
+    def enhance_concept(
+        self,
+        concept: Union[str, NormalizedPrompt],
+        context: ThinkingContext,
+        rng: Optional[random.Random] = None,
+        semantic_analysis: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply creative enhancement to the base concept.
+        
+        All random choices come from `rng`; by default a generator seeded with
+        `context.seed` (unseeded if that is None). Pass `semantic_analysis`
+        if the caller already analysed the concept.
+        """
+        if rng is None:
+            rng = random.Random(context.seed)
+        
+        prompt = normalize_prompt(concept)
+        concept = prompt.text
         
         # Perform semantic analysis first
-        analyzer = SemanticAnalyzer()
-        semantic_analysis = analyzer.analyze_concept(concept)
+        if semantic_analysis is None:
+            semantic_analysis = self.analyzer.analyze_concept(prompt)
         
         # Choose enhancement strategy based on primary themes
         primary_theme = (semantic_analysis["primary_themes"][0] 
@@ -163,7 +284,7 @@ class CreativeEnhancer:
         # Select enhancement template
         templates = self.enhancement_templates.get(primary_theme, 
                                                   self.enhancement_templates["narrative"])
-        base_template = random.choice(templates)
+        base_template = rng.choice(templates)
         
         # Apply style modifiers
         style_modifier = self.style_modifiers.get(context.style_preference, "")
@@ -177,7 +298,7 @@ class CreativeEnhancer:
         
         # Add creativity boost if high creativity level
         if self.creativity_level > 0.7:
-            enhanced_concept = self._apply_creativity_boost(enhanced_concept, context)
+            enhanced_concept = self._apply_creativity_boost(enhanced_concept, context, rng)
         
         return {
             "original": concept,
@@ -188,8 +309,15 @@ class CreativeEnhancer:
             "style_integration": context.style_preference
         }
     
-    def _apply_creativity_boost(self, concept: str, context: ThinkingContext) -> str:
+    def _apply_creativity_boost(
+        self,
+        concept: str,
+        context: ThinkingContext,
+        rng: Optional[random.Random] = None
+    ) -> str:
         """Apply additional creative elements for high creativity settings."""
+        if rng is None:
+            rng = random.Random(context.seed)
         
         creative_elements = [
             "with unexpected plot twists",
@@ -201,8 +329,8 @@ class CreativeEnhancer:
             "featuring symbolic imagery"
         ]
         
-        if random.random() < context.creativity_level:
-            boost = random.choice(creative_elements)
+        if rng.random() < context.creativity_level:
+            boost = rng.choice(creative_elements)
             return f"{concept} {boost}"
         
         return concept
@@ -211,6 +339,20 @@ class CreativeEnhancer:
 class NarrativeStructurer:
     """Creates narrative structure for extended content."""
     
+    SKELETON_CACHE_SIZE = 512
+    
+    GUIDANCE_TEMPLATES = {
+        "setup": "Introduce the world and context of {concept}",
+        "confrontation": "Explore the complexity and challenges of {concept}",
+        "resolution": "Conclude with insights and resolution about {concept}",
+        "introduction": "Set the stage for understanding {concept}",
+        "inciting_incident": "Present the key question or challenge about {concept}",
+        "transformation": "Deep dive into the evolution and impact of {concept}",
+        "problem_identification": "Clearly define the problem related to {concept}",
+        "solution_development": "Explore various approaches to {concept}",
+        "solution_presentation": "Present the final understanding of {concept}"
+    }
+    
     def __init__(self):
         self.structure_templates = {
             "three_act": {
@@ -230,54 +372,68 @@ class NarrativeStructurer:
                 "solution": {"duration": 0.30, "purpose": "solution_presentation"}
             }
         }
+        self._skeleton_cache = OrderedDict()  # LRU
+    
+    def get_skeleton(self, duration: float, structure_type: str = "three_act") -> Tuple[Tuple[str, float, float, str], ...]:
+        """
+        Section timings as (name, start_time, duration, purpose) tuples.
+        
+        The skeleton only depends on structure type and duration, so it is
+        computed once per pair and shared. Call clear_cache() after editing
+        structure_templates.
+        """
+        key = (structure_type, duration)
+        skeleton = self._skeleton_cache.get(key)
+        
+        if skeleton is not None:
+            self._skeleton_cache.move_to_end(key)
+        else:
+            template = self.structure_templates.get(structure_type, 
+                                                   self.structure_templates["three_act"])
+            sections = []
+            current_time = 0.0
+            
+            for section_name, section_data in template.items():
+                section_duration = duration * section_data["duration"]
+                sections.append(
+                    (section_name, current_time, section_duration, section_data["purpose"])
+                )
+                current_time += section_duration
+            
+            skeleton = self._skeleton_cache[key] = tuple(sections)
+            if len(self._skeleton_cache) > self.SKELETON_CACHE_SIZE:
+                self._skeleton_cache.popitem(last=False)  # least recently used
+        
+        return skeleton
+    
+    def clear_cache(self):
+        """Drop memoized skeletons."""
+        self._skeleton_cache.clear()
     
     def create_structure(self, concept: str, duration: float, structure_type: str = "three_act") -> Dict[str, Any]:
         """Create detailed narrative structure for the video."""
         
-        template = self.structure_templates.get(structure_type, 
-                                               self.structure_templates["three_act"])
-        
         structured_content = {
             "total_duration": duration,
             "structure_type": structure_type,
             "sections": {}
         }
         
-        current_time = 0.0
-        
-        for section_name, section_data in template.items():
-            section_duration = duration * section_data["duration"]
-            
+        for section_name, start_time, section_duration, purpose in self.get_skeleton(duration, structure_type):
             structured_content["sections"][section_name] = {
-                "start_time": current_time,
+                "start_time": start_time,
                 "duration": section_duration,
-                "end_time": current_time + section_duration,
-                "purpose": section_data["purpose"],
-                "content_guidance": self._generate_section_guidance(
-                    concept, section_data["purpose"]
-                )
+                "end_time": start_time + section_duration,
+                "purpose": purpose,
+                "content_guidance": self._generate_section_guidance(concept, purpose)
             }
-            
-            current_time += section_duration
         
         return structured_content
     
     def _generate_section_guidance(self, concept: str, purpose: str) -> str:
         """Generate content guidance for each section."""
-        
-        guidance_templates = {
-            "setup": f"Introduce the world and context of {concept}",
-            "confrontation": f"Explore the complexity and challenges of {concept}",
-            "resolution": f"Conclude with insights and resolution about {concept}",
-            "introduction": f"Set the stage for understanding {concept}",
-            "inciting_incident": f"Present the key question or challenge about {concept}",
-            "transformation": f"Deep dive into the evolution and impact of {concept}",
-            "problem_identification": f"Clearly define the problem related to {concept}",
-            "solution_development": f"Explore various approaches to {concept}",
-            "solution_presentation": f"Present the final understanding of {concept}"
-        }
-        
-        return guidance_templates.get(purpose, f"Develop content related to {concept}")
+        template = self.GUIDANCE_TEMPLATES.get(purpose, "Develop content related to {concept}")
+        return template.format(concept=concept)
 
 
 class DeepThinkingEngine:
@@ -286,13 +442,30 @@ class DeepThinkingEngine:
     
     Combines semantic analysis, creative enhancement, and narrative structuring
     to produce rich, unique content concepts for video generation.
+    
+    Engines are deterministic by default (as is StudioConfig.deterministic_thinking):
+    every request gets its own RNG seeded from the prompt and settings, so
+    equal inputs give equal results, in any process, and are memoized. Pass
+    deterministic=False for fresh random choices on every call.
     """
     
-    def __init__(self, creativity_level: float = 0.8):
+    def __init__(
+        self,
+        creativity_level: float = 0.8,
+        deterministic: bool = True,
+        cache_size: int = 256,
+        executor: Any = None
+    ):
         self.creativity_level = creativity_level
+        self.deterministic = deterministic
+        self.cache_size = cache_size
+        # CPU executor for the async API (core.offload.CPUExecutor; shared thread pool if None)
+        self.executor = executor
+        self._cache_lock = threading.Lock()
         self.semantic_analyzer = SemanticAnalyzer()
         self.creative_enhancer = CreativeEnhancer(creativity_level)
         self.narrative_structurer = NarrativeStructurer()
+        self._result_cache = OrderedDict()
         
         logger.info(f"🧠 Deep Thinking Engine initialized (creativity: {creativity_level})")
     
@@ -302,6 +475,35 @@ class DeepThinkingEngine:
         style: str = "cinematic",
         duration: float = 5.0,
         structure: str = "three_act",
+        seed: Optional[int] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Apply deep thinking without blocking the event loop.
+        
+        Same arguments and result as enhance_concept_sync, which runs on the
+        engine's CPU executor (in a process pool, on a per-process engine
+        with the same settings).
+        """
+        from ..core.offload import get_cpu_executor
+        
+        executor = self.executor or get_cpu_executor()
+        if executor.mode == "process":
+            settings = (self.creativity_level, self.deterministic, self.cache_size)
+            return await executor.run(
+                _enhance_in_worker, settings, concept, style, duration, structure, seed, kwargs
+            )
+        return await executor.run(
+            self.enhance_concept_sync, concept, style, duration, structure, seed, **kwargs
+        )
+    
+    def enhance_concept_sync(
+        self, 
+        concept: str, 
+        style: str = "cinematic",
+        duration: float = 5.0,
+        structure: str = "three_act",
+        seed: Optional[int] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -312,6 +514,8 @@ class DeepThinkingEngine:
             style: Visual style preference
             duration: Target video duration in minutes
             structure: Narrative structure type
+            seed: Explicit RNG seed; pass a different one for variety. If
+                omitted, deterministic engines derive it from the inputs.
             **kwargs: Additional parameters
             
         Returns:
@@ -333,13 +537,35 @@ class DeepThinkingEngine:
             target_audience=kwargs.get("target_audience", "general")
         )
         
-        # Step 1: Semantic Analysis
+        # Scenes vary with an explicit seed only: a derived one changes with
+        # every edit of the prompt and would make every scene look changed
+        variation = seed
+        if seed is None and self.deterministic:
+            seed = int(context.cache_key()[:16], 16)
+        context.seed = seed
+        
+        # Seeded results are a pure function of the context
+        cache_key = context.cache_key() if seed is not None else None
+        with self._cache_lock:
+            cached = self._result_cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                self._result_cache.move_to_end(cache_key)
+        if cached is not None:
+            logger.info("⚡ Deep thinking result served from cache")
+            result = copy.deepcopy(cached)
+            result["processing_metrics"]["cache_hit"] = True
+            return result
+        
+        # Step 1: Semantic Analysis (on the prompt tokenised once)
         logger.info("🔍 Performing semantic analysis...")
-        semantic_analysis = self.semantic_analyzer.analyze_concept(concept)
+        prompt = normalize_prompt(concept)
+        semantic_analysis = self.semantic_analyzer.analyze_concept(prompt)
         
         # Step 2: Creative Enhancement
         logger.info("✨ Applying creative enhancement...")
-        enhanced_result = self.creative_enhancer.enhance_concept(concept, context)
+        enhanced_result = self.creative_enhancer.enhance_concept(
+            prompt, context, random.Random(seed), semantic_analysis=semantic_analysis
+        )
         
         # Step 3: Narrative Structuring
         logger.info("📝 Creating narrative structure...")
@@ -348,8 +574,8 @@ class DeepThinkingEngine:
         )
         
         # Step 4: Generate detailed scene breakdown
-        scene_breakdown = await self._generate_scene_breakdown(
-            enhanced_result, narrative_structure, context
+        scene_breakdown = self._generate_scene_breakdown(
+            enhanced_result, narrative_structure, context, variation
         )
         
         # Step 5: Create technical specifications
@@ -358,7 +584,7 @@ class DeepThinkingEngine:
         processing_time = time.time() - start_time
         logger.info(f"✅ Deep thinking completed in {processing_time:.2f}s")
         
-        return {
+        result = {
             "original_concept": concept,
             "enhanced_concept": enhanced_result["enhanced"],
             "semantic_analysis": semantic_analysis,
@@ -371,49 +597,124 @@ class DeepThinkingEngine:
                 "processing_time": processing_time,
                 "creativity_score": self.creativity_level,
                 "complexity_rating": semantic_analysis["complexity_score"],
-                "uniqueness_potential": self._calculate_uniqueness(enhanced_result)
-            }
+                "uniqueness_potential": self._calculate_uniqueness(enhanced_result),
+                "cache_hit": False
+            },
+            "cache_key": cache_key
         }
+        
+        if cache_key is not None:
+            with self._cache_lock:
+                self._result_cache[cache_key] = copy.deepcopy(result)
+                if len(self._result_cache) > self.cache_size:
+                    self._result_cache.popitem(last=False)
+        
+        return result
     
-    async def _generate_scene_breakdown(
+    def _generate_scene_breakdown(
         self, 
         enhanced_result: Dict, 
         narrative_structure: Dict, 
-        context: ThinkingContext
+        context: ThinkingContext,
+        variation: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Generate detailed scene-by-scene breakdown."""
+        """Generate detailed scene-by-scene breakdown (scenes are generated on iteration)."""
         
-        scenes = {}
-        scene_count = max(3, int(context.target_duration * 2))  # ~2 scenes per minute
+        scenes = LazyScenes(self, narrative_structure, context, variation)
         
-        for i, (section_name, section_data) in enumerate(narrative_structure["sections"].items()):
-            scenes_in_section = max(1, int(scene_count * section_data["duration"] / context.target_duration))
+        return {
+            "total_scenes": len(scenes),
+            "average_scene_duration": context.target_duration / len(scenes),
+            "scenes": scenes
+        }
+    
+    def iter_scenes(
+        self,
+        narrative_structure: Dict,
+        context: ThinkingContext,
+        variation: Optional[int] = None
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Lazily yield (scene_id, scene) pairs of the scene breakdown.
+        
+        Every scene is described from its own beat (the sentences of the
+        original prompt that fall on it), its section's purpose and the style,
+        with creative choices drawn from an RNG seeded by exactly those inputs
+        (and `variation`, an explicit seed). Editing one sentence of the
+        prompt therefore changes only the scenes that carry it, which is what
+        incremental re-rendering diffs on. The technical requirements object
+        is shared by all scenes.
+        """
+        tech_requirements = self._get_scene_tech_requirements(context)
+        
+        sections = narrative_structure["sections"]
+        scenes_per_section = self._scenes_per_section(narrative_structure, context)
+        total_scenes = sum(scenes_per_section.values())
+        sentences = split_sentences(context.original_concept)
+        scene_number = 0
+        
+        for section_name, section_data in sections.items():
+            scenes_in_section = scenes_per_section[section_name]
+            scene_duration = section_data["duration"] / scenes_in_section
+            purpose = section_data["purpose"]
+            
+            audio_notes = self._generate_audio_notes(purpose, context.emotional_tone)
             
             for scene_idx in range(scenes_in_section):
-                scene_id = f"{section_name}_scene_{scene_idx + 1}"
-                scene_start = (section_data["start_time"] + 
-                             (scene_idx * section_data["duration"] / scenes_in_section))
-                scene_duration = section_data["duration"] / scenes_in_section
+                beat = self._scene_beat(sentences, scene_number, total_scenes)
+                scene_number += 1
                 
-                scenes[scene_id] = {
-                    "start_time": scene_start,
+                yield f"{section_name}_scene_{scene_idx + 1}", {
+                    "start_time": section_data["start_time"] + scene_idx * scene_duration,
                     "duration": scene_duration,
                     "section": section_name,
-                    "visual_description": self._generate_visual_description(
-                        section_data["content_guidance"], context.style_preference
-                    ),
-                    "audio_notes": self._generate_audio_notes(
-                        section_data["purpose"], context.emotional_tone
+                    "beat": beat,
+                    "visual_description": self._generate_scene_description(
+                        beat, purpose, context, variation
                     ),
-                    "technical_requirements": self._get_scene_tech_requirements(context)
+                    "audio_notes": audio_notes,
+                    "technical_requirements": tech_requirements
                 }
-        
+    
+    @staticmethod
+    def _scenes_per_section(narrative_structure: Dict, context: ThinkingContext) -> Dict[str, int]:
+        scene_count = max(3, int(context.target_duration * 2))  # ~2 scenes per minute
         return {
-            "total_scenes": len(scenes),
-            "average_scene_duration": context.target_duration / len(scenes),
-            "scenes": scenes
+            name: max(1, int(scene_count * data["duration"] / context.target_duration))
+            for name, data in narrative_structure["sections"].items()
         }
     
+    @staticmethod
+    def _scene_beat(sentences: List[str], index: int, total: int) -> str:
+        """Sentences of the prompt for scene `index` of `total` (spread evenly, in order)."""
+        if not sentences:
+            return ""
+        start = index * len(sentences) // total
+        end = max(start + 1, (index + 1) * len(sentences) // total)
+        return " ".join(sentences[start:end])
+    
+    def _generate_scene_description(
+        self,
+        beat: str,
+        purpose: str,
+        context: ThinkingContext,
+        variation: Optional[int] = None
+    ) -> str:
+        """Visual description of one scene, a pure function of the scene's own inputs."""
+        template = NarrativeStructurer.GUIDANCE_TEMPLATES.get(
+            purpose, "Develop content related to {concept}"
+        )
+        description = self._generate_visual_description(
+            template.format(concept=beat), context.style_preference
+        )
+        
+        payload = json.dumps(
+            [beat, purpose, context.style_preference, context.creativity_level, variation],
+            ensure_ascii=False
+        )
+        rng = random.Random(int(hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16], 16))
+        return self.creative_enhancer._apply_creativity_boost(description, context, rng)
+    
     def _generate_visual_description(self, guidance: str, style: str) -> str:
         """Generate visual description for a scene."""
         style_descriptors = {
@@ -443,14 +744,24 @@ class DeepThinkingEngine:
         return f"{base_audio} {tone_modifier}"
     
     def _get_scene_tech_requirements(self, context: ThinkingContext) -> Dict[str, Any]:
-        """Determine technical requirements for scene generation."""
-        return {
-            "resolution": "4K" if context.target_duration < 10 else "1080p",
-            "frame_rate": 30,
-            "audio_quality": "high",
-            "effects_complexity": "medium" if context.creativity_level > 0.6 else "low",
-            "rendering_priority": "quality" if context.target_duration < 5 else "speed"
-        }
+        """Determine technical requirements for scene generation (shared, read-only)."""
+        key = (
+            "4K" if context.target_duration < 10 else "1080p",
+            "medium" if context.creativity_level > 0.6 else "low",
+            "quality" if context.target_duration < 5 else "speed"
+        )
+        
+        requirements = _TECH_REQUIREMENTS.get(key)
+        if requirements is None:
+            resolution, effects_complexity, rendering_priority = key
+            requirements = _TECH_REQUIREMENTS[key] = FrozenDict(
+                resolution=resolution,
+                frame_rate=30,
+                audio_quality="high",
+                effects_complexity=effects_complexity,
+                rendering_priority=rendering_priority
+            )
+        return requirements
     
     def _generate_technical_specs(self, context: ThinkingContext, analysis: Dict) -> Dict[str, Any]:
         """Generate comprehensive technical specifications."""
@@ -493,7 +804,7 @@ class DeepThinkingEngine:
         # Always include some core tools
         recommendations.extend(["hunyuan_video", "bark_tts"])
         
-        return list(set(recommendations))  # Remove duplicates
+        return list(dict.fromkeys(recommendations))  # Remove duplicates, keep order
     
     def _calculate_uniqueness(self, enhanced_result: Dict) -> float:
         """Calculate uniqueness potential of the enhanced concept."""
@@ -505,6 +816,22 @@ class DeepThinkingEngine:
         return min(uniqueness, 1.0)
 
 
+# Engines of process-pool workers, one per settings tuple
+_worker_engines: Dict[Tuple, "DeepThinkingEngine"] = {}
+
+
+def _enhance_in_worker(settings: Tuple, concept: str, style: str, duration: float,
+                       structure: str, seed: Optional[int], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """enhance_concept_sync on a per-process engine (CPUExecutor process mode)."""
+    engine = _worker_engines.get(settings)
+    if engine is None:
+        creativity_level, deterministic, cache_size = settings
+        engine = _worker_engines[settings] = DeepThinkingEngine(
+            creativity_level=creativity_level, deterministic=deterministic, cache_size=cache_size
+        )
+    return engine.enhance_concept_sync(concept, style, duration, structure, seed, **kwargs)
+
+
 # Convenience functions
 async def quick_enhance(concept: str, **kwargs) -> Dict[str, Any]:
     """Quick concept enhancement with default settings."""
@@ -0,0 +1,75 @@
+"""
+AUTARK Prompt Normalisation
+===========================
+
+Tokenises a prompt once into a shared structure used by the semantic
+analyzer, the creative enhancer and the knowledge graph, instead of each of
+them lowercasing and splitting the text again.
+
+NormalizedPrompt.key is the canonical form of a prompt: Unicode-normalised,
+case-folded, punctuation dropped and whitespace collapsed. Prompts that
+differ only in those respects share a key, which is what request
+deduplication (see core.singleflight) and query caches are keyed on.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, List, Tuple, Union
+
+_WORD = re.compile(r"\w+")
+_SENTENCE_BREAK = re.compile(r"(?:(?<=[.!?])|(?<=[.!?][\"')\]]))\s+")
+
+
+@dataclass(frozen=True)
+class NormalizedPrompt:
+    """A prompt tokenised once."""
+
+    text: str                 # original text, unchanged
+    lowered: str              # text.lower(), punctuation kept (for pattern/substring matching)
+    tokens: Tuple[str, ...]   # lowered.split()
+    words: Tuple[str, ...]    # case-folded word characters only
+    key: str                  # canonical key: " ".join(words)
+
+    @property
+    def unique_tokens(self) -> FrozenSet[str]:
+        return frozenset(self.tokens)
+
+    @property
+    def collapsed(self) -> str:
+        """Lowered text with whitespace collapsed (punctuation kept)."""
+        return " ".join(self.tokens)
+
+    def __str__(self) -> str:
+        return self.text
+
+
+@lru_cache(maxsize=4096)
+def _normalize(text: str) -> NormalizedPrompt:
+    lowered = text.lower()
+    words = tuple(_WORD.findall(unicodedata.normalize("NFKC", text).casefold()))
+    return NormalizedPrompt(
+        text=text,
+        lowered=lowered,
+        tokens=tuple(lowered.split()),
+        words=words,
+        key=" ".join(words)
+    )
+
+
+def normalize_prompt(prompt: Union[str, NormalizedPrompt]) -> NormalizedPrompt:
+    """NormalizedPrompt for a string (cached); NormalizedPrompts pass through."""
+    if isinstance(prompt, NormalizedPrompt):
+        return prompt
+    return _normalize(prompt)
+
+
+def prompt_key(prompt: Union[str, NormalizedPrompt]) -> str:
+    """Canonical key of a prompt."""
+    return normalize_prompt(prompt).key
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of a prompt (split after ., ! or ?, or a quote closing one, and whitespace)."""
+    return [sentence.strip() for sentence in _SENTENCE_BREAK.split(text.strip()) if sentence.strip()]
@@ -0,0 +1,285 @@
+"""
+AUTARK Encoder Profiles
+=======================
+
+Maps studio quality/compression settings to concrete CPU encoder settings.
+
+Intermediate segments are written once in a cheap intra-frame mezzanine
+codec; the only lossy long-GOP encode happens at final assembly with the
+profile selected here.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, asdict, replace
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from ..core.executor import ToolExecutor, get_executor
+
+logger = logging.getLogger(__name__)
+
+
+# Output container -> video codecs it can carry (all of them take AAC audio)
+CONTAINER_CODECS = {
+    "mp4": ("libx264", "libx265"),
+    "m4v": ("libx264", "libx265"),
+    "mov": ("libx264", "libx265"),
+    "mkv": ("libx264", "libx265"),
+}
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    """Concrete encoder settings for one quality level."""
+
+    name: str
+    codec: str
+    preset: str
+    crf: int
+    resolution: str
+    tune: Optional[str] = None
+    pix_fmt: str = "yuv420p"
+    gop_seconds: float = 2.0
+    threads: int = 0                  # 0 = let the encoder use all cores
+    audio_codec: str = "aac"
+    audio_bitrate: str = "192k"
+    extension: str = "mp4"
+
+    def __post_init__(self):
+        if self.codec not in CONTAINER_CODECS.get(self.extension, ()):
+            raise ValueError(f"Container '{self.extension}' cannot hold {self.codec} video")
+
+    @property
+    def scale_filter(self) -> str:
+        """ffmpeg video filter that scales to the profile's resolution."""
+        width, height = self.resolution.lower().split("x")
+        return f"scale={width}:{height}"
+
+    def gop_size(self, fps: int) -> int:
+        """Keyframe interval in frames."""
+        return max(1, int(round(self.gop_seconds * fps)))
+
+    def ffmpeg_args(self, fps: int = 30, scale: bool = True) -> List[str]:
+        """
+        Video/audio output arguments for an ffmpeg command line.
+
+        The output is scaled to the profile's resolution unless `scale` is
+        False (source already at the wanted size).
+        """
+        args = ["-vf", self.scale_filter] if scale else []
+        args += [
+            "-c:v", self.codec,
+            "-preset", self.preset,
+            "-crf", str(self.crf),
+            "-pix_fmt", self.pix_fmt,
+            "-g", str(self.gop_size(fps)),
+            "-threads", str(self.threads),
+        ]
+        if self.tune:
+            args += ["-tune", self.tune]
+        if self.codec == "libx265":
+            args += ["-tag:v", "hvc1"]  # playable in QuickTime/Safari
+        args += ["-c:a", self.audio_codec, "-b:a", self.audio_bitrate]
+        return args
+
+    def moviepy_kwargs(self, fps: int = 30) -> Dict[str, Any]:
+        """Keyword arguments for moviepy's VideoClip.write_videofile."""
+        ffmpeg_params = [
+            "-vf", self.scale_filter,
+            "-crf", str(self.crf),
+            "-pix_fmt", self.pix_fmt,
+            "-g", str(self.gop_size(fps)),
+        ]
+        if self.tune:
+            ffmpeg_params += ["-tune", self.tune]
+
+        return {
+            "codec": self.codec,
+            "preset": self.preset,
+            "threads": self.threads or os.cpu_count(),
+            "audio_codec": self.audio_codec,
+            "audio_bitrate": self.audio_bitrate,
+            "ffmpeg_params": ffmpeg_params,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class MezzanineFormat:
+    """Cheap intra-frame format for intermediate segments."""
+
+    fourcc: str = "MJPG"          # OpenCV VideoWriter
+    codec: str = "mjpeg"          # ffmpeg equivalent
+    quality: int = 2              # -q:v, 2 = visually lossless
+    extension: str = "avi"
+
+    def ffmpeg_args(self) -> List[str]:
+        return ["-c:v", self.codec, "-q:v", str(self.quality), "-pix_fmt", "yuvj420p"]
+
+
+MEZZANINE_FORMAT = MezzanineFormat()
+
+# Quality level -> (resolution, x264 preset, crf, tune)
+QUALITY_PRESETS = {
+    "preview": ("640x360", "ultrafast", 32, "fastdecode"),
+    "720p": ("1280x720", "veryfast", 23, None),
+    "1080p": ("1920x1080", "medium", 21, None),
+    "4K": ("3840x2160", "slow", 20, None),
+}
+
+# StudioConfig.compression -> encoder library
+CODECS = {
+    "h264": "libx264",
+    "avc": "libx264",
+    "h265": "libx265",
+    "hevc": "libx265",
+}
+
+# x265 reaches comparable quality at a higher CRF
+_X265_CRF_OFFSET = 4
+
+
+def get_encoder_profile(
+    quality: str = "1080p",
+    compression: str = "h264",
+    threads: int = 0
+) -> EncoderProfile:
+    """Resolve a quality level and compression name to an encoder profile."""
+    if quality not in QUALITY_PRESETS:
+        logger.warning(f"⚠️ Unknown quality '{quality}', using 1080p encoder settings")
+        quality = "1080p"
+
+    codec = CODECS.get(compression.lower())
+    if codec is None:
+        logger.warning(f"⚠️ Unknown compression '{compression}', using h264")
+        codec = "libx264"
+
+    resolution, preset, crf, tune = QUALITY_PRESETS[quality]
+    if codec == "libx265":
+        crf += _X265_CRF_OFFSET
+        tune = None if tune == "fastdecode" else tune
+
+    return EncoderProfile(
+        name=f"{quality}-{codec}",
+        codec=codec,
+        preset=preset,
+        crf=crf,
+        resolution=resolution,
+        tune=tune,
+        threads=threads,
+    )
+
+
+def profile_for_config(config: Any, quality: Optional[str] = None) -> EncoderProfile:
+    """Encoder profile for a StudioConfig (quality defaults to its resolution)."""
+    quality = quality or getattr(config, "default_resolution", "1080p")
+    compression = getattr(config, "compression", "h264")
+    profile = get_encoder_profile(quality, compression)
+
+    output_format = (getattr(config, "output_format", None) or "").lower().lstrip(".")
+    if output_format and output_format != profile.extension:
+        if profile.codec in CONTAINER_CODECS.get(output_format, ()):
+            profile = replace(profile, extension=output_format)
+        else:
+            logger.warning(
+                f"⚠️ Output format '{output_format}' cannot hold {profile.codec} video, "
+                f"using {profile.extension}"
+            )
+
+    return profile
+
+
+def scale_resolution(resolution: str, scale: float) -> str:
+    """Scale a WIDTHxHEIGHT string, keeping both sides even for yuv420p."""
+    width, height = (int(side) for side in resolution.lower().split("x"))
+    width = max(2, int(width * scale) // 2 * 2)
+    height = max(2, int(height * scale) // 2 * 2)
+    return f"{width}x{height}"
+
+
+def preview_profile(
+    quality: str = "1080p",
+    compression: str = "h264",
+    scale: float = 0.25
+) -> EncoderProfile:
+    """Fast low-bitrate profile at a fraction of the target resolution."""
+    target = QUALITY_PRESETS.get(quality, QUALITY_PRESETS["1080p"])[0]
+    profile = get_encoder_profile("preview", compression)
+    return replace(
+        profile,
+        name=f"preview-{profile.codec}",
+        resolution=scale_resolution(target, scale)
+    )
+
+
+async def benchmark_encoder_profiles(
+    profiles: Optional[List[EncoderProfile]] = None,
+    duration: float = 5.0,
+    fps: int = 30,
+    resolution: Optional[str] = "1280x720",
+    executor: Optional[ToolExecutor] = None
+) -> Dict[str, Any]:
+    """
+    Encode an ffmpeg test pattern with every profile and compare speed and size.
+
+    `resolution` fixes the source size so profiles are comparable; pass None
+    to encode at each profile's own resolution. Encodes run one after another
+    through the tool executor so they do not compete for cores.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        logger.warning("⚠️ ffmpeg not found, encoder benchmark skipped")
+        return {"available": False, "results": {}}
+
+    executor = executor or get_executor()
+
+    if profiles is None:
+        profiles = [
+            get_encoder_profile(quality, compression)
+            for compression in ("h264", "h265")
+            for quality in QUALITY_PRESETS
+        ]
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="autark_encbench_") as tmp_dir:
+        for profile in profiles:
+            size = resolution or profile.resolution
+            output = Path(tmp_dir) / f"{profile.name}.{profile.extension}"
+            cmd = [
+                ffmpeg, "-y", "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration={duration}",
+                "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+                *profile.ffmpeg_args(fps, scale=False),  # source is already at `size`
+                str(output)
+            ]
+
+            completed = await executor.run(cmd, tool="ffmpeg")
+            elapsed = completed.wall_seconds
+
+            if not completed.ok:
+                results[profile.name] = {"error": completed.stderr.strip()[-500:]}
+                continue
+
+            results[profile.name] = {
+                "encode_seconds": elapsed,
+                "encode_fps": duration * fps / elapsed if elapsed > 0 else 0.0,
+                "realtime_factor": duration / elapsed if elapsed > 0 else 0.0,
+                "size_mb": output.stat().st_size / (1024 ** 2),
+                "settings": profile.to_dict(),
+            }
+            logger.info(
+                f"⏱️ {profile.name}: {results[profile.name]['encode_fps']:.1f} fps, "
+                f"{results[profile.name]['size_mb']:.2f} MB"
+            )
+
+    return {
+        "available": True,
+        "source": {"duration": duration, "fps": fps, "resolution": resolution},
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
@@ -0,0 +1,223 @@
+"""
+AUTARK Frame Transport
+======================
+
+Zero-copy frame transport between render worker processes and the encoder.
+
+Each render worker owns a SharedFrameRing: a ring of frame-sized slots in
+one multiprocessing.shared_memory block. The worker renders straight into a
+free slot and the encoder process reads the same memory, so frames are never
+pickled or written to temporary files. When the ring is full the worker
+blocks until the encoder has drained a slot (backpressure).
+
+Rings are single-producer/single-consumer; the encoder drains the rings of
+consecutive segments in timeline order.
+"""
+
+import logging
+import multiprocessing
+import subprocess
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Tuple, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Slot states in the metadata array
+_SLOT_FRAME = 1
+_SLOT_END = 2
+
+
+class FrameTransportTimeout(TimeoutError):
+    """Raised when a ring slot does not become available in time."""
+
+
+class SharedFrameRing:
+    """
+    Ring of shared-memory frame buffers with blocking backpressure.
+
+    Create the ring in the parent process and pass it to the worker and
+    encoder processes as a Process argument. The producer side calls
+    write_slot()/put() and finish(); the consumer side iterates frames().
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        channels: int = 3,
+        slots: int = 4,
+        ctx: Optional[multiprocessing.context.BaseContext] = None
+    ):
+        ctx = ctx or multiprocessing.get_context()
+
+        self.shape = (height, width, channels)
+        self.frame_bytes = width * height * channels
+        self.slots = slots
+
+        self._shm = shared_memory.SharedMemory(create=True, size=self.frame_bytes * slots)
+        self._meta = ctx.Array("q", slots * 2, lock=False)  # (state, frame_number) per slot
+        self._free = ctx.Semaphore(slots)
+        self._filled = ctx.Semaphore(0)
+
+        # Private cursors: one producer and one consumer per ring
+        self._head = 0
+        self._tail = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shm_name"] = self._shm.name
+        del state["_shm"]
+        return state
+
+    def __setstate__(self, state):
+        shm_name = state.pop("_shm_name")
+        self.__dict__.update(state)
+        self._shm = shared_memory.SharedMemory(name=shm_name)
+
+    @property
+    def name(self) -> str:
+        """Name of the underlying shared memory block."""
+        return self._shm.name
+
+    def _view(self, slot: int) -> np.ndarray:
+        return np.ndarray(
+            self.shape, dtype=np.uint8, buffer=self._shm.buf,
+            offset=slot * self.frame_bytes
+        )
+
+    # Producer side
+
+    @contextmanager
+    def write_slot(self, frame_number: int, timeout: Optional[float] = None) -> Iterator[np.ndarray]:
+        """
+        Reserve the next free slot and yield it as a writable frame array.
+
+        Render directly into the array; the frame is published when the
+        context exits. Blocks while the ring is full.
+        """
+        if not self._free.acquire(timeout=timeout):
+            raise FrameTransportTimeout("No free frame slot (encoder not draining?)")
+
+        slot = self._head
+        try:
+            yield self._view(slot)
+        except BaseException:
+            self._free.release()  # slot was never published
+            raise
+
+        self._meta[slot * 2] = _SLOT_FRAME
+        self._meta[slot * 2 + 1] = frame_number
+        self._head = (slot + 1) % self.slots
+        self._filled.release()
+
+    def put(self, frame: np.ndarray, frame_number: int, timeout: Optional[float] = None):
+        """Copy a finished frame into the ring (one memcpy, no serialisation)."""
+        with self.write_slot(frame_number, timeout) as slot:
+            slot[...] = frame
+
+    def finish(self, timeout: Optional[float] = None):
+        """Signal the end of this producer's stream."""
+        if not self._free.acquire(timeout=timeout):
+            raise FrameTransportTimeout("No free frame slot for end-of-stream marker")
+
+        slot = self._head
+        self._meta[slot * 2] = _SLOT_END
+        self._head = (slot + 1) % self.slots
+        self._filled.release()
+
+    # Consumer side
+
+    def frames(self, timeout: Optional[float] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yield (frame_number, frame) until the producer calls finish().
+
+        The frame array is a view into shared memory and is only valid until
+        the next iteration, when its slot is handed back to the producer.
+        """
+        while True:
+            if not self._filled.acquire(timeout=timeout):
+                raise FrameTransportTimeout("No frame arrived (render worker stalled?)")
+
+            slot = self._tail
+            self._tail = (slot + 1) % self.slots
+            state = self._meta[slot * 2]
+
+            try:
+                if state == _SLOT_END:
+                    return
+                yield self._meta[slot * 2 + 1], self._view(slot)
+            finally:
+                self._free.release()
+
+    # Lifecycle
+
+    def close(self):
+        """Detach this process from the shared memory block."""
+        self._shm.close()
+
+    def unlink(self):
+        """Free the shared memory block (call once, in the creating process)."""
+        self._shm.unlink()
+
+
+def drain_to_ffmpeg(
+    rings: Sequence[SharedFrameRing],
+    output_path: str,
+    fps: int,
+    encoder_args: Optional[List[str]] = None,
+    ffmpeg: str = "ffmpeg",
+    timeout: Optional[float] = None
+) -> int:
+    """
+    Encoder loop: feed the frames of `rings` (in order) to one ffmpeg process.
+
+    Frames go from shared memory straight into ffmpeg's stdin pipe as raw
+    BGR24 video. Returns the number of frames encoded.
+    """
+    height, width, _ = rings[0].shape
+    cmd = [
+        ffmpeg, "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "bgr24",
+        "-s", f"{width}x{height}", "-r", str(fps),
+        "-i", "-",
+        *(encoder_args or ["-c:v", "libx264", "-pix_fmt", "yuv420p"]),
+        output_path
+    ]
+
+    frames_written = 0
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    try:
+        for ring in rings:
+            for _, frame in ring.frames(timeout=timeout):
+                process.stdin.write(frame.data)
+                frames_written += 1
+    finally:
+        process.stdin.close()
+        return_code = process.wait()
+
+    if return_code != 0:
+        raise RuntimeError(f"ffmpeg exited with code {return_code}")
+
+    logger.info(f"🎞️ Encoded {frames_written} frames to {output_path}")
+    return frames_written
+
+
+def start_encoder_process(
+    rings: Sequence[SharedFrameRing],
+    output_path: str,
+    fps: int,
+    encoder_args: Optional[List[str]] = None,
+    ctx: Optional[multiprocessing.context.BaseContext] = None
+) -> multiprocessing.Process:
+    """Run drain_to_ffmpeg in its own process and return the started process."""
+    ctx = ctx or multiprocessing.get_context()
+    process = ctx.Process(
+        target=drain_to_ffmpeg,
+        args=(list(rings), output_path, fps, encoder_args),
+        name="autark-encoder"
+    )
+    process.start()
+    return process
@@ -7,13 +7,32 @@ High-performance video generation system integrating multiple AI tools.
 
 import logging
 import asyncio
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 import time
 import json
+import hashlib
+
+from ..core.jobs import checkpoint
+from ..nlp.deep_thinking import LazyScenes
+from ..nlp.normalize import split_sentences
+from .planner import ToolPlanner, ToolStatsStore, ToolPlan
+from .scheduler import SegmentScheduler, SegmentSchedule
+from .incremental import SceneDiff, diff_segments, fingerprint_segment
+from .encoding import (
+    EncoderProfile, profile_for_config, get_encoder_profile, preview_profile,
+    benchmark_encoder_profiles, MEZZANINE_FORMAT
+)
 
 logger = logging.getLogger(__name__)
 
+# Cheap stand-ins for expensive visual tools in preview renders
+PREVIEW_STAND_INS = {
+    "hunyuan_video": "remotion",
+    "stable_video_diffusion": "remotion",
+    "cog_video": "manim"
+}
+
 
 class VideoGenerator:
     """
@@ -34,6 +53,12 @@ class VideoGenerator:
             "remotion": {"status": "available", "type": "video_framework"}
         }
         
+        self.tool_planner = ToolPlanner(
+            stats=ToolStatsStore(getattr(config, "tool_stats_path", None)),
+            memory_limit_gb=getattr(config, "memory_limit_gb", 16),
+            quality_floor=getattr(config, "tool_quality_floor", 0.75)
+        )
+        
         logger.info("🎥 Video Generator initialized")
     
     async def create_video(
@@ -42,26 +67,50 @@ class VideoGenerator:
         knowledge: Dict[str, Any],
         duration: float,
         quality: str = "4K",
-        style: str = "cinematic"
+        style: str = "cinematic",
+        previous_segments: Optional[Dict[str, Dict[str, Any]]] = None,
+        preview: bool = False,
+        audio: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Create video using integrated AI tools."""
+        """
+        Create video using integrated AI tools.
         
-        logger.info(f"🎬 Starting video creation (duration: {duration}min)")
+        If `previous_segments` (segment id -> segment of an earlier render) is
+        given, only segments whose content, timing or style changed are
+        rendered again; the others reuse their existing files.
+        
+        With `preview=True` the same timeline is rendered at a fraction of the
+        resolution and frame rate with cheap stand-in tools and a low-bitrate
+        encode. A previously generated `audio` track is reused as is.
+        """
+        
+        logger.info(f"🎬 Starting {'preview' if preview else 'video'} creation (duration: {duration}min)")
         start_time = time.time()
         
         # Select optimal tools based on concept and knowledge
-        selected_tools = self._select_optimal_tools(concept, knowledge, style)
+        tool_plan = self._plan_tools(concept, knowledge, style, duration)
+        selected_tools = tool_plan.tools
+        if preview:
+            selected_tools = self._preview_tools(selected_tools)
+        
+        encoder = self._encoder_profile(quality, preview)
+        render_settings = {
+            "resolution": encoder.resolution,
+            "frame_rate": self._frame_rate(preview),
+            "encoder": encoder.name
+        }
         
         # Generate video segments
-        segments = await self._generate_video_segments(
-            concept, knowledge, duration, selected_tools
+        segments, schedule, render_diff = await self._generate_video_segments(
+            concept, knowledge, duration, selected_tools, previous_segments, render_settings
         )
+        self.tool_planner.stats.save()
         
-        # Integrate audio if needed
-        audio_result = await self._generate_audio_track(concept, duration)
+        # Integrate audio if needed (the TTS track does not depend on resolution)
+        audio_result = audio or await self._generate_audio_track(concept, duration)
         
         # Assemble final video
-        final_video = await self._assemble_video(segments, audio_result, quality)
+        final_video = await self._assemble_video(segments, audio_result, quality, encoder)
         
         generation_time = time.time() - start_time
         
@@ -70,6 +119,11 @@ class VideoGenerator:
             "segments": segments,
             "audio": audio_result,
             "tools_used": selected_tools,
+            "preview": preview,
+            "render_settings": render_settings,
+            "tool_plan": tool_plan.to_dict(),
+            "schedule": schedule.to_dict(),
+            "render_diff": render_diff.to_dict(),
             "generation_time": generation_time,
             "quality_metrics": final_video.get("quality_metrics", {})
         }
@@ -78,9 +132,20 @@ class VideoGenerator:
         self, 
         concept: Dict[str, Any], 
         knowledge: Dict[str, Any], 
-        style: str
+        style: str,
+        duration: float = 5.0
     ) -> List[str]:
         """Select optimal AI tools for the video generation."""
+        return self._plan_tools(concept, knowledge, style, duration).tools
+    
+    def _plan_tools(
+        self,
+        concept: Dict[str, Any],
+        knowledge: Dict[str, Any],
+        style: str,
+        duration: float
+    ) -> ToolPlan:
+        """Plan the tool set with the cost model (deterministic for equal inputs)."""
         
         tools = []
         
@@ -102,45 +167,212 @@ class VideoGenerator:
         # Always include core tools
         tools.extend(["bark_tts", "hunyuan_video"])
         
-        # Remove duplicates and verify availability
-        selected = []
-        for tool in set(tools):
-            if tool in self.available_tools and self.available_tools[tool]["status"] == "available":
-                selected.append(tool)
+        # Verify availability (order is kept, duplicates are removed by the planner)
+        candidates = [
+            tool for tool in tools
+            if tool in self.available_tools and self.available_tools[tool]["status"] == "available"
+        ]
         
-        return selected[:5]  # Limit to 5 tools for performance
+        knowledge_weights = knowledge.get("tool_weights")
+        if knowledge_weights is None:
+            # Older contexts only carry the ranked list
+            knowledge_weights = {
+                tool: 1.0 - rank / max(len(recommended), 1)
+                for rank, tool in enumerate(recommended)
+            }
+        
+        plan = self.tool_planner.plan(
+            candidates,
+            output_seconds=duration * 60,
+            knowledge_weights=knowledge_weights,
+            style_tools=style_tools.get(style, [])
+        )
+        
+        logger.info(
+            f"🧮 Planned tools {plan.tools} "
+            f"(expected render time: {plan.expected_render_time:.1f}s)"
+        )
+        return plan
     
     async def _generate_video_segments(
         self,
         concept: Dict[str, Any],
         knowledge: Dict[str, Any],
         duration: float,
-        tools: List[str]
-    ) -> List[Dict[str, Any]]:
+        tools: List[str],
+        previous_segments: Optional[Dict[str, Dict[str, Any]]] = None,
+        render_settings: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], SegmentSchedule, SceneDiff]:
         """Generate individual video segments."""
         
+        segments = self._build_segments(concept, duration)
+        for segment in segments:
+            segment["render_settings"] = render_settings
+            segment["fingerprint"] = fingerprint_segment(segment)
+            segment["output_path"] = self._segment_output_path(segment)
+        
+        # Work out which segments actually need rendering
+        render_diff = diff_segments(previous_segments, segments)
+        to_render = set(render_diff.to_render)
+        
+        for i, segment in enumerate(segments):
+            if segment["id"] not in to_render:
+                reused = dict(previous_segments[segment["id"]])
+                reused["start_time"] = segment["start_time"]  # may shift on the timeline
+                reused["status"] = "reused"
+                segments[i] = reused
+        
+        if previous_segments is not None:
+            logger.info(
+                f"♻️ Reusing {len(render_diff.unchanged)} segments, "
+                f"re-rendering {len(to_render)}"
+            )
+        
+        pending = [segment for segment in segments if segment["id"] in to_render]
+        schedule = self._schedule_segments(pending, tools)
+        
+        # Each tool works through its own queue; the queues run concurrently
+        segments_by_id = {segment["id"]: segment for segment in pending}
+        render_start = time.perf_counter()
+        
+        await asyncio.gather(*[
+            self._render_queue(tool_id, [segments_by_id[seg_id] for seg_id in queue])
+            for tool_id, queue in schedule.worker_queues.items()
+            if queue
+        ])
+        
+        schedule.actual_makespan = time.perf_counter() - render_start
+        
+        logger.info(
+            f"📹 Generated {len(pending)} of {len(segments)} video segments "
+            f"(makespan predicted {schedule.predicted_makespan:.1f}s, "
+            f"actual {schedule.actual_makespan:.2f}s)"
+        )
+        return segments, schedule, render_diff
+    
+    def _build_segments(self, concept: Dict[str, Any], duration: float) -> List[Dict[str, Any]]:
+        """Plan segments from the scene breakdown, or evenly if there is none."""
+        
+        scenes = concept.get("scene_breakdown", {}).get("scenes")
+        if scenes:
+            if isinstance(scenes, LazyScenes):
+                ordered = scenes.items()  # streamed, already in timeline order
+            else:
+                ordered = sorted(scenes.items(), key=lambda item: item[1]["start_time"])
+            return [
+                {
+                    "id": scene_id,
+                    "start_time": scene["start_time"],
+                    "duration": scene["duration"],
+                    "duration_seconds": scene["duration"] * 60,
+                    "beat": scene.get("beat"),
+                    "content": scene["visual_description"],
+                    "audio_notes": scene.get("audio_notes"),
+                    "visual_style": self._get_segment_style(i, len(ordered)),
+                    "technical_requirements": scene.get("technical_requirements"),
+                    "generation_tool": None,
+                    "status": "planned"
+                }
+                for i, (scene_id, scene) in enumerate(ordered)
+            ]
+        
         segments = []
         segment_count = max(3, int(duration * 2))  # ~2 segments per minute
         segment_duration = duration / segment_count
+        # Each segment is based on its own share of the concept's sentences,
+        # so editing one sentence only changes the segments that carry it
+        sentences = split_sentences(concept["enhanced"]) or [concept["enhanced"]]
         
         for i in range(segment_count):
             start_time = i * segment_duration
+            first = i * len(sentences) // segment_count
+            beat = " ".join(sentences[first:max(first + 1, (i + 1) * len(sentences) // segment_count)])
             
             segment = {
                 "id": f"segment_{i+1}",
                 "start_time": start_time,
                 "duration": segment_duration,
-                "content": f"Segment {i+1} content based on {concept['enhanced']}",
+                "duration_seconds": segment_duration * 60,
+                "beat": beat,
+                "content": f"Segment {i+1} content based on {beat}",
                 "visual_style": self._get_segment_style(i, segment_count),
-                "generation_tool": self._select_segment_tool(tools, i),
-                "status": "generated"
+                "generation_tool": None,
+                "status": "planned"
             }
             
             segments.append(segment)
         
-        logger.info(f"📹 Generated {len(segments)} video segments")
         return segments
     
+    def _segment_output_path(self, segment: Dict[str, Any]) -> str:
+        """Content-addressed file path, so unchanged segments map to the same file."""
+        export_path = Path(getattr(self.config, "export_path", "./exports"))
+        digest = segment["fingerprint"]["combined"][:16]
+        return str(export_path / "segments" / f"{segment['id']}_{digest}.{MEZZANINE_FORMAT.extension}")
+    
+    def _schedule_segments(
+        self,
+        segments: List[Dict[str, Any]],
+        tools: List[str]
+    ) -> SegmentSchedule:
+        """Assign segments to visual tools by estimated throughput (LPT)."""
+        planner = self.tool_planner
+        
+        # Only visual tools render frames; TTS tools never get a segment
+        render_tools = [t for t in tools if planner.get_profile(t).role == "visual"]
+        if not render_tools:
+            render_tools = ["hunyuan_video"]  # Default fallback
+        
+        scheduler = SegmentScheduler(
+            latency=planner.latency_per_second,
+            startup=lambda t: 0.0 if t in planner.warm_tools else planner.get_profile(t).cold_start
+        )
+        schedule = scheduler.schedule(segments, render_tools)
+        
+        for segment in segments:
+            segment["generation_tool"] = schedule.assignments[segment["id"]]
+        
+        return schedule
+    
+    async def _render_queue(self, tool_id: str, segments: List[Dict[str, Any]]):
+        """Render the segments assigned to one tool, in timeline order."""
+        for segment in segments:
+            # Segment boundary: a low-priority job may hand its slot to a waiting one
+            await checkpoint()
+            # Actual rendering is delegated to the tool backend
+            await asyncio.sleep(0)
+            segment["status"] = "generated"
+        
+        self.tool_planner.mark_warm(tool_id)
+    
+    def _preview_tools(self, tools: List[str]) -> List[str]:
+        """Swap expensive visual tools for cheap stand-ins (audio tools are kept)."""
+        preview_tools = [PREVIEW_STAND_INS.get(tool, tool) for tool in tools]
+        return list(dict.fromkeys(preview_tools))
+    
+    def _encoder_profile(self, quality: str, preview: bool) -> EncoderProfile:
+        """Encoder profile for the final encode of this render."""
+        compression = getattr(self.config, "compression", "h264")
+        
+        if preview:
+            return preview_profile(
+                quality, compression, getattr(self.config, "preview_scale", 0.25)
+            )
+        if self.config is not None:
+            return profile_for_config(self.config, quality)
+        return get_encoder_profile(quality)
+    
+    def _frame_rate(self, preview: bool) -> int:
+        """Frame rate to render at."""
+        frame_rate = getattr(self.config, "frame_rate", 30)
+        if preview:
+            return max(1, frame_rate // getattr(self.config, "preview_frame_divisor", 2))
+        return frame_rate
+    
+    def record_tool_latency(self, tool_id: str, output_seconds: float, elapsed: float):
+        """Record a measured render time so future tool plans use real latencies."""
+        self.tool_planner.stats.record(tool_id, output_seconds, elapsed)
+    
     def _get_segment_style(self, index: int, total: int) -> str:
         """Determine visual style for a segment."""
         if index == 0:
@@ -150,13 +382,6 @@ class VideoGenerator:
         else:
             return "development"
     
-    def _select_segment_tool(self, tools: List[str], index: int) -> str:
-        """Select tool for specific segment."""
-        # Rotate through available tools
-        if tools:
-            return tools[index % len(tools)]
-        return "hunyuan_video"  # Default fallback
-    
     async def _generate_audio_track(
         self, 
         concept: Dict[str, Any], 
@@ -189,12 +414,15 @@ class VideoGenerator:
         # Simulate TTS processing time
         await asyncio.sleep(0.1)
         
+        # Name the file after its inputs so identical requests share one TTS render
+        digest = hashlib.sha256(f"{enhanced_concept}|{duration}".encode("utf-8")).hexdigest()
+        
         return {
             "tool_used": "bark_tts",
             "text": enhanced_concept,
             "voice_style": "natural",
             "duration": duration * 0.8,  # Leave some silence
-            "output_path": f"./exports/tts_audio_{int(time.time())}.wav"
+            "output_path": f"./exports/tts_audio_{digest[:16]}.wav"
         }
     
     async def _generate_background_music(self, concept: Dict[str, Any], duration: float) -> Dict[str, Any]:
@@ -215,7 +443,8 @@ class VideoGenerator:
         self, 
         segments: List[Dict[str, Any]], 
         audio: Dict[str, Any], 
-        quality: str
+        quality: str,
+        encoder: Optional[EncoderProfile] = None
     ) -> Dict[str, Any]:
         """Assemble final video from segments and audio."""
         
@@ -224,12 +453,21 @@ class VideoGenerator:
         # Simulate video assembly process
         await asyncio.sleep(0.2)
         
-        output_path = f"./exports/autark_video_{int(time.time())}.mp4"
+        # Segments are kept in the mezzanine format; this is the only final encode
+        if encoder is None:
+            encoder = self._encoder_profile(quality, preview=False)
+        frame_rate = segments[0]["render_settings"]["frame_rate"] if segments else 30
+        
+        output_path = f"./exports/autark_video_{int(time.time())}.{encoder.extension}"
         
         return {
             "output_path": output_path,
             "resolution": quality,
+            "encoder": encoder.to_dict(),
+            "encoder_args": encoder.ffmpeg_args(frame_rate),
+            "intermediate_format": MEZZANINE_FORMAT.codec,
             "total_segments": len(segments),
+            "reused_segments": sum(1 for seg in segments if seg["status"] == "reused"),
             "has_audio": bool(audio),
             "file_size_mb": 250,  # Simulated
             "quality_metrics": {
@@ -240,6 +478,10 @@ class VideoGenerator:
             }
         }
     
+    async def benchmark_encoders(self, **kwargs) -> Dict[str, Any]:
+        """Compare the encoder profiles on this machine (see benchmark_encoder_profiles)."""
+        return await benchmark_encoder_profiles(**kwargs)
+    
     def get_generation_status(self) -> Dict[str, Any]:
         """Get current generation status and capabilities."""
         return {
@@ -0,0 +1,95 @@
+"""
+AUTARK Incremental Rendering
+============================
+
+Scene fingerprints and diffs for re-rendering only what changed.
+
+A segment is fingerprinted over three aspects: content (its narrative beat,
+i.e. the part of the prompt it shows, visual description and audio notes),
+timing (its duration) and style (visual style, technical requirements and
+render settings). The start time is deliberately not part of the
+fingerprint: a scene that only moves on the timeline because an earlier
+scene got longer keeps its rendered file. No aspect covers the prompt as a
+whole, so editing one sentence only re-renders the scenes whose beat
+contains it.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional
+
+CONTENT_FIELDS = ("beat", "content", "audio_notes")
+TIMING_FIELDS = ("duration",)
+STYLE_FIELDS = ("visual_style", "technical_requirements", "render_settings")
+
+
+def _digest(values: Dict[str, Any]) -> str:
+    """Stable hash of a JSON-serialisable mapping."""
+    payload = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def fingerprint_segment(segment: Dict[str, Any]) -> Dict[str, str]:
+    """Per-aspect fingerprints plus a combined one for a segment."""
+    aspects = {
+        "content": _digest({k: segment.get(k) for k in CONTENT_FIELDS}),
+        "timing": _digest({k: round(segment.get(k, 0.0), 6) for k in TIMING_FIELDS}),
+        "style": _digest({k: segment.get(k) for k in STYLE_FIELDS}),
+    }
+    aspects["combined"] = _digest(aspects)
+    return aspects
+
+
+@dataclass
+class SceneDiff:
+    """Difference between a stored and a new segment plan."""
+
+    unchanged: List[str] = field(default_factory=list)
+    changed: Dict[str, List[str]] = field(default_factory=dict)
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    @property
+    def to_render(self) -> List[str]:
+        """Segment ids that need a new render."""
+        return list(self.changed) + self.added
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result["to_render"] = self.to_render
+        return result
+
+
+def diff_segments(
+    previous: Optional[Dict[str, Dict[str, Any]]],
+    current: List[Dict[str, Any]]
+) -> SceneDiff:
+    """
+    Compare the stored segments of a project with a new segment plan.
+
+    Both sides must carry a "fingerprint" as produced by fingerprint_segment.
+    """
+    previous = previous or {}
+    diff = SceneDiff()
+
+    for segment in current:
+        old = previous.get(segment["id"])
+
+        if old is None:
+            diff.added.append(segment["id"])
+            continue
+
+        changed_aspects = [
+            aspect for aspect in ("content", "timing", "style")
+            if old["fingerprint"][aspect] != segment["fingerprint"][aspect]
+        ]
+        if changed_aspects:
+            diff.changed[segment["id"]] = changed_aspects
+        else:
+            diff.unchanged.append(segment["id"])
+
+    current_ids = {segment["id"] for segment in current}
+    diff.removed = [seg_id for seg_id in previous if seg_id not in current_ids]
+
+    return diff
@@ -0,0 +1,319 @@
+"""
+AUTARK Tool Planner
+===================
+
+Cost-model based selection of AI tools for video generation.
+
+Every candidate tool is scored with an expected render time (measured latency
+per second of output, cold-start cost, memory footprint) and a quality weight
+derived from the knowledge graph. The planner then picks a deterministic tool
+set that minimises expected render time while staying above a quality floor.
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field, asdict, replace
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ToolProfile:
+    """Static cost profile of an AI tool (priors until measurements exist)."""
+
+    tool_id: str
+    role: str                   # "visual" or "audio"
+    latency_per_second: float   # compute seconds per second of output
+    cold_start: float           # seconds to load models into memory
+    memory_gb: float
+    base_quality: float
+
+
+DEFAULT_TOOL_PROFILES = {
+    "hunyuan_video": ToolProfile("hunyuan_video", "visual", 40.0, 45.0, 14.0, 0.85),
+    "stable_video_diffusion": ToolProfile("stable_video_diffusion", "visual", 25.0, 30.0, 10.0, 0.80),
+    "cog_video": ToolProfile("cog_video", "visual", 30.0, 35.0, 12.0, 0.75),
+    "manim": ToolProfile("manim", "visual", 2.0, 3.0, 1.0, 0.65),
+    "remotion": ToolProfile("remotion", "visual", 1.5, 5.0, 1.5, 0.65),
+    "bark_tts": ToolProfile("bark_tts", "audio", 1.2, 10.0, 4.0, 0.80),
+    "coqui_tts": ToolProfile("coqui_tts", "audio", 0.4, 6.0, 2.0, 0.75),
+}
+
+# Profile used for tools the planner has no prior knowledge about
+_UNKNOWN_PROFILE = ToolProfile("unknown", "visual", 30.0, 30.0, 8.0, 0.6)
+
+
+class ToolStatsStore:
+    """
+    Persistent per-tool latency statistics.
+
+    Latencies are kept as an exponentially weighted moving average of compute
+    seconds per second of output and survive between runs in a JSON file.
+    """
+
+    def __init__(self, path: Optional[str] = None, smoothing: float = 0.3):
+        self.path = Path(path) if path else None
+        self.smoothing = smoothing
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+        self.load()
+
+    def load(self):
+        """Load statistics from disk, if a stats file exists."""
+        if self.path is None or not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f).get("tools", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Could not read tool statistics {self.path}: {e}")
+            self.stats = {}
+
+    def save(self):
+        """Persist statistics atomically (write to temp file, then rename)."""
+        if self.path is None or not self._dirty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"updated": time.time(), "tools": self.stats}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+        self._dirty = False
+
+    def record(self, tool_id: str, output_seconds: float, elapsed: float):
+        """Record one measured render of `output_seconds` taking `elapsed` seconds."""
+        if output_seconds <= 0:
+            return
+
+        observed = elapsed / output_seconds
+        entry = self.stats.get(tool_id)
+
+        if entry is None:
+            entry = {"latency_per_second": observed, "samples": 0}
+        else:
+            alpha = self.smoothing
+            entry["latency_per_second"] = (
+                alpha * observed + (1 - alpha) * entry["latency_per_second"]
+            )
+
+        entry["samples"] += 1
+        entry["last_used"] = time.time()
+        self.stats[tool_id] = entry
+        self._dirty = True
+
+    def latency_per_second(self, tool_id: str, default: float) -> float:
+        """Measured latency for a tool, falling back to `default`."""
+        entry = self.stats.get(tool_id)
+        return entry["latency_per_second"] if entry else default
+
+
+@dataclass
+class ToolPlan:
+    """Result of tool planning."""
+
+    tools: List[str]
+    expected_render_time: float
+    estimates: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    rejected: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ToolPlanner:
+    """
+    Chooses AI tools by expected render time within a quality floor.
+
+    Visual tools render segments in parallel, so further visual tools are
+    only added while they shorten the expected makespan. The audio track is
+    rendered after the segments, so audio and visual tools are budgeted
+    against the memory limit separately rather than summed.
+    
+    The primary visual tool (the best-quality tool the style asks for, else
+    the best-quality one overall) is reserved first; faster tools are then added
+    around it as far as memory allows. Tools below the quality floor are
+    logged, and a role whose candidates all fall below it keeps its best one.
+    """
+
+    KNOWLEDGE_WEIGHT = 0.2
+    STYLE_BONUS = 0.1
+    # Quality scores are sums of floats; 0.65 + 0.1 must clear a 0.75 floor
+    QUALITY_TOLERANCE = 1e-9
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, ToolProfile]] = None,
+        stats: Optional[ToolStatsStore] = None,
+        memory_limit_gb: float = 16.0,
+        quality_floor: float = 0.75,
+        max_tools: int = 5
+    ):
+        self.profiles = dict(profiles or DEFAULT_TOOL_PROFILES)
+        self.stats = stats or ToolStatsStore()
+        self.memory_limit_gb = memory_limit_gb
+        self.quality_floor = quality_floor
+        self.max_tools = max_tools
+        self.warm_tools = set()
+
+    def get_profile(self, tool_id: str) -> ToolProfile:
+        """Profile for a tool (generic profile for unknown tools)."""
+        profile = self.profiles.get(tool_id)
+        if profile is None:
+            return replace(_UNKNOWN_PROFILE, tool_id=tool_id)
+        return profile
+
+    def latency_per_second(self, tool_id: str) -> float:
+        """Current latency estimate (measured if available, else prior)."""
+        return self.stats.latency_per_second(
+            tool_id, self.get_profile(tool_id).latency_per_second
+        )
+
+    def estimate_time(self, tool_id: str, output_seconds: float) -> float:
+        """Expected wall time for a tool to render `output_seconds` alone."""
+        startup = 0.0 if tool_id in self.warm_tools else self.get_profile(tool_id).cold_start
+        return startup + self.latency_per_second(tool_id) * output_seconds
+
+    def score_quality(
+        self,
+        tool_id: str,
+        knowledge_weights: Dict[str, float],
+        style_tools: Iterable[str] = ()
+    ) -> float:
+        """Quality estimate combining the tool prior and knowledge relevance."""
+        quality = self.get_profile(tool_id).base_quality
+        quality += self.KNOWLEDGE_WEIGHT * knowledge_weights.get(tool_id, 0.0)
+        if tool_id in style_tools:
+            quality += self.STYLE_BONUS
+        return min(quality, 1.0)
+
+    def mark_warm(self, tool_id: str):
+        """Mark a tool as loaded, so its cold start is no longer charged."""
+        self.warm_tools.add(tool_id)
+
+    def plan(
+        self,
+        candidates: Iterable[str],
+        output_seconds: float,
+        knowledge_weights: Optional[Dict[str, float]] = None,
+        style_tools: Iterable[str] = ()
+    ) -> ToolPlan:
+        """Select a deterministic tool set for `output_seconds` of video."""
+
+        knowledge_weights = knowledge_weights or {}
+        style_tools = set(style_tools)
+
+        estimates = {}
+        rejected = {}
+        eligible = {"visual": [], "audio": []}
+        below_floor = {"visual": [], "audio": []}
+
+        # Deduplicate while keeping a stable order
+        for tool_id in dict.fromkeys(candidates):
+            profile = self.get_profile(tool_id)
+            quality = self.score_quality(tool_id, knowledge_weights, style_tools)
+            expected = self.estimate_time(tool_id, output_seconds)
+
+            estimates[tool_id] = {
+                "expected_time": expected,
+                "quality": quality,
+                "memory_gb": profile.memory_gb
+            }
+
+            if profile.memory_gb > self.memory_limit_gb:
+                rejected[tool_id] = "exceeds_memory_limit"
+            elif quality < self.quality_floor - self.QUALITY_TOLERANCE:
+                rejected[tool_id] = "below_quality_floor"
+                below_floor.setdefault(profile.role, []).append(tool_id)
+            else:
+                eligible.setdefault(profile.role, []).append(tool_id)
+
+        def rank(tool_id):
+            estimate = estimates[tool_id]
+            return (estimate["expected_time"], -estimate["quality"], tool_id)
+
+        def best_quality(tool_ids):
+            return min(tool_ids, key=lambda t: (-estimates[t]["quality"],) + rank(t))
+
+        for role in eligible:
+            if not eligible[role] and below_floor.get(role):
+                # Better a tool under the floor than no tool for the role
+                fallback = best_quality(below_floor[role])
+                del rejected[fallback]
+                eligible[role].append(fallback)
+                logger.warning(
+                    f"⚠️ No {role} tool reaches quality floor {self.quality_floor}; "
+                    f"using {fallback} ({estimates[fallback]['quality']:.2f})"
+                )
+            eligible[role].sort(key=rank)
+
+        dropped = [t for role in below_floor for t in below_floor[role] if t in rejected]
+        if dropped:
+            logger.info(f"🧮 Below quality floor {self.quality_floor}: {', '.join(dropped)}")
+
+        audio = []
+        visual = []
+        expected_total = 0.0
+
+        # Cheapest audio tool (audio is rendered as one track, after the segments)
+        if eligible["audio"]:
+            audio_tool = eligible["audio"][0]
+            audio.append(audio_tool)
+            expected_total += estimates[audio_tool]["expected_time"]
+
+        # Visual tools share the memory budget while rendering in parallel:
+        # reserve the primary tool, then add others while they reduce the makespan
+        memory_used = 0.0
+        best_time = float("inf")
+
+        if eligible["visual"]:
+            requested = [t for t in eligible["visual"] if t in style_tools]
+            primary = best_quality(requested or eligible["visual"])
+            visual.append(primary)
+            memory_used += estimates[primary]["memory_gb"]
+            best_time = self._parallel_time(visual, output_seconds)
+
+        for tool_id in eligible["visual"]:
+            if tool_id in visual:
+                continue
+            if len(audio) + len(visual) >= self.max_tools:
+                rejected.setdefault(tool_id, "tool_limit")
+                continue
+            if memory_used + estimates[tool_id]["memory_gb"] > self.memory_limit_gb:
+                rejected.setdefault(tool_id, "memory_budget")
+                continue
+
+            candidate_time = self._parallel_time(visual + [tool_id], output_seconds)
+            if candidate_time < best_time:
+                visual.append(tool_id)
+                memory_used += estimates[tool_id]["memory_gb"]
+                best_time = candidate_time
+            else:
+                rejected.setdefault(tool_id, "no_speedup")
+
+        if visual:
+            expected_total += best_time
+
+        return ToolPlan(
+            tools=visual + audio,
+            expected_render_time=expected_total,
+            estimates=estimates,
+            rejected=rejected
+        )
+
+    def _parallel_time(self, tools: List[str], output_seconds: float) -> float:
+        """Expected makespan when `tools` share the work in parallel."""
+        throughput = sum(1.0 / max(self.latency_per_second(t), 1e-6) for t in tools)
+        startup = max(
+            0.0 if t in self.warm_tools else self.get_profile(t).cold_start
+            for t in tools
+        )
+        return startup + output_seconds / throughput
@@ -10,6 +10,7 @@ import logging
 import time
 from pathlib import Path
 import json
+from collections.abc import Mapping
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -109,7 +110,8 @@ async def demo_deep_thinking():
                     }
                 },
                 "results": results
-            }, f, indent=2, ensure_ascii=False, default=str)
+            }, f, indent=2, ensure_ascii=False,
+               default=lambda o: dict(o) if isinstance(o, Mapping) else str(o))
         
         print(f"\n💾 Detailed results saved to: {results_path}")
         